@@ -0,0 +1,67 @@
+-- Migration: Add generation_jobs table and functions for the shared job queue
+-- Run this in your Supabase SQL Editor (only needed for JOB_QUEUE_BACKEND=supabase)
+
+-- Generation job queue shared by the web service and a separate worker service
+-- Used when JOB_QUEUE_BACKEND=supabase (see job_queue.py). Enqueueing and
+-- claiming go through functions so deduplication and claims are atomic.
+CREATE TABLE IF NOT EXISTS generation_jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payload JSONB,
+    result JSONB,
+    error TEXT,
+    worker TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    started_at TIMESTAMPTZ,
+    heartbeat_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_generation_jobs_status ON generation_jobs(status, created_at);
+
+-- No public policies: jobs are written and read by the backend's service_role key
+ALTER TABLE generation_jobs ENABLE ROW LEVEL SECURITY;
+
+-- Return the pending job of this kind (queued, or running with a fresh heartbeat)
+-- when dedupe is set, otherwise insert job_id as a new queued job
+CREATE OR REPLACE FUNCTION enqueue_generation_job(job_id TEXT, job_kind TEXT, job_payload JSONB, stale_seconds INTEGER, dedupe BOOLEAN)
+RETURNS SETOF generation_jobs AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('generation_jobs:' || job_kind));
+    IF dedupe THEN
+        RETURN QUERY
+        SELECT * FROM generation_jobs j
+        WHERE j.kind = job_kind
+          AND (j.status = 'queued'
+               OR (j.status = 'running' AND COALESCE(j.heartbeat_at, j.started_at) >= NOW() - make_interval(secs => stale_seconds)))
+        ORDER BY j.created_at
+        LIMIT 1;
+        IF FOUND THEN
+            RETURN;
+        END IF;
+    END IF;
+    RETURN QUERY
+    INSERT INTO generation_jobs (id, kind, status, payload)
+    VALUES (job_id, job_kind, 'queued', job_payload)
+    RETURNING *;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Move the oldest queued job of this kind to running and return it (no row if none)
+CREATE OR REPLACE FUNCTION claim_generation_job(job_kind TEXT, worker_id TEXT)
+RETURNS SETOF generation_jobs AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE generation_jobs j
+    SET status = 'running', worker = worker_id, started_at = NOW(), heartbeat_at = NOW()
+    WHERE j.id = (
+        SELECT q.id FROM generation_jobs q
+        WHERE q.kind = job_kind AND q.status = 'queued'
+        ORDER BY q.created_at
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING j.*;
+END;
+$$ LANGUAGE plpgsql;
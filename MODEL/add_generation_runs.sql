@@ -0,0 +1,27 @@
+-- Migration: Add generation_runs table for per-run token, latency and cost accounting
+-- Run this in your Supabase SQL Editor
+
+-- One row per crew.kickoff() (see run_metrics.py); article_id is set when the run saved an article
+CREATE TABLE IF NOT EXISTS generation_runs (
+    id TEXT PRIMARY KEY,
+    article_id TEXT REFERENCES articles(id) ON DELETE SET NULL,
+    model TEXT,
+    status TEXT NOT NULL,
+    error TEXT,
+    started_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    duration_ms INTEGER,
+    llm_calls INTEGER DEFAULT 0,
+    tool_calls INTEGER DEFAULT 0,
+    prompt_tokens INTEGER DEFAULT 0,
+    completion_tokens INTEGER DEFAULT 0,
+    total_tokens INTEGER DEFAULT 0,
+    cost_usd NUMERIC(12, 6) DEFAULT 0,
+    -- Per-task and per-tool breakdown, parse mode and request/token rates
+    metrics JSONB DEFAULT '{}'::jsonb
+);
+
+CREATE INDEX IF NOT EXISTS idx_generation_runs_started_at ON generation_runs(started_at DESC);
+CREATE INDEX IF NOT EXISTS idx_generation_runs_article_id ON generation_runs(article_id);
+
+-- No public policies: runs are written and read by the backend's service_role key
+ALTER TABLE generation_runs ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,38 @@
+-- Migration: Add scheduler lease table and functions for leader election
+-- Run this in your Supabase SQL Editor (only needed for SCHEDULER_LOCK_BACKEND=supabase)
+
+-- Scheduler leader election (one article generation job per cycle across all workers/hosts)
+-- Used when SCHEDULER_LOCK_BACKEND=supabase. The leader renews its lease every
+-- ttl/3 seconds; if it dies, the lease expires and another worker takes over.
+CREATE TABLE IF NOT EXISTS scheduler_leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+-- No policies: only the service_role key (which bypasses RLS) can touch leases
+ALTER TABLE scheduler_leases ENABLE ROW LEVEL SECURITY;
+
+-- Take the lease if it is free, expired, or already ours; returns TRUE if held
+CREATE OR REPLACE FUNCTION acquire_scheduler_lease(lease_name TEXT, lease_holder TEXT, ttl_seconds INTEGER)
+RETURNS BOOLEAN AS $$
+DECLARE
+    acquired BOOLEAN;
+BEGIN
+    INSERT INTO scheduler_leases AS l (name, holder, expires_at)
+    VALUES (lease_name, lease_holder, NOW() + make_interval(secs => ttl_seconds))
+    ON CONFLICT (name) DO UPDATE
+        SET holder = EXCLUDED.holder, expires_at = EXCLUDED.expires_at
+        WHERE l.holder = EXCLUDED.holder OR l.expires_at < NOW()
+    RETURNING TRUE INTO acquired;
+    RETURN COALESCE(acquired, FALSE);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION release_scheduler_lease(lease_name TEXT, lease_holder TEXT)
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM scheduler_leases
+    WHERE name = lease_name AND holder = lease_holder;
+END;
+$$ LANGUAGE plpgsql;
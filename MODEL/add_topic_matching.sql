@@ -0,0 +1,27 @@
+-- Migration: Add topic-overlap matching for related-article lookup
+-- Run this in your Supabase SQL Editor
+
+-- Related articles by stored topics. The ?| filter uses the GIN index on
+-- topics, so only articles sharing at least one topic are scored; similarity
+-- is the Jaccard overlap of the topic sets.
+CREATE OR REPLACE FUNCTION match_articles_by_topics(
+    topic_list TEXT[],
+    min_similarity REAL DEFAULT 0,
+    max_rows INTEGER DEFAULT 20
+)
+RETURNS TABLE (id TEXT, title TEXT, created_at TIMESTAMPTZ, topics JSONB, similarity REAL) AS $$
+    SELECT a.id, a.title, a.created_at, a.topics, m.similarity
+    FROM articles a
+    CROSS JOIN LATERAL (
+        SELECT COUNT(DISTINCT e.topic) FILTER (WHERE e.topic = ANY(topic_list))::REAL AS shared,
+               COUNT(DISTINCT e.topic)::REAL AS total
+        FROM jsonb_array_elements_text(a.topics) AS e(topic)
+    ) c
+    CROSS JOIN LATERAL (
+        SELECT c.shared / NULLIF(c.total + cardinality(topic_list) - c.shared, 0) AS similarity
+    ) m
+    WHERE a.topics ?| topic_list
+      AND m.similarity >= min_similarity
+    ORDER BY m.similarity DESC, a.created_at DESC
+    LIMIT max_rows;
+$$ LANGUAGE sql STABLE;
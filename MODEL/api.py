@@ -1,15 +1,26 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
+import hashlib
 import json
+import math
 import os
-from datetime import datetime
-from threading import Thread
+import sys
+from datetime import datetime, timezone
+from threading import Lock
 import time
-from model import crew
-try:
-    from google.genai.errors import ClientError as GeminiClientError
-except Exception:
-    GeminiClientError = None
+from article_cache import LRUCache
+from job_queue import get_job_queue
+from pagination import decode_cursor, encode_cursor, keyset_filter
+from checkpoints import CheckpointStore
+from ingest_store import get_store
+from topic_index import TopicIndex
+from topic_engine import TopicEngine
+from embeddings import VectorIndex
+from llm_cache import active_cache
+import source_cache
+from rate_limiter import active_limiter, retry_after_seconds
+from run_metrics import finish_run, load_run, load_runs, save_run, start_run
+from article_parser import MAX_IMAGES, clean_url, extract_images, is_image_url, parse_stats, parse_writer_output
 
 app = Flask(__name__)
 
@@ -39,6 +50,98 @@ except ImportError:
 except Exception as e:
     raise Exception(f"Error initializing Supabase: {e}")
 
+# Columns of the articles table
+ARTICLE_COLUMNS = (
+    'id', 'title', 'content', 'content_preview', 'full_text', 'created_at', 'updated_at',
+    'sources', 'images', 'topics', 'related_articles',
+)
+# Default projection for list views - mirrors the article_summaries view (no content/full_text)
+ARTICLE_LIST_FIELDS = ('id', 'title', 'content_preview', 'created_at', 'updated_at', 'sources', 'images', 'topics', 'related_articles')
+DEFAULT_PAGE_LIMIT = 20
+MAX_PAGE_LIMIT = 100
+
+# Generation jobs queued by the API and run by the generation worker (worker.py)
+job_queue = get_job_queue(supabase_client)
+# Stage outputs of generation runs, so a failed run resumes instead of starting over
+checkpoint_store = CheckpointStore()
+
+# Inverted topic index used to find related articles without scanning the table
+topic_index = TopicIndex()
+# TF-IDF topic extraction against document frequencies of saved articles
+topic_engine = TopicEngine()
+# Article embeddings for semantic related-article / duplicate detection (loaded on first use)
+semantic_index = VectorIndex()
+# Cosine thresholds; the defaults suit the hashed n-gram embedder (raise them for a SEMANTIC_MODEL)
+SEMANTIC_RELATED_THRESHOLD = float(os.getenv('SEMANTIC_RELATED_THRESHOLD', '0.3'))
+SEMANTIC_DUPLICATE_THRESHOLD = float(os.getenv('SEMANTIC_DUPLICATE_THRESHOLD', '0.6'))
+MAX_RELATED_ARTICLES = 3
+
+# Read-through caches for the read endpoints. New articles arrive roughly every
+# 30 minutes, so a short TTL bounds staleness for writes made by other processes;
+# writes from this process invalidate immediately (see save_article).
+ARTICLE_CACHE_TTL_SECONDS = float(os.getenv('ARTICLE_CACHE_TTL_SECONDS', '300'))
+# Recently served full articles, keyed by ID
+_article_lru = LRUCache(maxsize=int(os.getenv('ARTICLE_LRU_SIZE', '256')), ttl=ARTICLE_CACHE_TTL_SECONDS)
+# Latest article (single entry)
+_latest_cache = LRUCache(maxsize=1, ttl=ARTICLE_CACHE_TTL_SECONDS)
+# Feed pages, keyed by (limit, cursor, fields)
+_feed_cache = LRUCache(maxsize=int(os.getenv('FEED_CACHE_SIZE', '64')), ttl=ARTICLE_CACHE_TTL_SECONDS)
+
+def invalidate_article_caches(article_id=None):
+    """Drop cached reads after a write (one article plus every list/latest entry)"""
+    if article_id:
+        _article_lru.pop(article_id)
+    _latest_cache.clear()
+    _feed_cache.clear()
+
+def article_cache_stats():
+    """Hit/miss counters for the article read caches"""
+    return {
+        "articles": _article_lru.stats(),
+        "latest": _latest_cache.stats(),
+        "feed": _feed_cache.stats(),
+    }
+
+def _parse_json_list(value):
+    """Coerce a JSONB column value into a list"""
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    # If it's a string, try to parse it
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+            return parsed if isinstance(parsed, list) else []
+        except:
+            return []
+    return []
+
+def _row_to_article(row, fields=None):
+    """Convert a Supabase row to article format, keeping only `fields` when given"""
+    article = {
+        'id': row.get('id'),
+        'title': row.get('title'),
+        'content': row.get('content'),
+        'content_preview': row.get('content_preview'),  # 4-5 line summary
+        'full_text': row.get('full_text', ''),
+        'created_at': row.get('created_at'),
+        'updated_at': row.get('updated_at'),
+        # Handle JSONB columns - ensure they're properly converted to lists
+        'sources': _parse_json_list(row.get('sources')),
+        'images': _parse_json_list(row.get('images')),  # Ensure it's always a list
+        'topics': row.get('topics') if isinstance(row.get('topics'), list) else [],
+        'related_articles': row.get('related_articles') if isinstance(row.get('related_articles'), list) else []
+    }
+    if fields is not None:
+        article = {key: value for key, value in article.items() if key in fields}
+    
+    # Generate content_preview if not present (for backward compatibility)
+    if 'content_preview' in article and not article['content_preview']:
+        article['content_preview'] = generate_content_preview(row.get('content', ''), max_lines=5, max_chars_per_line=100)
+    
+    return article
+
 def load_articles():
     """Load all articles from Supabase"""
     articles = []
@@ -47,53 +150,7 @@ def load_articles():
         response = supabase_client.table('articles').select('*').order('created_at', desc=True).execute()
         if response.data:
             for row in response.data:
-                # Convert Supabase row to article format
-                # Handle JSONB columns - ensure they're properly converted to lists
-                images_data = row.get('images')
-                if images_data is None:
-                    images_data = []
-                elif not isinstance(images_data, list):
-                    # If it's a string, try to parse it
-                    if isinstance(images_data, str):
-                        try:
-                            import json
-                            images_data = json.loads(images_data)
-                        except:
-                            images_data = []
-                    else:
-                        images_data = []
-                
-                sources_data = row.get('sources')
-                if sources_data is None:
-                    sources_data = []
-                elif not isinstance(sources_data, list):
-                    if isinstance(sources_data, str):
-                        try:
-                            import json
-                            sources_data = json.loads(sources_data)
-                        except:
-                            sources_data = []
-                    else:
-                        sources_data = []
-                
-                # Generate content_preview if not present (for backward compatibility)
-                content_preview = row.get('content_preview')
-                if not content_preview:
-                    # Generate preview from content if not stored
-                    content_preview = generate_content_preview(row.get('content', ''), max_lines=5, max_chars_per_line=100)
-                
-                article = {
-                    'id': row.get('id'),
-                    'title': row.get('title'),
-                    'content': row.get('content'),
-                    'content_preview': content_preview,  # 4-5 line summary
-                    'full_text': row.get('full_text', ''),
-                    'created_at': row.get('created_at'),
-                    'sources': sources_data,
-                    'images': images_data,  # Ensure it's always a list
-                    'topics': row.get('topics') if isinstance(row.get('topics'), list) else [],
-                    'related_articles': row.get('related_articles') if isinstance(row.get('related_articles'), list) else []
-                }
+                article = _row_to_article(row)
                 
                 # Debug: Log image count for each article
                 if article.get('images'):
@@ -109,6 +166,143 @@ def load_articles():
     
     return articles
 
+def load_article_by_id(article_id):
+    """Load a single article by ID (primary-key lookup), or None if it doesn't exist"""
+    article = _article_lru.get(article_id)
+    if article is not None:
+        return article
+    
+    response = supabase_client.table('articles').select('*').eq('id', article_id).limit(1).execute()
+    if not response.data:
+        return None
+    article = _row_to_article(response.data[0])
+    _article_lru.put(article_id, article)
+    return article
+
+def load_latest_article():
+    """Load the most recent article (single row via idx_articles_created_at), or None"""
+    article = _latest_cache.get('latest')
+    if article is not None:
+        return article
+    
+    response = supabase_client.table('articles').select('*').order('created_at', desc=True).limit(1).execute()
+    if not response.data:
+        return None
+    article = _row_to_article(response.data[0])
+    _latest_cache.put('latest', article)
+    _article_lru.put(article['id'], article)
+    return article
+
+def load_article_page(limit=DEFAULT_PAGE_LIMIT, cursor=None, fields=ARTICLE_LIST_FIELDS):
+    """
+    Load one page of articles (newest first) using keyset pagination.
+    
+    Only the requested columns (plus id, created_at and updated_at) are
+    selected, and rows are ordered by
+    (created_at, id) so the query walks idx_articles_created_at instead of
+    scanning the whole table. Returns (articles, next_cursor); next_cursor
+    is None on the last page. Raises on database errors.
+    """
+    cache_key = (limit, cursor, tuple(fields))
+    cached = _feed_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # id/created_at build the next cursor and updated_at feeds the ETag, so they are always included
+    fields = tuple(dict.fromkeys(['id', 'created_at', 'updated_at', *fields]))
+    query = (
+        supabase_client.table('articles')
+        .select(','.join(fields))
+        .order('created_at', desc=True)
+        .order('id', desc=True)
+        .limit(limit + 1)
+    )
+    if cursor:
+        created_at, article_id = decode_cursor(cursor)
+        query = query.or_(keyset_filter(created_at, article_id, descending=True))
+    response = query.execute()
+    rows = response.data or []
+    
+    # Older rows have no stored content_preview: fetch content for just those to build one
+    if 'content_preview' in fields and 'content' not in fields:
+        missing = [row['id'] for row in rows[:limit] if not row.get('content_preview')]
+        if missing:
+            content = supabase_client.table('articles').select('id,content').in_('id', missing).execute()
+            by_id = {row['id']: row.get('content') or '' for row in content.data or []}
+            for row in rows[:limit]:
+                if row['id'] in by_id:
+                    row['content'] = by_id[row['id']]
+    
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    articles = [_row_to_article(row, fields) for row in rows[:limit]]
+    _feed_cache.put(cache_key, (articles, next_cursor))
+    return articles, next_cursor
+
+# HTTP caching policy. Articles are generated about every 30 minutes: feed and
+# latest responses stay fresh for 5 minutes and may be served stale while a CDN
+# revalidates; a single article rarely changes once written.
+FEED_CACHE_CONTROL = os.getenv('FEED_CACHE_CONTROL', 'public, max-age=300, stale-while-revalidate=1500')
+ARTICLE_CACHE_CONTROL = os.getenv('ARTICLE_CACHE_CONTROL', 'public, max-age=1800, stale-while-revalidate=86400')
+
+def _parse_timestamp(value):
+    """Parse an ISO timestamp from Supabase into an aware datetime, or None"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def _articles_etag(articles, *extra):
+    """Strong ETag over article IDs and their updated_at (plus any request-specific parts)"""
+    digest = hashlib.sha256()
+    for article in articles:
+        digest.update(f"{article.get('id')}|{article.get('updated_at') or article.get('created_at')}\n".encode('utf-8'))
+    for part in extra:
+        digest.update(f"{part}\n".encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+def _conditional_json(payload, articles, cache_control, *etag_extra):
+    """
+    JSON response with ETag, Last-Modified and Cache-Control set.
+    
+    Returns 304 Not Modified (no body) when If-None-Match / If-Modified-Since
+    show the client already has this version.
+    """
+    response = jsonify(payload)
+    response.set_etag(_articles_etag(articles, *etag_extra))
+    timestamps = [
+        ts for ts in (_parse_timestamp(a.get('updated_at') or a.get('created_at')) for a in articles)
+        if ts is not None
+    ]
+    if timestamps:
+        response.last_modified = max(timestamps)
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
+
+def _parse_limit(value):
+    """Parse the `limit` query parameter, clamped to MAX_PAGE_LIMIT"""
+    if value is None or value == '':
+        return DEFAULT_PAGE_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    return min(limit, MAX_PAGE_LIMIT)
+
+def _parse_fields(value):
+    """Parse the `fields` query parameter into a tuple of known columns"""
+    if not value:
+        return ARTICLE_LIST_FIELDS
+    fields = tuple(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in ARTICLE_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(ARTICLE_COLUMNS)}")
+    return fields or ARTICLE_LIST_FIELDS
+
 def save_article(article):
     """Save a single article to Supabase"""
     article_id = article.get('id', datetime.now().strftime("%Y%m%d%H%M%S"))
@@ -127,21 +321,10 @@ def save_article(article):
             article_images = []
         
         # Validate image URLs before saving
-        validated_article_images = []
-        for img_url in article_images:
-            if not img_url or not isinstance(img_url, str):
-                continue
-            # Clean and validate URL
-            img_url = img_url.strip().rstrip('.,;)\'"<>')
-            if img_url.startswith('http') and len(img_url) > 10:
-                # Check if it looks like a valid image URL
-                img_url_lower = img_url.lower()
-                if (any(ext in img_url_lower for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.bmp']) or
-                    any(keyword in img_url_lower for keyword in ['/image', '/photo', '/img', '/picture', '/media']) or
-                    any(domain in img_url_lower for domain in ['imgur', 'flickr', 'unsplash', 'pexels', 'getty', 'cdn', 'media', 'static', 'cloudinary'])):
-                    validated_article_images.append(img_url)
-        
-        article_images = validated_article_images
+        article_images = [
+            clean_url(img_url) for img_url in article_images
+            if isinstance(img_url, str) and is_image_url(clean_url(img_url))
+        ]
         
         # Log images being saved
         if article_images:
@@ -154,25 +337,9 @@ def save_article(article):
             
             # Try to extract from full_text as last resort
             if article.get('full_text'):
-                import re
-                full_text = article.get('full_text', '')
-                img_patterns = [
-                    r'https?://[^\s<>"\)]+\.(?:jpg|jpeg|png|gif|webp|svg|bmp)(?:\?[^\s<>"\)]*)?',
-                    r'https?://[^\s<>"\)]+image[^\s<>"\)]*(?:\.(?:jpg|jpeg|png|gif|webp))?',
-                    r'https?://[^\s<>"\)]+/image[s]?/[^\s<>"\)]+',
-                    r'https?://[^\s<>"\)]+/photo[s]?/[^\s<>"\)]+',
-                ]
-                for pattern in img_patterns:
-                    matches = re.findall(pattern, full_text, re.IGNORECASE)
-                    for match in matches:
-                        if isinstance(match, str) and match.startswith('http'):
-                            # Validate before adding
-                            match = match.strip().rstrip('.,;)\'"<>')
-                            if len(match) > 10 and match not in article_images:
-                                article_images.append(match)
-                                print(f"✅ Found image in full_text: {match[:80]}...")
-                    if article_images:
-                        break
+                article_images = extract_images(article['full_text'])[:MAX_IMAGES]
+                for img_url in article_images:
+                    print(f"✅ Found image in full_text: {img_url[:80]}...")
             
             if not article_images:
                 print("❌ ERROR: Article has no images after all extraction attempts!")
@@ -253,6 +420,16 @@ def save_article(article):
                 raise
         
         if response.data:
+            # Drop stale cached reads so the next request sees the new article
+            invalidate_article_caches(article_id)
+            try:
+                topic_index.add(article_id, supabase_data['title'], supabase_data['created_at'], supabase_data['topics'])
+                topic_engine.add_document(article_id, supabase_data['title'], supabase_data['content'])
+                if semantic_index.enabled:
+                    semantic_index.add(article_id, supabase_data['title'], supabase_data['created_at'], supabase_data['content'])
+            except Exception as index_error:
+                # The index catches up from Supabase on the next generation
+                print(f"⚠️  Could not update topic index for {article_id}: {index_error}")
             image_count = len(article_images)
             print(f"✅ Article saved to Supabase: {article_id} - {article.get('title', 'Untitled')[:50]}")
             print(f"   📸 Images saved: {image_count}")
@@ -343,194 +520,80 @@ def generate_content_preview(content, max_lines=5, max_chars_per_line=100):
     return preview
 
 def extract_topics(title, content):
-    """Extract main topics/keywords from article title and content"""
-    import re
-    # Simple keyword extraction - can be enhanced with NLP
-    text = (title + " " + content).lower()
-    
-    # Remove common stop words
-    stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'been', 'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'what', 'which', 'who', 'when', 'where', 'why', 'how'}
-    
-    # Extract words (3+ characters, alphanumeric)
-    words = re.findall(r'\b[a-z]{3,}\b', text)
-    words = [w for w in words if w not in stop_words]
+    """Extract the top 10 topics/keywords of an article (TF-IDF, see topic_engine.py)"""
+    return topic_engine.extract(title, content)
+
+def extract_topics_many(documents):
+    """extract_topics for a batch of (title, content) pairs in one pass"""
+    return topic_engine.extract_many(documents)
+
+# Set once the match_articles_by_topics RPC turns out to be missing (add_topic_matching.sql)
+_topic_rpc_unavailable = False
+
+def find_similar_articles(new_title, new_content, similarity_threshold=0.3, topics=None, max_rows=20):
+    """
+    Find stored articles with similar topics (Jaccard over topic sets), best first.
     
-    # Count frequency
-    from collections import Counter
-    word_freq = Counter(words)
+    Matches on the stored topics column inside Supabase, so only articles sharing
+    a topic cross the wire; falls back to the local topic index if the RPC is not
+    installed. Each match is {'article': {id, title, created_at}, 'similarity', 'common_topics'}.
+    """
+    global _topic_rpc_unavailable
+    if topics is None:
+        topics = extract_topics(new_title, new_content)
+    topics = sorted(set(topics))
+    if not topics:
+        return []
     
-    # Get top 5-10 keywords as topics
-    topics = [word for word, count in word_freq.most_common(10)]
+    if not _topic_rpc_unavailable:
+        try:
+            response = supabase_client.rpc('match_articles_by_topics', {
+                'topic_list': topics,
+                'min_similarity': similarity_threshold,
+                'max_rows': max_rows,
+            }).execute()
+            new_topics = set(topics)
+            return [{
+                'article': {'id': row['id'], 'title': row['title'], 'created_at': row['created_at']},
+                'similarity': row['similarity'],
+                'common_topics': [t for t in _parse_json_list(row.get('topics')) if t in new_topics],
+            } for row in response.data or []]
+        except Exception as e:
+            if 'match_articles_by_topics' in str(e) or 'PGRST202' in str(e):
+                _topic_rpc_unavailable = True
+                print("⚠️  match_articles_by_topics not found in database. Using the local topic index instead.")
+                print("💡 Run the migration SQL in Supabase SQL Editor:")
+                print("   File: add_topic_matching.sql")
+            else:
+                print(f"⚠️  Topic match query failed ({e}). Using the local topic index instead.")
     
-    return topics
+    # Fallback: local inverted index, caught up from Supabase first
+    try:
+        topic_index.sync_from_supabase(supabase_client, extract_topics=extract_topics)
+    except Exception as sync_error:
+        print(f"[{datetime.now()}] ⚠️  Could not sync topic index from Supabase: {sync_error}")
+    return topic_index.search(topics, similarity_threshold=similarity_threshold, limit=max_rows)
 
-def find_similar_articles(new_title, new_content, existing_articles, similarity_threshold=0.3):
-    """Find articles with similar topics"""
-    new_topics = set(extract_topics(new_title, new_content))
-    
-    similar_articles = []
-    for article in existing_articles:
-        existing_title = article.get('title', '')
-        existing_content = article.get('content', '')
-        existing_topics = set(extract_topics(existing_title, existing_content))
-        
-        # Calculate similarity (Jaccard similarity)
-        if len(new_topics) > 0 and len(existing_topics) > 0:
-            intersection = len(new_topics & existing_topics)
-            union = len(new_topics | existing_topics)
-            similarity = intersection / union if union > 0 else 0
-            
-            if similarity >= similarity_threshold:
-                similar_articles.append({
-                    'article': article,
-                    'similarity': similarity,
-                    'common_topics': list(new_topics & existing_topics)
-                })
-    
-    # Sort by similarity (highest first)
-    similar_articles.sort(key=lambda x: x['similarity'], reverse=True)
-    return similar_articles
-
-def parse_article(result_text):
-    """Parse article result into structured format"""
-    import re
-    article_text = str(result_text)
-    sources = []
-    images = []
-    
-    # Extract sources
-    if "Sources:" in article_text or "Source:" in article_text:
-        sources_section = article_text.split("Sources:")[-1] if "Sources:" in article_text else ""
-        if not sources_section:
-            sources_section = article_text.split("Source:")[-1] if "Source:" in article_text else ""
-        
-        for line in sources_section.split('\n'):
-            line = line.strip()
-            if line and ('http' in line or 'www.' in line):
-                if ' - ' in line:
-                    parts = line.split(' - ', 1)
-                    source_name = parts[0].replace('Source:', '').strip()
-                    source_url = parts[1].strip()
-                    sources.append({"name": source_name, "url": source_url})
-                elif 'http' in line:
-                    url = line.split('http')[1] if 'http' in line else line
-                    if not url.startswith('http'):
-                        url = 'http' + url
-                    sources.append({"name": "Source", "url": url})
-    
-    # Extract image URLs from the article text
-    # Look for common image URL patterns - enhanced to catch more variations
-    image_patterns = [
-        r'https?://[^\s<>"\)]+\.(?:jpg|jpeg|png|gif|webp|svg|bmp)(?:\?[^\s<>"\)]*)?',
-        r'https?://[^\s<>"\)]+image[^\s<>"\)]*(?:\.(?:jpg|jpeg|png|gif|webp))?',
-        r'https?://[^\s<>"\)]+photo[^\s<>"\)]*(?:\.(?:jpg|jpeg|png|gif|webp))?',
-        r'image_url["\']?\s*[:=]\s*["\']?(https?://[^\s<>"\)]+)',
-        r'image["\']?\s*[:=]\s*["\']?(https?://[^\s<>"\)]+)',
-        r'urlToImage["\']?\s*[:=]\s*["\']?(https?://[^\s<>"\)]+)',
-        r'https?://[^\s<>"\)]+/image[s]?/[^\s<>"\)]+',
-        r'https?://[^\s<>"\)]+/photo[s]?/[^\s<>"\)]+',
-        r'"image_urls"\s*:\s*\[(.*?)\]',  # JSON array of image URLs
-        r'"image_url"\s*:\s*"(https?://[^"]+)"',  # JSON image_url field
-    ]
-    
-    for pattern in image_patterns:
-        matches = re.findall(pattern, article_text, re.IGNORECASE)
-        for match in matches:
-            img_url = match if isinstance(match, str) else match[0] if match else None
-            if img_url:
-                # Clean up URL (remove quotes, trailing punctuation)
-                img_url = img_url.strip('"\'.,;')
-                # Validate it's a real image URL
-                if img_url.startswith('http') and img_url not in images:
-                    # Check if it looks like an image URL
-                    if any(ext in img_url.lower() for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '/image', '/photo', 'image', 'photo']) or \
-                       any(domain in img_url.lower() for domain in ['imgur', 'flickr', 'unsplash', 'pexels', 'getty', 'cdn', 'media', 'static']):
-                        images.append(img_url)
-    
-    # Also extract from JSON structures if present
+def find_semantic_matches(new_title, new_content, k=MAX_RELATED_ARTICLES):
+    """
+    Stored articles closest to the new one by embedding (cosine), best first.
+    Same shape as find_similar_articles; common_topics is left empty.
+    """
     try:
-        # Try to parse as JSON if it contains JSON structures
-        if '"image_urls"' in article_text or '"image_url"' in article_text:
-            json_matches = re.findall(r'"image_urls"\s*:\s*\[(.*?)\]', article_text, re.IGNORECASE | re.DOTALL)
-            for json_match in json_matches:
-                # Extract URLs from JSON array
-                url_matches = re.findall(r'"(https?://[^"]+)"', json_match)
-                for url in url_matches:
-                    if url not in images:
-                        images.append(url)
-    except:
-        pass
-    
-    # Also check if images are mentioned in a structured format
-    if "Images:" in article_text or "Image:" in article_text:
-        images_section = article_text.split("Images:")[-1] if "Images:" in article_text else ""
-        if not images_section:
-            images_section = article_text.split("Image:")[-1] if "Image:" in article_text else ""
-        
-        # Split by Sources: to stop at sources section
-        if "Sources:" in images_section:
-            images_section = images_section.split("Sources:")[0]
-        elif "Source:" in images_section:
-            images_section = images_section.split("Source:")[0]
-        
-        for line in images_section.split('\n'):
-            line = line.strip()
-            # Handle both "Image: https://..." and just "https://..." formats
-            if line:
-                # Remove "Image:" prefix if present
-                if line.lower().startswith('image:'):
-                    line = line[6:].strip()  # Remove "Image:" prefix
-                
-                # Extract URL from line
-                if 'http' in line:
-                    url_match = re.search(r'https?://[^\s<>"]+', line)
-                    if url_match:
-                        img_url = url_match.group(0)
-                        # Clean up URL
-                        img_url = img_url.rstrip('.,;)\'"')
-                        if img_url.startswith('http') and img_url not in images:
-                            images.append(img_url)
-                            print(f"✅ Extracted image from Images section: {img_url[:80]}...")
-    
-    # Remove duplicates and invalid URLs
-    images = list(dict.fromkeys(images))  # Remove duplicates while preserving order
-    
-    # Validate and clean URLs
-    validated_images = []
-    for img_url in images:
-        if not img_url or not isinstance(img_url, str):
-            continue
-        
-        # Must start with http/https
-        if not img_url.startswith('http'):
-            continue
-        
-        # Must be at least 10 characters
-        if len(img_url) < 10:
-            continue
-        
-        # Clean up URL - remove common trailing characters
-        img_url = img_url.rstrip('.,;)\'"<>')
-        
-        # Remove common invalid patterns
-        if any(invalid in img_url.lower() for invalid in ['placeholder', 'default', 'none', 'null', 'undefined']):
-            continue
-        
-        # Check if URL looks like an image URL
-        # Either has image extension, or contains image-related keywords, or from known image domains
-        img_url_lower = img_url.lower()
-        is_image_url = (
-            any(ext in img_url_lower for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.bmp', '.jfif']) or
-            any(keyword in img_url_lower for keyword in ['/image', '/photo', '/img', '/picture', '/media']) or
-            any(domain in img_url_lower for domain in ['imgur', 'flickr', 'unsplash', 'pexels', 'getty', 'cdn', 'media', 'static', 'cloudinary', 'images.unsplash'])
-        )
-        
-        if is_image_url:
-            validated_images.append(img_url)
-        else:
-            print(f"⚠️  Skipped non-image URL: {img_url[:80]}...")
-    
-    images = validated_images
+        semantic_index.sync_from_supabase(supabase_client)
+    except Exception as sync_error:
+        print(f"[{datetime.now()}] ⚠️  Could not sync semantic index from Supabase: {sync_error}")
+    vector = semantic_index.embed(new_title, new_content)
+    matches = semantic_index.search(vector, k=k, min_similarity=SEMANTIC_RELATED_THRESHOLD)
+    for match in matches:
+        match['common_topics'] = []
+    return matches
+
+def parse_article(result):
+    """Parse the crew result (structured output, or text as a fallback) into article fields"""
+    parsed = parse_writer_output(result)
+    title, content, images = parsed.title, parsed.content, parsed.images
+    print(f"[{datetime.now()}] 🧩 Parsed writer output ({parsed.mode}) in {parsed.parse_ms:.2f}ms - {parse_stats.stats()}")
     
     # Log extracted images for debugging
     print(f"📸 Extracted {len(images)} valid image URL(s) from article")
@@ -539,99 +602,8 @@ def parse_article(result_text):
             print(f"   Image {idx}: {img_url[:100]}")
     else:
         print("   ⚠️  WARNING: No valid images extracted from article text!")
-        print("   🔍 Checking if images are in full_text...")
-    
-    # Extract title - try multiple methods
-    title = "Flash News: Top Global Events"  # Default fallback
-    
-    # Method 1: Look for markdown-style headings (# Title)
-    heading_match = re.search(r'^#+\s+(.+)$', article_text, re.MULTILINE)
-    if heading_match:
-        potential_title = heading_match.group(1).strip()
-        if 10 <= len(potential_title) <= 150:  # Reasonable title length
-            title = potential_title
-    
-    # Method 2: Check first line if it looks like a title
-    if title == "Flash News: Top Global Events" and '\n' in article_text:
-        first_line = article_text.split('\n')[0].strip()
-        # Remove common prefixes and clean up
-        first_line = re.sub(r'^(Breaking News|News|Flash News|Update):\s*', '', first_line, flags=re.IGNORECASE)
-        first_line = re.sub(r'^#+\s*', '', first_line).strip()
-        
-        # Check if first line looks like a title (not too long, not a full sentence)
-        if 10 <= len(first_line) <= 150 and not first_line.endswith('.') and not first_line.endswith('!'):
-            title = first_line
-    
-    # Method 3: Look for title patterns in the text
-    if title == "Flash News: Top Global Events":
-        # Look for lines that might be titles (short, capitalized, at the start)
-        lines = article_text.split('\n')[:5]  # Check first 5 lines
-        for line in lines:
-            line = line.strip()
-            # Check if line looks like a title
-            if (10 <= len(line) <= 150 and 
-                not line.endswith('.') and 
-                not line.endswith(',') and
-                not line.startswith('http') and
-                line[0].isupper() if line else False):
-                # Additional check: not too many lowercase words (titles are usually shorter phrases)
-                words = line.split()
-                if len(words) <= 15:  # Titles are usually 15 words or less
-                    title = line
-                    break
-    
-    # Clean up title - remove markdown, extra formatting
-    title = re.sub(r'^#+\s*', '', title).strip()
-    title = re.sub(r'\*+', '', title).strip()
-    title = re.sub(r'^["\']|["\']$', '', title).strip()  # Remove quotes
-    
-    # Ensure title is not empty
-    if not title or len(title) < 5:
-        title = "Flash News: Top Global Events"
-    
     print(f"📰 Extracted article title: {title}")
     
-    # Extract content - remove Images and Sources sections
-    content = article_text
-    if "Sources:" in content:
-        content = content.split("Sources:")[0].strip()
-    elif "Source:" in content and len(sources) > 0:
-        lines = content.split('\n')
-        content = '\n'.join([l for l in lines if not any(s['url'] in l for s in sources)])
-    
-    # Remove Images section from content
-    if "Images:" in content:
-        content = content.split("Images:")[0].strip()
-    elif "Image:" in content:
-        # Only remove if it's at the end (part of the structured format)
-        if "Image:" in content and ("Sources:" in content or "Source:" in content):
-            # Find where Images section starts
-            images_start = content.find("Image:")
-            sources_start = content.find("Sources:") if "Sources:" in content else content.find("Source:")
-            if images_start < sources_start:
-                content = content[:images_start].strip()
-    
-    # Remove image URLs from content if they appear as text
-    for img_url in images:
-        content = content.replace(img_url, '').strip()
-    
-    # Clean up and format content
-    # Remove multiple consecutive newlines
-    import re
-    content = re.sub(r'\n{3,}', '\n\n', content)
-    
-    # Remove leading/trailing whitespace from each line
-    lines = [line.strip() for line in content.split('\n')]
-    content = '\n'.join(lines)
-    
-    # Remove empty paragraphs
-    paragraphs = [p for p in content.split('\n\n') if p.strip()]
-    content = '\n\n'.join(paragraphs)
-    
-    # Clean up title - remove markdown formatting if present
-    title = re.sub(r'^#+\s*', '', title).strip()
-    title = re.sub(r'\*+', '', title).strip()
-    
     # Extract topics from the article
     topics = extract_topics(title, content)
     
@@ -642,11 +614,43 @@ def parse_article(result_text):
         "title": title,
         "content": content,
         "content_preview": content_preview,  # 4-5 line summary for preview
-        "sources": sources,
-        "images": images[:5] if images else [],  # Limit to 5 images max
+        "sources": parsed.sources,
+        "images": images,  # At most 5 images
         "topics": topics,  # Store topics for duplicate detection
-        "full_text": article_text
-    }
+        "full_text": parsed.full_text
+    }, {"mode": parsed.mode, "parse_ms": round(parsed.parse_ms, 3)}
+
+# The model layer (crewai, google-genai, tools, agents and the crew) takes
+# seconds to import, so it is loaded on the first generation. Processes that
+# only serve reads never import it.
+_crew = None
+_crew_lock = Lock()
+
+def get_crew():
+    """Import model.py on first use and return its crew"""
+    global _crew
+    if _crew is None:
+        with _crew_lock:
+            if _crew is None:
+                started = time.perf_counter()
+                from model import crew
+                _crew = crew
+                print(f"[{datetime.now()}] 🧠 Model layer loaded in {time.perf_counter() - started:.2f}s")
+    return _crew
+
+def model_loaded():
+    """True once the model layer has been imported in this process"""
+    return _crew is not None
+
+def _is_gemini_client_error(error):
+    """True if error is a google-genai ClientError (only importable once the model layer is loaded)"""
+    try:
+        from google.genai.errors import ClientError
+    except Exception:
+        return False
+    return isinstance(error, ClientError)
+
+GEMINI_QUOTA_MESSAGE = "Gemini quota exhausted. Please add billing or try again later."
 
 def _is_gemini_quota_error(error: Exception) -> bool:
     """Return True if the exception looks like a Gemini quota/429 error."""
@@ -657,40 +661,114 @@ def _is_gemini_quota_error(error: Exception) -> bool:
         or ("429" in message)
     )
 
+def _quota_retry_after(error):
+    """Seconds to wait after a quota error: the API's retry hint or limiter pause, else GEMINI_QUOTA_BACKOFF_SECONDS"""
+    limiter = active_limiter()
+    wait = max(retry_after_seconds(error) or 0, limiter.blocked_for() if limiter else 0)
+    if not wait:
+        wait = int(os.getenv("GEMINI_QUOTA_BACKOFF_SECONDS", "1800"))
+    return int(math.ceil(wait))
+
+# Serializes generation within a process (scheduler cycles and queued jobs)
+_generation_lock = Lock()
+
 def generate_article_task():
-    """Background task to generate article"""
+    """
+    Generate, parse and save one article.
+    
+    Resumes the latest failed pipeline run from its last checkpointed stage
+    when there is one (see checkpoints.py).
+    
+    Returns a result dict: {"success": True, "article": ..., "similar_articles_found": n}
+    or {"success": False, "error": ..., "code": ..., "resumable": bool}, plus a
+    "run" summary of the generation's tokens, time and cost and the
+    "checkpoint" it used. Never raises.
+    """
+    with _generation_lock:
+        run = start_run()
+        try:
+            checkpoint = checkpoint_store.resume_or_begin()
+        except Exception as e:
+            print(f"[{datetime.now()}] ⚠️  Checkpoints unavailable ({e}); generating from scratch")
+            checkpoint = None
+        if checkpoint is not None and checkpoint.stages:
+            print(f"[{datetime.now()}] ♻️  Resuming pipeline run {checkpoint.run_id[:8]} (attempt {checkpoint.attempt}), saved stages: {', '.join(sorted(checkpoint.stages))}")
+        result = _generate_article(run, checkpoint)
+        if checkpoint is not None:
+            if result.get("success"):
+                # Ingested items the candidates were read from are now covered by an article
+                read_at = checkpoint.stages.get("ingest_read_at")
+                if read_at:
+                    get_store().set_watermark(read_at)
+                from model import release_draft
+                release_draft(checkpoint)
+                checkpoint_store.complete(checkpoint.run_id, result["article"]["id"])
+            else:
+                result["resumable"] = checkpoint_store.is_resumable(checkpoint)
+            run.checkpoint = {"run_id": checkpoint.run_id, "attempt": checkpoint.attempt, "resumed": checkpoint.resumed}
+            result["checkpoint"] = run.checkpoint
+        limiter = active_limiter()
+        run.rate_limit = limiter.stats() if limiter else None
+        cache = active_cache()
+        run.llm_cache = cache.stats() if cache else None
+        run.source_cache = source_cache.stats()
+        finish_run(run, "succeeded" if result.get("success") else "failed", error=result.get("error"))
+        save_run(supabase_client, run)
+        row = run.to_row()
+        result["run"] = {key: row[key] for key in ("id", "duration_ms", "llm_calls", "tool_calls", "total_tokens", "cost_usd")}
+        return result
+
+def _generate_article(run, checkpoint=None):
     try:
         print(f"[{datetime.now()}] Starting article generation...")
         
-        # Load existing articles to check for duplicates
-        existing_articles = load_articles()
-        print(f"[{datetime.now()}] Checking {len(existing_articles)} existing articles for similar topics...")
+        # Seed topic document frequencies from stored articles on first use
+        try:
+            topic_engine.bootstrap_from_supabase(supabase_client)
+        except Exception as seed_error:
+            print(f"[{datetime.now()}] ⚠️  Could not seed topic statistics: {seed_error}")
         
         # Generate the article
+        get_crew()
+        from model import discard_draft, gemini_model, run_pipeline
+        run.model = gemini_model
         try:
-            result = crew.kickoff()
+            result = run_pipeline(checkpoint)
         except Exception as kickoff_err:
-            if GeminiClientError and isinstance(kickoff_err, GeminiClientError):
-                if getattr(kickoff_err, "status_code", None) == 429 or _is_gemini_quota_error(kickoff_err):
-                    backoff_seconds = int(os.getenv("GEMINI_QUOTA_BACKOFF_SECONDS", "1800"))
-                    print(f"[{datetime.now()}] ❌ Gemini quota exhausted (429). Will retry after backoff: {backoff_seconds}s")
-                    return
-            if _is_gemini_quota_error(kickoff_err):
-                backoff_seconds = int(os.getenv("GEMINI_QUOTA_BACKOFF_SECONDS", "1800"))
-                print(f"[{datetime.now()}] ❌ Gemini quota exhausted. Will retry after backoff: {backoff_seconds}s")
-                return
+            if _is_gemini_quota_error(kickoff_err) or (
+                _is_gemini_client_error(kickoff_err) and getattr(kickoff_err, "status_code", None) == 429
+            ):
+                retry_after = _quota_retry_after(kickoff_err)
+                print(f"[{datetime.now()}] ❌ Gemini quota exhausted (429). Retry after {retry_after}s")
+                return {"success": False, "error": GEMINI_QUOTA_MESSAGE, "code": 429, "retry_after": retry_after}
             raise
-        article_data = parse_article(result)
+        article_data, parse_info = parse_article(result)
+        run.parse = parse_info
+        if not article_data['content'].strip():
+            # Redo only the writer next time
+            if checkpoint is not None:
+                discard_draft(checkpoint)
+            print(f"[{datetime.now()}] ❌ Writer output had no article content ({parse_info['mode']} parse)")
+            return {"success": False, "error": "Writer output had no article content", "code": 502}
         article_data["id"] = datetime.now().strftime("%Y%m%d%H%M%S")
         article_data["created_at"] = datetime.now().isoformat()
         
-        # Check for similar articles
-        similar_articles = find_similar_articles(
-            article_data['title'], 
-            article_data['content'], 
-            existing_articles,
-            similarity_threshold=0.4  # 40% topic overlap considered similar
-        )
+        # Check for similar articles: by embedding when available, else by topic overlap
+        similar_articles = None
+        duplicate_threshold = 0.7
+        if semantic_index.enabled:
+            try:
+                similar_articles = find_semantic_matches(article_data['title'], article_data['content'])
+                duplicate_threshold = SEMANTIC_DUPLICATE_THRESHOLD
+            except Exception as semantic_error:
+                print(f"[{datetime.now()}] ⚠️  Semantic similarity check failed ({semantic_error}), using topic overlap")
+        if similar_articles is None:
+            similar_articles = find_similar_articles(
+                article_data['title'], 
+                article_data['content'], 
+                similarity_threshold=0.4,  # 40% topic overlap considered similar
+                topics=article_data.get('topics'),
+            )
         
         # If similar articles found, add reference to the most recent one
         if similar_articles:
@@ -700,21 +778,21 @@ def generate_article_task():
             common_topics = most_similar['common_topics']
             
             print(f"[{datetime.now()}] Found similar article: '{prev_article.get('title', 'Unknown')}' (similarity: {similarity_score:.2%})")
-            print(f"[{datetime.now()}] Common topics: {', '.join(common_topics[:5])}")
+            if common_topics:
+                print(f"[{datetime.now()}] Common topics: {', '.join(common_topics[:5])}")
             
             # Check if this is truly a duplicate (very high similarity) or new information
-            if similarity_score >= 0.7:
+            if similarity_score >= duplicate_threshold:
                 print(f"[{datetime.now()}] WARNING: Very high similarity ({similarity_score:.2%}) - this might be a duplicate")
                 print(f"[{datetime.now()}] Proceeding anyway, but adding reference to previous article")
             
-            # Add reference to previous article in the new article
-            prev_reference = {
-                "id": prev_article.get('id'),
-                "title": prev_article.get('title'),
-                "created_at": prev_article.get('created_at'),
-                "similarity": similarity_score
-            }
-            article_data["related_articles"] = [prev_reference]
+            # Add references to the previous articles in the new article
+            article_data["related_articles"] = [{
+                "id": match['article'].get('id'),
+                "title": match['article'].get('title'),
+                "created_at": match['article'].get('created_at'),
+                "similarity": match['similarity']
+            } for match in similar_articles[:MAX_RELATED_ARTICLES]]
             
             # Add reference text to content
             reference_text = f"\n\n[Related Article: This article relates to a previous article published on {prev_article.get('created_at', 'unknown date')[:10]}: '{prev_article.get('title', 'Previous Article')}']"
@@ -731,36 +809,11 @@ def generate_article_task():
             print(f"[{datetime.now()}] ⚠️  WARNING: No images found in article!")
             print(f"[{datetime.now()}] 🔍 Attempting to extract images from full_text...")
             
-            # If still no images, try to extract from full_text with more aggressive patterns
+            # If still no images, accept any non-source image-like URL in full_text
             if article_data.get('full_text'):
-                import re
-                full_text = article_data.get('full_text', '')
-                
-                # More comprehensive image URL patterns
-                img_patterns = [
-                    r'https?://[^\s<>"\)]+\.(?:jpg|jpeg|png|gif|webp|svg|bmp|jfif)(?:\?[^\s<>"\)]*)?',
-                    r'https?://[^\s<>"\)]+image[^\s<>"\)]*(?:\.(?:jpg|jpeg|png|gif|webp))?',
-                    r'https?://[^\s<>"\)]+/image[s]?/[^\s<>"\)]+',
-                    r'https?://[^\s<>"\)]+/photo[s]?/[^\s<>"\)]+',
-                    r'https?://[^\s<>"\)]+/media/[^\s<>"\)]+',
-                    r'https?://[^\s<>"\)]+/img/[^\s<>"\)]+',
-                    r'https?://[^\s<>"\)]+cdn[^\s<>"\)]+\.(?:jpg|jpeg|png|gif|webp)',
-                ]
-                
-                found_images = []
-                for pattern in img_patterns:
-                    matches = re.findall(pattern, full_text, re.IGNORECASE)
-                    for match in matches:
-                        if isinstance(match, str) and match.startswith('http'):
-                            # Clean and validate
-                            match = match.strip().rstrip('.,;)\'"<>')
-                            if len(match) > 10 and match not in found_images:
-                                # Additional validation
-                                match_lower = match.lower()
-                                if (any(ext in match_lower for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.bmp']) or
-                                    any(keyword in match_lower for keyword in ['/image', '/photo', '/img', '/picture', '/media', 'cdn', 'static'])):
-                                    found_images.append(match)
-                                    print(f"[{datetime.now()}] ✅ Found image in full_text: {match[:80]}...")
+                found_images = extract_images(article_data['full_text'])[:MAX_IMAGES]
+                for img_url in found_images:
+                    print(f"[{datetime.now()}] ✅ Found image in full_text: {img_url[:80]}...")
                 
                 if found_images:
                     article_data['images'] = found_images
@@ -778,143 +831,176 @@ def generate_article_task():
         
         # Save article to Supabase
         if save_article(article_data):
+            run.article_id = article_data['id']
             print(f"[{datetime.now()}] ✅ Article generated and saved to Supabase: {article_data['title']} (ID: {article_data['id']})")
             print(f"[{datetime.now()}] 📸 Images saved: {image_count}")
             if similar_articles:
                 print(f"[{datetime.now()}] Article references {len(similar_articles)} related article(s)")
+            return {
+                "success": True,
+                "article": article_data,
+                "similar_articles_found": len(similar_articles),
+                "parse": parse_info
+            }
         else:
             print(f"[{datetime.now()}] ❌ ERROR: Failed to save article to Supabase: {article_data['title']}")
             print(f"[{datetime.now()}] Article data will be lost!")
+            return {"success": False, "error": "Failed to save article to Supabase", "code": 500}
     except Exception as e:
         print(f"[{datetime.now()}] ERROR generating article: {str(e)}")
         import traceback
         traceback.print_exc()
+        return {"success": False, "error": str(e), "code": 500}
+
+# Base scheduler interval; stretched when the measured cost of a run or a
+# quota pause means the model's RPM/TPM/RPD limits can't sustain it
+SCHEDULER_INTERVAL_SECONDS = int(os.getenv('SCHEDULER_INTERVAL_SECONDS', '1800'))
+# Retry delay after a failed run that can resume from a checkpoint
+CHECKPOINT_RETRY_SECONDS = int(os.getenv('CHECKPOINT_RETRY_SECONDS', '300'))
 
-def scheduler_worker():
-    """Background worker that runs article generation every 30 minutes"""
-    print(f"[{datetime.now()}] Scheduler worker started. Will generate articles every 30 minutes.")
+def _next_generation_delay(result):
+    """Seconds until the next scheduled generation, given the last result"""
+    delay = SCHEDULER_INTERVAL_SECONDS
+    if result and not result.get("success") and result.get("resumable"):
+        delay = min(delay, CHECKPOINT_RETRY_SECONDS)
+    limiter = active_limiter()
+    run = (result or {}).get("run") or {}
+    if limiter is not None and run.get("llm_calls"):
+        calls, tokens = run["llm_calls"], run.get("total_tokens", 0)
+        delay = max(delay, limiter.sustainable_interval(calls, tokens), limiter.time_until_available(calls, tokens))
+    if limiter is not None:
+        delay = max(delay, limiter.blocked_for())
+    if result and result.get("retry_after"):
+        delay = max(delay, result["retry_after"])
+    return int(math.ceil(delay))
+
+def scheduler_worker(leader=None):
+    """
+    Background worker that runs article generation every
+    SCHEDULER_INTERVAL_SECONDS (30 minutes), or less often when the Gemini
+    quota can't sustain that rate or asked us to retry later.
+    
+    When a LeaderLock is given, cycles only run while this process holds
+    leadership; otherwise it waits on standby and keeps serving requests.
+    """
+    print(f"[{datetime.now()}] Scheduler worker started. Will generate articles every {SCHEDULER_INTERVAL_SECONDS} seconds.")
     while True:
+        if leader is not None and not leader.is_leader:
+            print(f"[{datetime.now()}] ⏸️  Scheduler on standby - another worker is generating articles.")
+            leader.wait_for_leadership()
+            print(f"[{datetime.now()}] 👑 This worker is now the scheduler leader ({leader.holder_id}).")
+        result = None
         try:
-            generate_article_task()
+            result = generate_article_task()
         except Exception as e:
             print(f"[{datetime.now()}] ERROR in scheduler: {str(e)}")
             import traceback
             traceback.print_exc()
             # Continue running even if one generation fails
-            print(f"[{datetime.now()}] Scheduler will continue and retry in 30 minutes...")
         
-        # Wait 30 minutes (1800 seconds)
-        print(f"[{datetime.now()}] Scheduler sleeping for 30 minutes (1800 seconds)...")
-        time.sleep(1800)
+        delay = _next_generation_delay(result)
+        if delay > SCHEDULER_INTERVAL_SECONDS:
+            print(f"[{datetime.now()}] ⏱️  Stretching the interval to stay within the Gemini quota")
+        print(f"[{datetime.now()}] Scheduler sleeping for {delay} seconds...")
+        time.sleep(delay)
+
+def _job_message(job):
+    if not job.get('deduplicated'):
+        return "Article generation queued"
+    if job['status'] == 'queued':
+        return "Article generation already pending"
+    return "Article generation already in progress"
 
 @app.route('/api/generate-article', methods=['POST'])
 def generate_article():
-    """Manually trigger article generation"""
+    """
+    Queue an article generation job and return its ID right away.
+    
+    Generation runs in the worker (worker.py), never in the request. Poll
+    GET /api/jobs/<job_id> for the result. If a generation job is already
+    queued or running, that job is returned instead of queuing another.
+    """
     try:
-        # Load existing articles to check for duplicates
-        existing_articles = load_articles()
-        
-        # Generate the article
-        try:
-            result = crew.kickoff()
-        except Exception as kickoff_err:
-            if GeminiClientError and isinstance(kickoff_err, GeminiClientError):
-                if getattr(kickoff_err, "status_code", None) == 429 or _is_gemini_quota_error(kickoff_err):
-                    return jsonify({
-                        "success": False,
-                        "error": "Gemini quota exhausted. Please add billing or try again later.",
-                        "code": 429
-                    }), 429
-            if _is_gemini_quota_error(kickoff_err):
-                return jsonify({
-                    "success": False,
-                    "error": "Gemini quota exhausted. Please add billing or try again later.",
-                    "code": 429
-                }), 429
-            raise
-        article_data = parse_article(result)
-        article_data["id"] = datetime.now().strftime("%Y%m%d%H%M%S")
-        article_data["created_at"] = datetime.now().isoformat()
-        
-        # Check for similar articles
-        similar_articles = find_similar_articles(
-            article_data['title'], 
-            article_data['content'], 
-            existing_articles,
-            similarity_threshold=0.4
-        )
-        
-        # If similar articles found, add reference
-        if similar_articles:
-            most_similar = similar_articles[0]
-            prev_article = most_similar['article']
-            similarity_score = most_similar['similarity']
-            
-            # Add reference to previous article
-            prev_reference = {
-                "id": prev_article.get('id'),
-                "title": prev_article.get('title'),
-                "created_at": prev_article.get('created_at'),
-                "similarity": similarity_score
-            }
-            article_data["related_articles"] = [prev_reference]
-            
-            # Add reference text to content
-            reference_text = f"\n\n[Related Article: This article relates to a previous article published on {prev_article.get('created_at', 'unknown date')[:10]}: '{prev_article.get('title', 'Previous Article')}']"
-            article_data["content"] = article_data["content"] + reference_text
-        else:
-            article_data["related_articles"] = []
-        
-        # Save article to Supabase
-        if save_article(article_data):
-            message = f"Article saved to Supabase (ID: {article_data['id']})"
-            if similar_articles:
-                message += f". References {len(similar_articles)} related article(s)."
-            return jsonify({
-                "success": True,
-                "article": article_data,
-                "message": message,
-                "similar_articles_found": len(similar_articles)
-            }), 200
-        else:
-            return jsonify({
-                "success": False,
-                "error": "Failed to save article to Supabase"
-            }), 500
-        
+        job = job_queue.enqueue('generate_article', payload={"trigger": "api"})
     except Exception as e:
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
+    
+    return jsonify({
+        "success": True,
+        "job_id": job['id'],
+        "status": job['status'],
+        "status_url": f"/api/jobs/{job['id']}",
+        "message": _job_message(job)
+    }), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the status (and result, once finished) of a generation job"""
+    try:
+        job = job_queue.get(job_id)
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+    
+    if not job:
+        return jsonify({
+            "success": False,
+            "message": "Job not found"
+        }), 404
+    return jsonify({
+        "success": True,
+        "job": job
+    }), 200
 
 @app.route('/api/articles', methods=['GET'])
 def get_articles():
-    """Get all articles (newest first)"""
+    """
+    Get a page of articles (newest first)
+    
+    Query parameters:
+        limit: page size (default 20, max 100)
+        cursor: next_cursor from the previous page
+        fields: comma-separated columns (default: list-view columns, no content/full_text)
+    """
     try:
-        articles = load_articles()
+        limit = _parse_limit(request.args.get('limit'))
+        fields = _parse_fields(request.args.get('fields'))
+        cursor = request.args.get('cursor')
+        articles, next_cursor = load_article_page(limit=limit, cursor=cursor, fields=fields)
+    except ValueError as e:
         return jsonify({
-            "success": True,
-            "articles": articles
-        }), 200
+            "success": False,
+            "error": str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
+    
+    return _conditional_json({
+        "success": True,
+        "articles": articles,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None
+    }, articles, FEED_CACHE_CONTROL, ','.join(fields), next_cursor)
 
 @app.route('/api/article/<article_id>', methods=['GET'])
 def get_article(article_id):
     """Get a specific article by ID"""
     try:
-        articles = load_articles()
-        article = next((a for a in articles if a.get('id') == article_id), None)
+        article = load_article_by_id(article_id)
         
         if article:
-            return jsonify({
+            return _conditional_json({
                 "success": True,
                 "article": article
-            }), 200
+            }, [article], ARTICLE_CACHE_CONTROL)
         else:
             return jsonify({
                 "success": False,
@@ -930,12 +1016,12 @@ def get_article(article_id):
 def get_latest_article():
     """Get the latest generated article"""
     try:
-        articles = load_articles()
-        if articles:
-            return jsonify({
+        article = load_latest_article()
+        if article:
+            return _conditional_json({
                 "success": True,
-                "article": articles[0]
-            }), 200
+                "article": article
+            }, [article], FEED_CACHE_CONTROL, 'latest')
         else:
             return jsonify({
                 "success": False,
@@ -947,10 +1033,66 @@ def get_latest_article():
             "error": str(e)
         }), 500
 
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters for this worker's article read caches"""
+    return jsonify({
+        "success": True,
+        "caches": article_cache_stats()
+    }), 200
+
+@app.route('/api/runs', methods=['GET'])
+def get_runs():
+    """
+    Recent generation runs with their token, latency and cost totals.
+    
+    Query params:
+        limit: number of runs (default and max as for /api/articles)
+    """
+    try:
+        limit = _parse_limit(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    try:
+        runs = load_runs(supabase_client, limit=limit)
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+    return jsonify({
+        "success": True,
+        "runs": runs,
+        "count": len(runs)
+    }), 200
+
+@app.route('/api/runs/<run_id>', methods=['GET'])
+def get_run(run_id):
+    """One generation run with per-task and per-tool metrics"""
+    try:
+        run = load_run(supabase_client, run_id)
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+    if not run:
+        return jsonify({
+            "success": False,
+            "message": "Run not found"
+        }), 404
+    return jsonify({
+        "success": True,
+        "run": run
+    }), 200
+
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return jsonify({"status": "healthy"}), 200
+    return jsonify({"status": "healthy", "model_loaded": model_loaded(), "parse_stats": parse_stats.stats()}), 200
 
 if __name__ == '__main__':
     # Verify Supabase connection on startup
@@ -961,18 +1103,17 @@ if __name__ == '__main__':
     existing_articles = load_articles()
     print(f"✅ Found {len(existing_articles)} existing articles in Supabase")
     
-    # Start background scheduler for automatic article generation
-    scheduler_thread = Thread(target=scheduler_worker, daemon=True)
-    scheduler_thread.start()
-    print("Background scheduler started. Articles will be generated every 30 minutes.")
+    # Start the generation worker: the scheduler (whose first cycle generates
+    # the initial article immediately), the job processor behind
+    # POST /api/generate-article and news ingestion. Leader election keeps the
+    # debug reloader's second process from generating too.
+    # worker.py imports this module as `api`; register it so both share one instance.
+    sys.modules.setdefault('api', sys.modules[__name__])
+    from worker import start_worker
+    start_worker()
+    print(f"Generation worker started. Articles will be generated every {SCHEDULER_INTERVAL_SECONDS // 60} minutes or less often when the Gemini quota requires it.")
     print("All articles will be automatically saved and NEVER deleted.")
     
-    # Generate first article immediately (only if not in production or if explicitly enabled)
-    # In production, the wsgi.py will handle initial article generation
-    if os.getenv('FLASK_ENV') != 'production' or os.getenv('GENERATE_INITIAL_ARTICLE', 'false').lower() == 'true':
-        print("Generating initial article...")
-        generate_article_task()
-    
     # Get port from environment or default to 5000
     port = int(os.environ.get('PORT', 5000))
     debug = os.getenv('FLASK_ENV') != 'production'
@@ -0,0 +1,421 @@
+"""
+Parsing of the writer agent's output into title, content, images and sources.
+
+In structured-output mode write_task returns an ArticleOutput (pydantic), so
+parsing is schema validation. The text parser below stays as the fallback
+for free-text output in the format write_task used to request:
+
+    Title line
+
+    Paragraphs...
+
+    Images:
+    Image: https://...
+
+    Sources:
+    Source: Name - https://...
+
+All patterns are compiled once at import. An article is scanned once for
+section markers (plain substring search) and once for URLs; everything else (image validation,
+section membership, title and content spans) works on those matches instead
+of re-running a regex list over the whole text per question.
+"""
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, ValidationError
+
+DEFAULT_TITLE = "Flash News: Top Global Events"
+MAX_IMAGES = 5
+PARSE_STATS_PATH = os.getenv(
+    "PARSE_STATS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "parse_stats.sqlite3"),
+)
+
+# Section markers, found with str.find (much faster than a regex scan over the output)
+_MARKERS = ("Sources", "Source", "Images", "Image")
+_URL_RE = re.compile(r"https?://[^\s<>\"')\]]+", re.IGNORECASE)
+# Context right before a URL that marks it as an image field: image_url: "...", "urlToImage": ...
+_IMAGE_KEY_RE = re.compile(r"""(?:image_url|urlToImage|image)["']?\s*[:=]\s*["']?$""", re.IGNORECASE)
+_IMAGE_ARRAY_RE = re.compile(r'"image_urls"\s*:\s*\[(.*?)\]', re.IGNORECASE | re.DOTALL)
+_HEADING_RE = re.compile(r"^#+\s+(.+)$")
+_TITLE_PREFIX_RE = re.compile(r"^(?:Breaking News|News|Flash News|Update):\s*|^#+\s*", re.IGNORECASE)
+
+# A URL that names an image by itself (anywhere in the text)
+_STRONG_IMAGE_RE = re.compile(r"\.(?:jpe?g|png|gif|webp|svg|bmp|jfif)\b|image|photo", re.IGNORECASE)
+# Accepted image URLs: image extension, image-ish path, or a known image/CDN host
+_VALID_IMAGE_RE = re.compile(
+    r"\.(?:jpe?g|png|gif|webp|svg|bmp|jfif)"
+    r"|/(?:image|photo|img|picture|media)"
+    r"|imgur|flickr|unsplash|pexels|getty|cdn|media|static|cloudinary",
+    re.IGNORECASE,
+)
+_PLACEHOLDER_RE = re.compile(r"placeholder|default|none|null|undefined", re.IGNORECASE)
+_URL_TRAILING = ".,;)'\"<>"
+
+
+@dataclass(slots=True)
+class ParsedArticle:
+    """Structured writer output; spans are (start, end) offsets into the original text"""
+    title: str = DEFAULT_TITLE
+    content: str = ""
+    images: list = field(default_factory=list)
+    sources: list = field(default_factory=list)
+    title_span: Optional[tuple] = None
+    content_span: tuple = (0, 0)
+    mode: str = "text"  # "structured" (schema-validated) or "text" (heuristic parser)
+    full_text: str = ""
+    parse_ms: float = 0.0
+
+
+def clean_url(url):
+    return url.strip().strip("\"'").rstrip(_URL_TRAILING)
+
+
+def is_image_url(url):
+    """Whether a URL is acceptable as an article image"""
+    return (
+        url.startswith("http")
+        and len(url) >= 10
+        and not _PLACEHOLDER_RE.search(url)
+        and bool(_VALID_IMAGE_RE.search(url))
+    )
+
+
+def _sections(text):
+    """
+    Section spans from one scan over the markers:
+    ('images' | 'sources', start_of_marker, end_of_section)
+    """
+    markers = []
+    for name in _MARKERS:
+        needle = name + ":"  # "Source:" never matches inside "Sources:"
+        position = text.find(needle)
+        while position != -1:
+            markers.append((position, position + len(needle), name))
+            position = text.find(needle, position + len(needle))
+    markers.sort()
+    sections = []
+    for i, (start, end, name) in enumerate(markers):
+        kind = "sources" if name.startswith("Source") else "images"
+        # A section runs until the next marker of the other kind (Image:/Source: lines repeat inside)
+        stop = next((s for s, _, n in markers[i + 1:] if n.startswith("Source") != (kind == "sources")), len(text))
+        sections.append((kind, start, end, stop))
+    return markers, sections
+
+
+def _in_spans(position, spans):
+    return any(start <= position < stop for start, stop in spans)
+
+
+def _extract_images(text, urls, image_spans, source_spans, aggressive=False):
+    array_spans = [(m.start(1), m.end(1)) for m in _IMAGE_ARRAY_RE.finditer(text)] if '"image_urls"' in text else []
+    images = []
+    seen = set()
+    for start, url in urls:
+        url = clean_url(url)
+        if url in seen:
+            continue
+        candidate = (
+            _STRONG_IMAGE_RE.search(url)
+            or _in_spans(start, image_spans)
+            or _in_spans(start, array_spans)
+            or _IMAGE_KEY_RE.search(text, max(0, start - 20), start)
+            # Fallback mode: any non-source URL that passes validation (CDN/media hosts)
+            or (aggressive and not _in_spans(start, source_spans))
+        )
+        if candidate and is_image_url(url):
+            seen.add(url)
+            images.append(url)
+    return images
+
+
+def _extract_sources(text, markers):
+    # Sources follow the last "Sources:" marker (or the last "Source:" if there is none)
+    plural = [end for start, end, name in markers if name == "Sources"]
+    singular = [end for start, end, name in markers if name == "Source"]
+    if not plural and not singular:
+        return []
+    section = text[(plural or singular)[-1]:]
+    sources = []
+    for line in section.split("\n"):
+        line = line.strip()
+        if not line or ("http" not in line and "www." not in line):
+            continue
+        if " - " in line:
+            name, url = line.split(" - ", 1)
+            sources.append({"name": name.replace("Source:", "").strip(), "url": url.strip()})
+        elif "http" in line:
+            sources.append({"name": "Source", "url": "http" + line.split("http", 1)[1]})
+    return sources
+
+
+def normalize_content(content):
+    """Strip every line and separate paragraphs by exactly one blank line"""
+    paragraphs = []
+    current = []
+    for line in content.split("\n"):
+        line = line.strip()
+        if line:
+            current.append(line)
+        elif current:
+            paragraphs.append("\n".join(current))
+            current = []
+    if current:
+        paragraphs.append("\n".join(current))
+    return "\n\n".join(paragraphs)
+
+
+def _extract_title(lines):
+    """Title and its span: markdown heading, else a title-like first line, else one of the first 5 lines"""
+    offsets = []
+    position = 0
+    for line in lines:
+        offsets.append(position)
+        position += len(line) + 1
+
+    title, span = None, None
+    for i, line in enumerate(lines):
+        heading = _HEADING_RE.match(line)
+        if heading:
+            candidate = heading.group(1).strip()
+            if 10 <= len(candidate) <= 150:
+                title, span = candidate, (offsets[i], offsets[i] + len(line))
+            break
+
+    if title is None and len(lines) > 1:
+        first = _TITLE_PREFIX_RE.sub("", _TITLE_PREFIX_RE.sub("", lines[0].strip())).strip()
+        if 10 <= len(first) <= 150 and not first.endswith((".", "!")):
+            title, span = first, (0, len(lines[0]))
+
+    if title is None:
+        for i, line in enumerate(lines[:5]):
+            stripped = line.strip()
+            if (10 <= len(stripped) <= 150 and not stripped.endswith((".", ","))
+                    and not stripped.startswith("http") and stripped[0].isupper()
+                    and len(stripped.split()) <= 15):
+                title, span = stripped, (offsets[i], offsets[i] + len(line))
+                break
+
+    title = (title or DEFAULT_TITLE).lstrip("#").strip().replace("*", "").strip().strip("\"'").strip()
+    if len(title) < 5:
+        return DEFAULT_TITLE, None
+    return title, span
+
+
+def _content_end(text, markers):
+    """Content stops at the first Sources: marker, or at the Images section that precedes the sources"""
+    first = {}
+    for start, _, name in markers:
+        first.setdefault(name, start)
+    end = first.get("Sources", len(text))
+    if "Images" in first and first["Images"] < end:
+        end = first["Images"]
+    elif "Image" in first and first["Image"] < end:
+        source_start = first.get("Sources", first.get("Source"))
+        if source_start is not None and first["Image"] < source_start:
+            end = first["Image"]
+    return end
+
+
+def extract_article(text):
+    """Parse writer output into a ParsedArticle in one pass over the text"""
+    text = str(text)
+    markers, sections = _sections(text)
+    image_spans = [(end, stop) for kind, _, end, stop in sections if kind == "images"]
+    source_spans = [(end, stop) for kind, _, end, stop in sections if kind == "sources"]
+    urls = [(m.start(), m.group(0)) for m in _URL_RE.finditer(text)]
+
+    images = _extract_images(text, urls, image_spans, source_spans)
+    sources = _extract_sources(text, markers)
+    lines = text.split("\n")
+    title, title_span = _extract_title(lines)
+
+    content_end = _content_end(text, markers)
+    content = text[:content_end]
+    if "Sources" not in {name for _, _, name in markers} and sources:
+        # Bare "Source:" lines inline: drop the lines carrying source URLs
+        source_urls = [s["url"] for s in sources]
+        content = "\n".join(l for l in content.split("\n") if not any(u in l for u in source_urls))
+    for url in images:
+        content = content.replace(url, "")
+
+    return ParsedArticle(
+        title=title,
+        content=normalize_content(content),
+        images=images[:MAX_IMAGES],
+        sources=sources,
+        title_span=title_span,
+        content_span=(0, content_end),
+        full_text=text,
+    )
+
+
+def extract_images(text, aggressive=True):
+    """
+    Image URLs in text, in order of appearance. With aggressive (the fallback
+    used when parsing found none) any non-source URL that passes validation
+    counts, e.g. bare CDN links.
+    """
+    text = str(text)
+    markers, sections = _sections(text)
+    image_spans = [(end, stop) for kind, _, end, stop in sections if kind == "images"]
+    source_spans = [(end, stop) for kind, _, end, stop in sections if kind == "sources"]
+    urls = [(m.start(), m.group(0)) for m in _URL_RE.finditer(text)]
+    return _extract_images(text, urls, image_spans, source_spans, aggressive=aggressive)
+
+
+# --- Structured output -----------------------------------------------------
+
+class ArticleSource(BaseModel):
+    name: str = Field(description="Publisher name, e.g. BBC News")
+    url: str = Field(description="Link to the source article")
+
+
+class ArticleOutput(BaseModel):
+    """What the copywriter returns in structured-output mode (write_task.output_pydantic)"""
+    title: str = Field(description="Headline, 10-100 characters, no ending punctuation")
+    content: str = Field(description="Article body as plain-text paragraphs separated by blank lines, without image or source lists")
+    image_urls: List[str] = Field(default_factory=list, description="1-3 image URLs taken from the source articles")
+    sources: List[ArticleSource] = Field(default_factory=list, description="Sources the article is based on")
+
+
+_JSON_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+
+
+def _structured_output(result):
+    """The ArticleOutput in a crew result (pydantic, json_dict or JSON text), or None"""
+    output = getattr(result, "pydantic", None)
+    if isinstance(output, ArticleOutput):
+        return output
+    candidates = []
+    if getattr(result, "json_dict", None):
+        candidates.append(result.json_dict)
+    raw = _JSON_FENCE_RE.sub("", str(getattr(result, "raw", None) or result))
+    if raw.startswith("{"):
+        candidates.append(raw)
+    for candidate in candidates:
+        try:
+            if isinstance(candidate, str):
+                return ArticleOutput.model_validate_json(candidate)
+            return ArticleOutput.model_validate(candidate)
+        except (ValidationError, ValueError):
+            continue
+    return None
+
+
+def render_text(parsed):
+    """The article in the plain-text layout (title, body, Images:, Sources:) stored as full_text"""
+    parts = [parsed.title, "", parsed.content]
+    if parsed.images:
+        parts += ["", "Images:"] + [f"Image: {url}" for url in parsed.images]
+    if parsed.sources:
+        parts += ["", "Sources:"] + [f"Source: {s['name']} - {s['url']}" for s in parsed.sources]
+    return "\n".join(parts)
+
+
+def from_structured(output):
+    """ParsedArticle from a validated ArticleOutput"""
+    title = output.title.strip().lstrip("#").replace("*", "").strip().strip("\"'").strip()
+    images = []
+    for url in output.image_urls:
+        url = clean_url(url)
+        if is_image_url(url) and url not in images:
+            images.append(url)
+    parsed = ParsedArticle(
+        title=title if len(title) >= 5 else DEFAULT_TITLE,
+        content=normalize_content(output.content),
+        images=images[:MAX_IMAGES],
+        sources=[{"name": s.name.strip(), "url": s.url.strip()} for s in output.sources if s.url.strip()],
+        mode="structured",
+    )
+    parsed.full_text = render_text(parsed)
+    return parsed
+
+
+class ParseStats:
+    """
+    Parse outcome counters (how often the schema validated, how long parsing
+    took) kept in SQLite, so the web tier's /api/health reads what the
+    generation worker recorded and counts survive restarts.
+    """
+
+    def __init__(self, path=PARSE_STATS_PATH):
+        self.path = path
+        self._ready = False
+        self._lock = Lock()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            # Created on first use: importing the parser (benchmarks, backfills) writes nothing
+            if not self._ready:
+                with self._lock:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS parse_stats (
+                            id INTEGER PRIMARY KEY CHECK (id = 1),
+                            total INTEGER NOT NULL,
+                            structured INTEGER NOT NULL,
+                            succeeded INTEGER NOT NULL,
+                            total_ms REAL NOT NULL
+                        )
+                    """)
+                    conn.execute("INSERT OR IGNORE INTO parse_stats VALUES (1, 0, 0, 0, 0)")
+                    self._ready = True
+            yield conn
+        finally:
+            conn.close()
+
+    def record(self, parsed, ok):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE parse_stats SET total = total + 1, structured = structured + ?, "
+                    "succeeded = succeeded + ?, total_ms = total_ms + ? WHERE id = 1",
+                    (int(parsed.mode == "structured"), int(bool(ok)), parsed.parse_ms),
+                )
+        except sqlite3.Error as e:
+            print(f"⚠️  Could not record parse stats: {e}")
+
+    def stats(self):
+        try:
+            with self._connect() as conn:
+                total, structured, succeeded, total_ms = conn.execute(
+                    "SELECT total, structured, succeeded, total_ms FROM parse_stats WHERE id = 1"
+                ).fetchone()
+        except sqlite3.Error as e:
+            return {"error": str(e)}
+        divisor = total or 1
+        return {
+            "parsed": total,
+            "structured_rate": round(structured / divisor, 3),
+            "success_rate": round(succeeded / divisor, 3),
+            "avg_parse_ms": round(total_ms / divisor, 3),
+        }
+
+
+parse_stats = ParseStats()
+
+
+def parse_writer_output(result):
+    """
+    Parse a crew result: schema validation when the writer returned an
+    ArticleOutput, the text parser otherwise. Records parse_stats.
+    """
+    start = time.perf_counter()
+    output = _structured_output(result)
+    if output is not None:
+        parsed = from_structured(output)
+    else:
+        parsed = extract_article(getattr(result, "raw", None) or result)
+    parsed.parse_ms = (time.perf_counter() - start) * 1000
+    parse_stats.record(parsed, ok=bool(parsed.content) and parsed.title != DEFAULT_TITLE)
+    return parsed
@@ -0,0 +1,61 @@
+"""
+One-time backfill of the topics column for articles saved without topics.
+
+Related-article lookup matches on stored topics (match_articles_by_topics),
+so articles with an empty or NULL topics column would never be found.
+This extracts their topics once, the same way new articles get them.
+
+    python backfill_topics.py              # update rows
+    python backfill_topics.py --dry-run    # only report what would change
+    python backfill_topics.py --recompute  # re-extract topics for every article (and refreeze the idf)
+"""
+import argparse
+from datetime import datetime
+
+from api import extract_topics_many, supabase_client, topic_engine
+
+BATCH_SIZE = 200
+
+
+def backfill_topics(dry_run=False, recompute=False, batch_size=BATCH_SIZE):
+    """
+    Fill in missing topics (or all topics with recompute), paging by ID.
+    Returns the number of articles updated.
+    """
+    # Rank against the whole corpus, not just the rows seen so far
+    topic_engine.bootstrap_from_supabase(supabase_client)
+    if recompute and not dry_run:
+        # Every article is re-ranked, so all of them can move to the current idf
+        topic_engine.refreeze()
+    updated = 0
+    last_id = None
+    while True:
+        query = supabase_client.table('articles').select('id, title, content').order('id').limit(batch_size)
+        if not recompute:
+            query = query.or_('topics.is.null,topics.eq.[]')
+        if last_id is not None:
+            query = query.gt('id', last_id)
+        rows = query.execute().data or []
+        if not rows:
+            break
+        extracted = extract_topics_many((row.get('title') or '', row.get('content') or '') for row in rows)
+        for row, topics in zip(rows, extracted):
+            if topics and not dry_run:
+                supabase_client.table('articles').update({'topics': topics}).eq('id', row['id']).execute()
+            if topics:
+                updated += 1
+                print(f"[{datetime.now()}] {'Would set' if dry_run else 'Set'} topics for {row['id']}: {', '.join(topics[:5])}")
+        last_id = rows[-1]['id']
+        if len(rows) < batch_size:
+            break
+    return updated
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backfill missing article topics in Supabase')
+    parser.add_argument('--dry-run', action='store_true', help='report without writing')
+    parser.add_argument('--recompute', action='store_true',
+                        help='re-extract topics for all articles, e.g. after changing the topic engine')
+    args = parser.parse_args()
+    count = backfill_topics(dry_run=args.dry_run, recompute=args.recompute)
+    print(f"✅ {'Would backfill' if args.dry_run else 'Backfilled'} topics for {count} article(s)")
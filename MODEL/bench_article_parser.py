@@ -0,0 +1,352 @@
+"""
+Micro-benchmark: writer-output parsing, previous parse_article vs article_parser.
+
+Runs both parsers over a corpus of writer outputs and reports time per
+article and how often the results agree:
+
+    python bench_article_parser.py                      # built-in sample outputs
+    python bench_article_parser.py --corpus outputs/    # *.txt files, one output each
+    python bench_article_parser.py --supabase 200       # full_text of the latest stored articles
+"""
+import argparse
+import glob
+import os
+import random
+import time
+
+from article_parser import extract_article
+
+
+def legacy_parse_article(result_text):
+    """api.parse_article before article_parser (prints, topics and preview removed)"""
+    import re
+    article_text = str(result_text)
+    sources = []
+    images = []
+    
+    # Extract sources
+    if "Sources:" in article_text or "Source:" in article_text:
+        sources_section = article_text.split("Sources:")[-1] if "Sources:" in article_text else ""
+        if not sources_section:
+            sources_section = article_text.split("Source:")[-1] if "Source:" in article_text else ""
+        
+        for line in sources_section.split('\n'):
+            line = line.strip()
+            if line and ('http' in line or 'www.' in line):
+                if ' - ' in line:
+                    parts = line.split(' - ', 1)
+                    source_name = parts[0].replace('Source:', '').strip()
+                    source_url = parts[1].strip()
+                    sources.append({"name": source_name, "url": source_url})
+                elif 'http' in line:
+                    url = line.split('http')[1] if 'http' in line else line
+                    if not url.startswith('http'):
+                        url = 'http' + url
+                    sources.append({"name": "Source", "url": url})
+    
+    # Extract image URLs from the article text
+    # Look for common image URL patterns - enhanced to catch more variations
+    image_patterns = [
+        r'https?://[^\s<>"\)]+\.(?:jpg|jpeg|png|gif|webp|svg|bmp)(?:\?[^\s<>"\)]*)?',
+        r'https?://[^\s<>"\)]+image[^\s<>"\)]*(?:\.(?:jpg|jpeg|png|gif|webp))?',
+        r'https?://[^\s<>"\)]+photo[^\s<>"\)]*(?:\.(?:jpg|jpeg|png|gif|webp))?',
+        r'image_url["\']?\s*[:=]\s*["\']?(https?://[^\s<>"\)]+)',
+        r'image["\']?\s*[:=]\s*["\']?(https?://[^\s<>"\)]+)',
+        r'urlToImage["\']?\s*[:=]\s*["\']?(https?://[^\s<>"\)]+)',
+        r'https?://[^\s<>"\)]+/image[s]?/[^\s<>"\)]+',
+        r'https?://[^\s<>"\)]+/photo[s]?/[^\s<>"\)]+',
+        r'"image_urls"\s*:\s*\[(.*?)\]',  # JSON array of image URLs
+        r'"image_url"\s*:\s*"(https?://[^"]+)"',  # JSON image_url field
+    ]
+    
+    for pattern in image_patterns:
+        matches = re.findall(pattern, article_text, re.IGNORECASE)
+        for match in matches:
+            img_url = match if isinstance(match, str) else match[0] if match else None
+            if img_url:
+                # Clean up URL (remove quotes, trailing punctuation)
+                img_url = img_url.strip('"\'.,;')
+                # Validate it's a real image URL
+                if img_url.startswith('http') and img_url not in images:
+                    # Check if it looks like an image URL
+                    if any(ext in img_url.lower() for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '/image', '/photo', 'image', 'photo']) or \
+                       any(domain in img_url.lower() for domain in ['imgur', 'flickr', 'unsplash', 'pexels', 'getty', 'cdn', 'media', 'static']):
+                        images.append(img_url)
+    
+    # Also extract from JSON structures if present
+    try:
+        # Try to parse as JSON if it contains JSON structures
+        if '"image_urls"' in article_text or '"image_url"' in article_text:
+            json_matches = re.findall(r'"image_urls"\s*:\s*\[(.*?)\]', article_text, re.IGNORECASE | re.DOTALL)
+            for json_match in json_matches:
+                # Extract URLs from JSON array
+                url_matches = re.findall(r'"(https?://[^"]+)"', json_match)
+                for url in url_matches:
+                    if url not in images:
+                        images.append(url)
+    except:
+        pass
+    
+    # Also check if images are mentioned in a structured format
+    if "Images:" in article_text or "Image:" in article_text:
+        images_section = article_text.split("Images:")[-1] if "Images:" in article_text else ""
+        if not images_section:
+            images_section = article_text.split("Image:")[-1] if "Image:" in article_text else ""
+        
+        # Split by Sources: to stop at sources section
+        if "Sources:" in images_section:
+            images_section = images_section.split("Sources:")[0]
+        elif "Source:" in images_section:
+            images_section = images_section.split("Source:")[0]
+        
+        for line in images_section.split('\n'):
+            line = line.strip()
+            # Handle both "Image: https://..." and just "https://..." formats
+            if line:
+                # Remove "Image:" prefix if present
+                if line.lower().startswith('image:'):
+                    line = line[6:].strip()  # Remove "Image:" prefix
+                
+                # Extract URL from line
+                if 'http' in line:
+                    url_match = re.search(r'https?://[^\s<>"]+', line)
+                    if url_match:
+                        img_url = url_match.group(0)
+                        # Clean up URL
+                        img_url = img_url.rstrip('.,;)\'"')
+                        if img_url.startswith('http') and img_url not in images:
+                            images.append(img_url)
+    
+    # Remove duplicates and invalid URLs
+    images = list(dict.fromkeys(images))  # Remove duplicates while preserving order
+    
+    # Validate and clean URLs
+    validated_images = []
+    for img_url in images:
+        if not img_url or not isinstance(img_url, str):
+            continue
+        
+        # Must start with http/https
+        if not img_url.startswith('http'):
+            continue
+        
+        # Must be at least 10 characters
+        if len(img_url) < 10:
+            continue
+        
+        # Clean up URL - remove common trailing characters
+        img_url = img_url.rstrip('.,;)\'"<>')
+        
+        # Remove common invalid patterns
+        if any(invalid in img_url.lower() for invalid in ['placeholder', 'default', 'none', 'null', 'undefined']):
+            continue
+        
+        # Check if URL looks like an image URL
+        # Either has image extension, or contains image-related keywords, or from known image domains
+        img_url_lower = img_url.lower()
+        is_image_url = (
+            any(ext in img_url_lower for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.bmp', '.jfif']) or
+            any(keyword in img_url_lower for keyword in ['/image', '/photo', '/img', '/picture', '/media']) or
+            any(domain in img_url_lower for domain in ['imgur', 'flickr', 'unsplash', 'pexels', 'getty', 'cdn', 'media', 'static', 'cloudinary', 'images.unsplash'])
+        )
+        
+        if is_image_url:
+            validated_images.append(img_url)
+    
+    images = validated_images
+    
+    # Extract title - try multiple methods
+    title = "Flash News: Top Global Events"  # Default fallback
+    
+    # Method 1: Look for markdown-style headings (# Title)
+    heading_match = re.search(r'^#+\s+(.+)$', article_text, re.MULTILINE)
+    if heading_match:
+        potential_title = heading_match.group(1).strip()
+        if 10 <= len(potential_title) <= 150:  # Reasonable title length
+            title = potential_title
+    
+    # Method 2: Check first line if it looks like a title
+    if title == "Flash News: Top Global Events" and '\n' in article_text:
+        first_line = article_text.split('\n')[0].strip()
+        # Remove common prefixes and clean up
+        first_line = re.sub(r'^(Breaking News|News|Flash News|Update):\s*', '', first_line, flags=re.IGNORECASE)
+        first_line = re.sub(r'^#+\s*', '', first_line).strip()
+        
+        # Check if first line looks like a title (not too long, not a full sentence)
+        if 10 <= len(first_line) <= 150 and not first_line.endswith('.') and not first_line.endswith('!'):
+            title = first_line
+    
+    # Method 3: Look for title patterns in the text
+    if title == "Flash News: Top Global Events":
+        # Look for lines that might be titles (short, capitalized, at the start)
+        lines = article_text.split('\n')[:5]  # Check first 5 lines
+        for line in lines:
+            line = line.strip()
+            # Check if line looks like a title
+            if (10 <= len(line) <= 150 and 
+                not line.endswith('.') and 
+                not line.endswith(',') and
+                not line.startswith('http') and
+                line[0].isupper() if line else False):
+                # Additional check: not too many lowercase words (titles are usually shorter phrases)
+                words = line.split()
+                if len(words) <= 15:  # Titles are usually 15 words or less
+                    title = line
+                    break
+    
+    # Clean up title - remove markdown, extra formatting
+    title = re.sub(r'^#+\s*', '', title).strip()
+    title = re.sub(r'\*+', '', title).strip()
+    title = re.sub(r'^["\']|["\']$', '', title).strip()  # Remove quotes
+    
+    # Ensure title is not empty
+    if not title or len(title) < 5:
+        title = "Flash News: Top Global Events"
+    
+    # Extract content - remove Images and Sources sections
+    content = article_text
+    if "Sources:" in content:
+        content = content.split("Sources:")[0].strip()
+    elif "Source:" in content and len(sources) > 0:
+        lines = content.split('\n')
+        content = '\n'.join([l for l in lines if not any(s['url'] in l for s in sources)])
+    
+    # Remove Images section from content
+    if "Images:" in content:
+        content = content.split("Images:")[0].strip()
+    elif "Image:" in content:
+        # Only remove if it's at the end (part of the structured format)
+        if "Image:" in content and ("Sources:" in content or "Source:" in content):
+            # Find where Images section starts
+            images_start = content.find("Image:")
+            sources_start = content.find("Sources:") if "Sources:" in content else content.find("Source:")
+            if images_start < sources_start:
+                content = content[:images_start].strip()
+    
+    # Remove image URLs from content if they appear as text
+    for img_url in images:
+        content = content.replace(img_url, '').strip()
+    
+    # Clean up and format content
+    # Remove multiple consecutive newlines
+    import re
+    content = re.sub(r'\n{3,}', '\n\n', content)
+    
+    # Remove leading/trailing whitespace from each line
+    lines = [line.strip() for line in content.split('\n')]
+    content = '\n'.join(lines)
+    
+    # Remove empty paragraphs
+    paragraphs = [p for p in content.split('\n\n') if p.strip()]
+    content = '\n\n'.join(paragraphs)
+    
+    # Clean up title - remove markdown formatting if present
+    title = re.sub(r'^#+\s*', '', title).strip()
+    title = re.sub(r'\*+', '', title).strip()
+    
+    return {
+        "title": title,
+        "content": content,
+        "sources": sources,
+        "images": images[:5] if images else [],
+    }
+
+
+_PARAGRAPH_WORDS = (
+    "officials said the agreement would take effect next month after talks in Geneva "
+    "markets rallied as investors weighed the central bank decision and new inflation data "
+    "rescue teams continued searching through the night while aid agencies warned of shortages "
+    "the company reported record quarterly revenue driven by demand for its cloud services "
+).split()
+
+
+def sample_outputs(n, seed=11):
+    """Writer outputs in the write_task format, with the variations seen in practice"""
+    rng = random.Random(seed)
+    hosts = ["bbc.com", "reuters.com", "cnn.com", "theguardian.com", "apnews.com"]
+    outputs = []
+    for i in range(n):
+        title = f"Global Markets Surge as Leaders Meet in Geneva {i}"
+        heading = rng.choice(["", "# ", "**"])
+        paragraphs = [
+            " ".join(rng.choice(_PARAGRAPH_WORDS) for _ in range(rng.randint(60, 120))) + "."
+            for _ in range(rng.randint(5, 12))
+        ]
+        if rng.random() < 0.3:
+            paragraphs.insert(2, f"As reported (https://www.{rng.choice(hosts)}/news/world-{i}), talks continue.")
+        images = [
+            rng.choice([
+                f"https://ichef.{rng.choice(hosts)}/images/ic/976xn/p0{i}{k}.jpg",
+                f"https://static.{rng.choice(hosts)}/photo/{i}-{k}.webp?w=800",
+                f"https://cdn.{rng.choice(hosts)}/media/{i}/{k}",
+            ])
+            for k in range(rng.randint(0, 4))
+        ]
+        sources = [f"Source: {host.split('.')[0].upper()} - https://www.{host}/news/article-{i}" for host in rng.sample(hosts, 3)]
+        parts = [heading + title + ("**" if heading == "**" else ""), ""] + paragraphs
+        if images:
+            parts += ["", "Images:"] + [f"Image: {url}" for url in images]
+        if rng.random() < 0.2:
+            parts += ["", '{"image_urls": ["' + f"https://images.example.org/{i}.png" + '"]}']
+        parts += ["", "Sources:"] + sources
+        outputs.append("\n".join(parts))
+    return outputs
+
+
+def load_corpus(args):
+    if args.corpus:
+        outputs = []
+        for path in sorted(glob.glob(os.path.join(args.corpus, "*.txt"))):
+            with open(path, encoding="utf-8") as f:
+                outputs.append(f.read())
+        return outputs
+    if args.supabase:
+        from supabase import create_client
+        client = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+        rows = client.table("articles").select("full_text").order("created_at", desc=True).limit(args.supabase).execute().data
+        return [row["full_text"] for row in rows if row.get("full_text")]
+    return sample_outputs(args.samples)
+
+
+def timed(parse, corpus, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in corpus:
+            parse(text)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6 / len(corpus)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="directory of writer outputs (*.txt)")
+    parser.add_argument("--supabase", type=int, default=0, help="use the full_text of the latest N stored articles")
+    parser.add_argument("--samples", type=int, default=500, help="number of built-in sample outputs")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args)
+    if not corpus:
+        print("No writer outputs found")
+        return
+
+    legacy_us = timed(legacy_parse_article, corpus, args.repeat)
+    new_us = timed(extract_article, corpus, args.repeat)
+
+    same = {"title": 0, "sources": 0, "images": 0, "content": 0}
+    for text in corpus:
+        old, new = legacy_parse_article(text), extract_article(text)
+        same["title"] += old["title"] == new.title
+        same["sources"] += old["sources"] == new.sources
+        same["images"] += set(old["images"]) == set(new.images)
+        same["content"] += old["content"] == new.content
+
+    print(f"{len(corpus)} writer outputs, avg {sum(map(len, corpus)) // len(corpus)} chars")
+    print(f"previous parse_article: {legacy_us:8.1f} us/article")
+    print(f"article_parser:         {new_us:8.1f} us/article  ({legacy_us / new_us:.1f}x)")
+    print("agreement: " + ", ".join(f"{key} {count}/{len(corpus)}" for key, count in same.items()))
+
+
+if __name__ == "__main__":
+    main()
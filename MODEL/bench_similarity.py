@@ -0,0 +1,111 @@
+"""
+Benchmark: related-article lookup, full scan vs topic index.
+
+Compares the previous find_similar_articles (re-extracting topics from every
+stored article on each lookup) with TopicIndex.search on synthetic articles.
+Runs offline - no Supabase or LLM needed:
+
+    python bench_similarity.py                 # 1k, 10k, 100k articles
+    python bench_similarity.py --sizes 1000 5000 --queries 20
+"""
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+from collections import Counter
+
+from topic_index import TopicIndex
+
+_STOP_WORDS = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'been', 'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'what', 'which', 'who', 'when', 'where', 'why', 'how'}
+
+
+def extract_topics(title, content):
+    """The original api.extract_topics (raw term frequency); both sides of the benchmark use it"""
+    words = [w for w in re.findall(r'\b[a-z]{3,}\b', (title + " " + content).lower()) if w not in _STOP_WORDS]
+    return [word for word, count in Counter(words).most_common(10)]
+
+
+def legacy_find_similar(new_title, new_content, existing_articles, similarity_threshold=0.3):
+    """The full-scan implementation being replaced"""
+    new_topics = set(extract_topics(new_title, new_content))
+    similar = []
+    for article in existing_articles:
+        existing_topics = set(extract_topics(article['title'], article['content']))
+        if new_topics and existing_topics:
+            similarity = len(new_topics & existing_topics) / len(new_topics | existing_topics)
+            if similarity >= similarity_threshold:
+                similar.append({'article': article, 'similarity': similarity})
+    similar.sort(key=lambda x: x['similarity'], reverse=True)
+    return similar
+
+
+def synthetic_articles(n, seed=7, words_per_article=250):
+    """Articles drawn from topical vocabularies so some of them genuinely overlap"""
+    rng = random.Random(seed)
+    vocabulary = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 9)))
+                  for _ in range(20000)]
+    themes = [rng.sample(vocabulary, 30) for _ in range(max(n // 20, 50))]
+    articles = []
+    for i in range(n):
+        theme = rng.choice(themes)
+        body = [rng.choice(theme) if rng.random() < 0.3 else rng.choice(vocabulary) for _ in range(words_per_article)]
+        title = ' '.join(rng.sample(theme, 6))
+        content = ' '.join(body)
+        articles.append({
+            'id': f'{i:08d}',
+            'title': title,
+            'content': content,
+            'created_at': f'2025-01-01T00:00:{i:08d}',
+            'topics': extract_topics(title, content),
+        })
+    return articles
+
+
+def bench(n, queries, threshold, legacy_limit):
+    # Probes come from the same themes as the stored articles, so they have real matches
+    generated = synthetic_articles(n + queries)
+    articles, probes = generated[:n], generated[n:]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = TopicIndex(os.path.join(tmp, 'topic_index.sqlite3'))
+        start = time.perf_counter()
+        index.add_many(articles)
+        build_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        indexed_hits = [index.search(p['topics'], similarity_threshold=threshold) for p in probes]
+        index_ms = (time.perf_counter() - start) * 1000 / queries
+
+    legacy_ms = None
+    if n <= legacy_limit:
+        start = time.perf_counter()
+        legacy_hits = [legacy_find_similar(p['title'], p['content'], articles, threshold) for p in probes]
+        legacy_ms = (time.perf_counter() - start) * 1000 / queries
+        for old, new in zip(legacy_hits, indexed_hits):
+            assert {m['article']['id'] for m in old} == {m['article']['id'] for m in new}, "result mismatch"
+
+    legacy = f"{legacy_ms:10.1f} ms" if legacy_ms is not None else "   (skipped)"
+    speedup = f"{legacy_ms / index_ms:8.0f}x" if legacy_ms is not None else "       -"
+    matches = sum(len(hits) for hits in indexed_hits) / queries
+    print(f"{n:>8} articles | full scan {legacy} | index {index_ms:8.2f} ms | {speedup} | "
+          f"{matches:5.1f} matches/query | index build {build_s:6.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--queries', type=int, default=5)
+    parser.add_argument('--threshold', type=float, default=0.4)
+    parser.add_argument('--legacy-limit', type=int, default=100000,
+                        help='skip the full scan above this many articles')
+    args = parser.parse_args()
+
+    print(f"Related-article lookup, per query (threshold {args.threshold}, {args.queries} queries)")
+    for n in args.sizes:
+        bench(n, args.queries, args.threshold, args.legacy_limit)
+
+
+if __name__ == '__main__':
+    main()
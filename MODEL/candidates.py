@@ -0,0 +1,93 @@
+"""
+Local preprocessing of fetched news before it reaches the researcher agent.
+
+Fetched NormalizedArticle items (hundreds of them, several copies of each
+story) are deduplicated, clustered into events and pre-scored here, and the
+agent gets a compact top-K candidate list sized to a token budget instead of
+an indented JSON dump of everything.
+"""
+import json
+import math
+import os
+from datetime import datetime, timezone
+
+from dedupe import cluster_articles
+
+CANDIDATE_TOP_K = int(os.getenv("CANDIDATE_TOP_K", "40"))
+# Rough budget for the candidate list handed to the agent (1 token ~= 4 chars)
+CANDIDATE_TOKEN_BUDGET = int(os.getenv("CANDIDATE_TOKEN_BUDGET", "6000"))
+CANDIDATE_SUMMARY_CHARS = int(os.getenv("CANDIDATE_SUMMARY_CHARS", "240"))
+CHARS_PER_TOKEN = 4
+
+
+def _score(members, now):
+    """Pre-score an event: cross-source coverage, recency, community signal, image availability"""
+    sources = {m.source_name for m in members if m.source_name}
+    newest = max((m.published_at for m in members if m.published_at), default=None)
+    age_hours = (now - newest).total_seconds() / 3600 if newest else 24
+    recency = math.exp(-max(age_hours, 0) / 24)
+    community = math.log10(1 + max(max(m.score or 0, 0) for m in members)) / 5
+    has_image = any(m.image_url for m in members)
+    return round(2.0 * len(sources) + 1.5 * recency + community + (0.5 if has_image else 0), 3)
+
+
+def select_candidates(articles, top_k=None):
+    """Dedupe, cluster and rank NormalizedArticle items; returns the top_k event candidates"""
+    if top_k is None:
+        top_k = CANDIDATE_TOP_K
+    items = [item for item in articles if item.title]
+    now = datetime.now(timezone.utc)
+    candidates = []
+    for cluster in cluster_articles(items):
+        members = cluster.members
+        lead = cluster.representative
+        candidates.append({
+            "title": lead.title,
+            "summary": lead.body,
+            "urls": cluster.urls,
+            "images": cluster.images,
+            "sources": cluster.sources,
+            "published": max((m.published_at for m in members if m.published_at), default=None),
+            "coverage": len(members),
+            "score": _score(members, now),
+        })
+    candidates.sort(key=lambda c: c["score"], reverse=True)
+    return candidates[:top_k]
+
+
+def build_candidate_digest(articles, top_k=None, token_budget=None):
+    """
+    Compact candidate list for the agent: one JSON object per line, best first,
+    cut off at token_budget (approximate).
+    """
+    if token_budget is None:
+        token_budget = CANDIDATE_TOKEN_BUDGET
+    candidates = select_candidates(articles, top_k)
+    header = (
+        f"# {len(candidates)} deduplicated event candidates from {len(articles)} fetched articles, "
+        f"pre-ranked by score (coverage across sources, recency, image). One JSON object per line."
+    )
+    lines = [header]
+    used = len(header)
+    budget_chars = token_budget * CHARS_PER_TOKEN
+    for rank, candidate in enumerate(candidates, 1):
+        summary = candidate["summary"]
+        if len(summary) > CANDIDATE_SUMMARY_CHARS:
+            summary = summary[:CANDIDATE_SUMMARY_CHARS].rsplit(" ", 1)[0] + "…"
+        line = json.dumps({
+            "rank": rank,
+            "score": candidate["score"],
+            "title": candidate["title"],
+            "summary": summary,
+            "sources": candidate["sources"],
+            "urls": candidate["urls"][:3],
+            "image_urls": candidate["images"][:3],
+            "published": candidate["published"].isoformat(timespec="minutes") if candidate["published"] else None,
+            "coverage": candidate["coverage"],
+        }, separators=(",", ":"), ensure_ascii=False)
+        if used + len(line) + 1 > budget_chars:
+            lines.append(f"# {len(candidates) - rank + 1} lower-ranked candidates omitted (token budget)")
+            break
+        lines.append(line)
+        used += len(line) + 1
+    return "\n".join(lines)
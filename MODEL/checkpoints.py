@@ -0,0 +1,202 @@
+"""
+Stage checkpoints for article generation, so a failed run can resume.
+
+Each generation attempt belongs to a pipeline run (run_id). As stages finish,
+their output is stored here: the fetched candidate digest, the selected
+events, each event's research and verification report, and the writer's
+draft. If the run fails (quota, timeout, a bad draft), the next attempt
+resumes the same run and only repeats the stages that have no checkpoint.
+
+Runs are resumable for CHECKPOINT_MAX_AGE_SECONDS (the news must still be
+fresh) and for at most CHECKPOINT_MAX_ATTEMPTS attempts; after that a new
+run starts from scratch.
+"""
+import json
+import os
+import sqlite3
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+CHECKPOINTS_PATH = os.getenv(
+    "CHECKPOINTS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "generation_checkpoints.sqlite3"),
+)
+CHECKPOINT_MAX_AGE_SECONDS = int(os.getenv("CHECKPOINT_MAX_AGE_SECONDS", "7200"))
+CHECKPOINT_MAX_ATTEMPTS = int(os.getenv("CHECKPOINT_MAX_ATTEMPTS", "3"))
+
+
+class Checkpoint:
+    """The stages saved so far for one pipeline run"""
+
+    def __init__(self, store, run_id, stages=None, attempt=1):
+        self.store = store
+        self.run_id = run_id
+        self.stages = dict(stages or {})
+        self.attempt = attempt
+        # Stages this attempt took from a checkpoint instead of recomputing
+        self.resumed = []
+
+    def get(self, stage):
+        """Saved output of stage, or None (recorded as resumed when found)"""
+        if stage not in self.stages:
+            return None
+        if stage not in self.resumed:
+            self.resumed.append(stage)
+        return self.stages[stage]
+
+    def save(self, stage, data):
+        self.stages[stage] = data
+        self.store.save(self.run_id, stage, data)
+
+    def discard(self, stage):
+        """Forget a stage so the next attempt recomputes it (e.g. a draft that did not parse)"""
+        self.stages.pop(stage, None)
+        self.store.discard(self.run_id, stage)
+
+
+class CheckpointStore:
+    """Pipeline runs and their stage outputs in SQLite"""
+
+    def __init__(self, path=CHECKPOINTS_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pipeline_runs (
+                    run_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 1,
+                    article_id TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    run_id TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (run_id, stage)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_pipeline_runs_status ON pipeline_runs(status, created_at)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _now():
+        return datetime.now(timezone.utc).isoformat()
+
+    def begin(self):
+        """Start a new pipeline run"""
+        run_id = uuid.uuid4().hex
+        now = self._now()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO pipeline_runs (run_id, status, created_at, updated_at) VALUES (?, 'open', ?, ?)",
+                (run_id, now, now),
+            )
+        return Checkpoint(self, run_id)
+
+    def resume_or_begin(self):
+        """
+        Resume the latest open run if it is recent and has attempts left,
+        otherwise start a new one. Stale open runs are abandoned.
+        """
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=CHECKPOINT_MAX_AGE_SECONDS)).isoformat()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT run_id, attempts FROM pipeline_runs WHERE status = 'open' AND created_at > ? "
+                "AND attempts < ? ORDER BY created_at DESC LIMIT 1",
+                (cutoff, CHECKPOINT_MAX_ATTEMPTS),
+            ).fetchone()
+            # Everything else still open can no longer be resumed
+            conn.execute(
+                "UPDATE pipeline_runs SET status = 'abandoned', updated_at = ? WHERE status = 'open' AND run_id != ?",
+                (self._now(), row[0] if row else ""),
+            )
+            if row is not None:
+                conn.execute(
+                    "UPDATE pipeline_runs SET attempts = attempts + 1, updated_at = ? WHERE run_id = ?",
+                    (self._now(), row[0]),
+                )
+            conn.execute("COMMIT")
+        if row is None:
+            self.prune()
+            return self.begin()
+        run_id, attempts = row
+        return Checkpoint(self, run_id, stages=self.load(run_id), attempt=attempts + 1)
+
+    def load(self, run_id):
+        """{stage: data} for a run"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT stage, data FROM checkpoints WHERE run_id = ?", (run_id,)).fetchall()
+        return {stage: json.loads(data) for stage, data in rows}
+
+    def save(self, run_id, stage, data):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (run_id, stage, data, created_at) VALUES (?, ?, ?, ?)",
+                (run_id, stage, json.dumps(data, ensure_ascii=False), self._now()),
+            )
+            conn.execute("UPDATE pipeline_runs SET updated_at = ? WHERE run_id = ?", (self._now(), run_id))
+
+    def discard(self, run_id, stage):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM checkpoints WHERE run_id = ? AND stage = ?", (run_id, stage))
+
+    def complete(self, run_id, article_id=None):
+        """Close a run that produced an article; its checkpoints are no longer needed"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE pipeline_runs SET status = 'completed', article_id = ?, updated_at = ? WHERE run_id = ?",
+                (article_id, self._now(), run_id),
+            )
+            conn.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,))
+
+    def is_resumable(self, checkpoint):
+        """True if the next attempt would resume this run with at least one stage saved"""
+        return bool(checkpoint.stages) and checkpoint.attempt < CHECKPOINT_MAX_ATTEMPTS
+
+    def prune(self, max_age_seconds=None):
+        """Delete runs (and their checkpoints) older than max_age_seconds (default 7x CHECKPOINT_MAX_AGE_SECONDS)"""
+        if max_age_seconds is None:
+            max_age_seconds = CHECKPOINT_MAX_AGE_SECONDS * 7
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=max_age_seconds)).isoformat()
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM checkpoints WHERE run_id IN (SELECT run_id FROM pipeline_runs WHERE created_at < ?)",
+                (cutoff,),
+            )
+            deleted = conn.execute("DELETE FROM pipeline_runs WHERE created_at < ?", (cutoff,)).rowcount
+        if deleted:
+            print(f"[{datetime.now()}] 🧹 Pruned {deleted} old pipeline run(s)")
+        return deleted
+
+
+_active = None
+
+
+def active():
+    """The checkpoint of the pipeline run in progress in this process, or None"""
+    return _active
+
+
+@contextmanager
+def activate(checkpoint):
+    """Make checkpoint the active one for the duration of a pipeline run"""
+    global _active
+    _active = checkpoint
+    try:
+        yield checkpoint
+    finally:
+        _active = None
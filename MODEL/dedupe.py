@@ -0,0 +1,168 @@
+"""
+Near-duplicate clustering of fetched headlines across sources.
+
+The same story arrives from NewsAPI, Google News, BBC, GDELT and Reddit with
+slightly different titles and URLs. Items are merged into event clusters when:
+- their canonical URLs match, or
+- their title shingles are similar (Jaccard >= threshold), or the titles are
+  moderately similar (>= threshold / 2) and the descriptions agree too.
+
+Candidate pairs come from MinHash-LSH over title shingles: each signature is
+cut into bands and only items sharing a band bucket are compared, so each
+insert costs O(bands) bucket lookups instead of a scan over every earlier item.
+"""
+import os
+import random
+import re
+import zlib
+from dataclasses import dataclass, field
+
+NUM_PERM = 96
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERM // LSH_BANDS  # 3 rows/band -> pairs above ~0.3 Jaccard become candidates
+DEDUPE_THRESHOLD = float(os.getenv("DEDUPE_THRESHOLD", "0.4"))
+DESCRIPTION_SHINGLE_WORDS = 40
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(1729)  # fixed seed: signatures must be stable across processes
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)
+]
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Publisher suffix appended by aggregators, e.g. "Quake hits Japan - BBC News"
+_PUBLISHER_SUFFIX_RE = re.compile(r"\s+[-|\u2013\u2014]\s+[^-|\u2013\u2014]{2,40}$")
+_STOP_WORDS = {
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by',
+    'is', 'are', 'was', 'were', 'as', 'after', 'over', 'from', 'into', 'its', 'his', 'her',
+    'their', 'new', 'says', 'say', 'said', 'how', 'why', 'what', 'who', 'will', 'be', 'has', 'have',
+    'this', 'that', 'it', 'not', 'than', 'news', 'live', 'updates', 'latest',
+}
+
+
+def _words(text):
+    return [w for w in _WORD_RE.findall(text.lower()) if len(w) > 2 and w not in _STOP_WORDS]
+
+
+def title_shingles(title):
+    """Unigrams and bigrams of a title's significant words (publisher suffix removed)"""
+    title_words = _words(_PUBLISHER_SUFFIX_RE.sub("", title))
+    result = set(title_words)
+    result.update(f"{a} {b}" for a, b in zip(title_words, title_words[1:]))
+    return result
+
+
+def description_shingles(description):
+    """First significant words of a description"""
+    return set(_words(description)[:DESCRIPTION_SHINGLE_WORDS])
+
+
+def minhash(shingle_set):
+    """MinHash signature (NUM_PERM values) of a set of strings"""
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingle_set]
+    if not hashes:
+        return (_MAX_HASH,) * NUM_PERM
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass(slots=True)
+class EventCluster:
+    """A group of fetched items describing the same event"""
+    members: list = field(default_factory=list)
+
+    @property
+    def representative(self):
+        # Prefer a member with an image, then the one with the most text
+        return max(self.members, key=lambda m: (bool(m.image_url), len(m.body)))
+
+    @property
+    def sources(self):
+        return sorted({m.source_name for m in self.members if m.source_name})
+
+    @property
+    def images(self):
+        return list(dict.fromkeys(m.image_url for m in self.members if m.image_url))
+
+    @property
+    def urls(self):
+        return list({(m.canonical_url or m.url): m.url for m in self.members if m.url}.values())
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = []
+
+    def add(self):
+        self.parent.append(len(self.parent))
+        return len(self.parent) - 1
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[rj] = ri
+
+
+def cluster_articles(articles, threshold=None):
+    """
+    Merge NormalizedArticle items into EventClusters.
+
+    Returns clusters in order of first appearance.
+    """
+    if threshold is None:
+        threshold = DEDUPE_THRESHOLD
+    uf = _UnionFind()
+    title_sets = []
+    description_sets = []
+    by_url = {}
+    buckets = [dict() for _ in range(LSH_BANDS)]
+
+    for item in articles:
+        index = uf.add()
+        item_shingles = title_shingles(item.title)
+        item_description = description_shingles(item.body)
+        title_sets.append(item_shingles)
+        description_sets.append(item_description)
+
+        if item.canonical_url:
+            if item.canonical_url in by_url:
+                uf.union(by_url[item.canonical_url], index)
+            else:
+                by_url[item.canonical_url] = index
+
+        if not item_shingles:
+            continue
+        signature = minhash(item_shingles)
+        candidates = set()
+        for band, bucket in enumerate(buckets):
+            key = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+            members = bucket.setdefault(key, [])
+            candidates.update(members)
+            members.append(index)
+        for other in candidates:
+            similarity = jaccard(item_shingles, title_sets[other])
+            if similarity >= threshold or (
+                similarity >= threshold / 2
+                and jaccard(item_description, description_sets[other]) >= threshold
+            ):
+                uf.union(other, index)
+
+    groups = {}
+    for index, item in enumerate(articles):
+        groups.setdefault(uf.find(index), []).append(item)
+    return [EventCluster(members) for members in groups.values()]
@@ -0,0 +1,315 @@
+"""
+Article embeddings and a nearest-neighbour index for related-article lookup.
+
+Topic-set Jaccard misses paraphrased coverage of the same event and matches
+unrelated articles that share generic words. Articles are embedded instead
+and compared by cosine similarity:
+
+- HashedNgramEmbedder (default, CPU, no model download): signed feature
+  hashing of word unigrams, word bigrams and character 4-grams of the title
+  and lead of the article, so inflections ("evacuate"/"evacuation") and
+  reordered wording still overlap.
+- SentenceEmbedder: a local sentence-transformers model on CPU, used when
+  SEMANTIC_MODEL is set and the package is installed.
+
+VectorIndex keeps normalized vectors in SQLite and in memory. Queries are a
+single NumPy matmul up to SEMANTIC_BRUTE_FORCE_MAX vectors; above that,
+random-hyperplane LSH tables pick candidates and only those are scored.
+Catch-up from Supabase pages on (created_at, id) from a synced-through mark
+that only the sync moves, so articles added elsewhere are not skipped.
+"""
+import json
+import os
+import re
+import sqlite3
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from threading import Lock
+
+try:
+    import numpy as np
+except ImportError:  # optional: the semantic path is disabled without NumPy
+    np = None
+
+from pagination import keyset_filter
+from topic_engine import STOP_WORDS
+
+# Opt-in: the Supabase topic match is the default related-article path
+SEMANTIC_INDEX_ENABLED = os.getenv("SEMANTIC_INDEX_ENABLED", "false").lower() == "true"
+SEMANTIC_INDEX_PATH = os.getenv(
+    "SEMANTIC_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "semantic_index.sqlite3"),
+)
+# Optional local sentence-transformers model, e.g. sentence-transformers/all-MiniLM-L6-v2
+SEMANTIC_MODEL = os.getenv("SEMANTIC_MODEL", "")
+SEMANTIC_DIM = int(os.getenv("SEMANTIC_DIM", "512"))
+SEMANTIC_BRUTE_FORCE_MAX = int(os.getenv("SEMANTIC_BRUTE_FORCE_MAX", "20000"))
+# Title plus the lead of the article identifies the event; the rest is background
+EMBED_CONTENT_CHARS = 2000
+TITLE_WEIGHT = 2.0
+
+LSH_TABLES = 32
+LSH_BITS = 8
+SYNC_PAGE_SIZE = 200
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashedNgramEmbedder:
+    """Feature-hashed word uni/bigrams and character 4-grams"""
+
+    def __init__(self, dim=SEMANTIC_DIM):
+        self.dim = dim
+        self.name = f"hashed-ngrams-{dim}"
+
+    def _features(self, text):
+        words = [w for w in _WORD_RE.findall(text.lower()) if w not in STOP_WORDS and len(w) > 1]
+        features = list(words)
+        features.extend(f"{a} {b}" for a, b in zip(words, words[1:]))
+        for word in words:
+            padded = f"<{word}>"
+            features.extend(f"#{padded[i:i + 4]}" for i in range(len(padded) - 3))
+        return features
+
+    def embed(self, title, content):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for weight, text in ((TITLE_WEIGHT, title or ""), (1.0, (content or "")[:EMBED_CONTENT_CHARS])):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                vector[h % self.dim] += weight if h & 0x80000000 else -weight
+        # Sublinear term weighting, then unit length
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SentenceEmbedder:
+    """Local sentence-transformers model on CPU"""
+
+    def __init__(self, model_name=SEMANTIC_MODEL):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"{model_name}-{self.dim}"
+
+    def embed(self, title, content):
+        text = f"{title}\n{(content or '')[:EMBED_CONTENT_CHARS]}"
+        return self.model.encode(text, normalize_embeddings=True).astype(np.float32)
+
+
+def get_embedder():
+    """The configured embedder: local model if SEMANTIC_MODEL is set and loadable, else hashed n-grams"""
+    if SEMANTIC_MODEL:
+        try:
+            return SentenceEmbedder(SEMANTIC_MODEL)
+        except Exception as e:
+            print(f"[{datetime.now()}] ⚠️  Could not load embedding model {SEMANTIC_MODEL} ({e}); using hashed n-grams")
+    return HashedNgramEmbedder()
+
+
+class VectorIndex:
+    """Persistent article vectors with cosine nearest-neighbour search"""
+
+    def __init__(self, path=SEMANTIC_INDEX_PATH, embedder=None):
+        self.path = path
+        self._embedder = embedder
+        self._lock = Lock()
+        self._loaded = False
+        self.enabled = SEMANTIC_INDEX_ENABLED and np is not None
+        if SEMANTIC_INDEX_ENABLED and np is None:
+            print("⚠️  NumPy not installed - semantic related-article index disabled")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._embedder = get_embedder()
+        return self._embedder
+
+    def _ensure_loaded(self):
+        """Load vectors on first use (the web tier never pays for this)"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("CREATE TABLE IF NOT EXISTS index_meta (key TEXT PRIMARY KEY, value TEXT)")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS article_vectors (
+                        id TEXT PRIMARY KEY,
+                        title TEXT,
+                        created_at TEXT,
+                        vector BLOB NOT NULL
+                    )
+                """)
+                row = conn.execute("SELECT value FROM index_meta WHERE key = 'embedder'").fetchone()
+                if row is None or row[0] != self.embedder.name:
+                    # Vectors from another embedder are not comparable: start over
+                    if row is not None:
+                        print(f"[{datetime.now()}] 🔁 Embedder changed ({row[0]} -> {self.embedder.name}), rebuilding semantic index")
+                    conn.execute("DELETE FROM article_vectors")
+                    conn.execute("DELETE FROM index_meta WHERE key = 'synced_through'")
+                    conn.execute("INSERT OR REPLACE INTO index_meta (key, value) VALUES ('embedder', ?)", (self.embedder.name,))
+                rows = conn.execute("SELECT id, title, created_at, vector FROM article_vectors ORDER BY created_at").fetchall()
+            self._ids = [r[0] for r in rows]
+            self._meta = [{"id": r[0], "title": r[1], "created_at": r[2]} for r in rows]
+            self._position = {article_id: i for i, article_id in enumerate(self._ids)}
+            # Row buffer with spare capacity so adds don't copy the whole matrix
+            self._matrix = np.zeros((max(len(rows) * 2, 1024), self.embedder.dim), dtype=np.float32)
+            for i, r in enumerate(rows):
+                self._matrix[i] = np.frombuffer(r[3], dtype=np.float32)
+            self._lsh = None
+            self._loaded = True
+
+    @property
+    def _vectors(self):
+        return self._matrix[:len(self._ids)]
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._ids)
+
+    def synced_through(self):
+        """(created_at, id) of the last Supabase article read by sync_from_supabase, or None"""
+        self._ensure_loaded()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM index_meta WHERE key = 'synced_through'").fetchone()
+        return tuple(json.loads(row[0])) if row else None
+
+    def embed(self, title, content):
+        return self.embedder.embed(title, content)
+
+    # --- approximate search (random-hyperplane LSH) -------------------------
+
+    def _lsh_keys(self, vectors):
+        """Bucket key per LSH table for each row of vectors -> int array (n, LSH_TABLES)"""
+        bits = (vectors @ self._lsh["planes"]) > 0  # (n, tables * bits)
+        bits = bits.reshape(len(vectors), LSH_TABLES, LSH_BITS)
+        return bits @ (1 << np.arange(LSH_BITS))
+
+    def _build_lsh(self):
+        rng = np.random.default_rng(1729)
+        self._lsh = {
+            "planes": rng.standard_normal((self.embedder.dim, LSH_TABLES * LSH_BITS)).astype(np.float32),
+            "buckets": [dict() for _ in range(LSH_TABLES)],
+        }
+        self._lsh_insert(np.arange(len(self._ids)))
+
+    def _lsh_insert(self, positions):
+        if self._lsh is None or len(positions) == 0:
+            return
+        keys = self._lsh_keys(self._vectors[positions])
+        for position, row in zip(positions.tolist(), keys.tolist()):
+            for table, key in enumerate(row):
+                self._lsh["buckets"][table].setdefault(key, []).append(position)
+
+    def _candidates(self, vector):
+        if len(self._ids) <= SEMANTIC_BRUTE_FORCE_MAX:
+            return None  # brute force over everything
+        if self._lsh is None:
+            self._build_lsh()
+        keys = self._lsh_keys(vector[None, :])[0].tolist()
+        positions = set()
+        for table, key in enumerate(keys):
+            positions.update(self._lsh["buckets"][table].get(key, ()))
+        return np.fromiter(positions, dtype=np.int64, count=len(positions))
+
+    # --- public API ----------------------------------------------------------
+
+    def add(self, article_id, title, created_at, content, vector=None):
+        """Embed and store one article (replacing an existing vector for the same ID)"""
+        self._ensure_loaded()
+        if vector is None:
+            vector = self.embed(title, content)
+        vector = np.asarray(vector, dtype=np.float32)
+        article_id = str(article_id)
+        with self._lock:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO article_vectors (id, title, created_at, vector) VALUES (?, ?, ?, ?)",
+                    (article_id, title, created_at, vector.tobytes()),
+                )
+            meta = {"id": article_id, "title": title, "created_at": created_at}
+            if article_id in self._position:
+                position = self._position[article_id]
+                self._vectors[position] = vector
+                self._meta[position] = meta
+                self._lsh = None  # rebuilt on the next approximate query
+            else:
+                position = len(self._ids)
+                if position == len(self._matrix):
+                    self._matrix = np.vstack([self._matrix, np.zeros_like(self._matrix)])
+                self._matrix[position] = vector
+                self._position[article_id] = position
+                self._ids.append(article_id)
+                self._meta.append(meta)
+                self._lsh_insert(np.array([position]))
+
+    def search(self, vector, k=5, min_similarity=0.0, exclude_id=None):
+        """
+        Up to k stored articles most similar to vector (cosine), best first:
+        [{'article': {id, title, created_at}, 'similarity': float}]
+        """
+        self._ensure_loaded()
+        if not self._ids:
+            return []
+        with self._lock:
+            candidates = self._candidates(vector)
+            matrix = self._vectors if candidates is None else self._vectors[candidates]
+            if len(matrix) == 0:
+                return []
+            scores = matrix @ vector
+            top = np.argsort(-scores)[:k + 1]
+            matches = []
+            for i in top.tolist():
+                position = i if candidates is None else int(candidates[i])
+                similarity = float(scores[i])
+                if similarity < min_similarity or self._ids[position] == exclude_id:
+                    continue
+                matches.append({"article": dict(self._meta[position]), "similarity": similarity})
+            return matches[:k]
+
+    def sync_from_supabase(self, supabase_client):
+        """
+        Embed Supabase articles after the synced-through mark that are not
+        indexed yet, paging on (created_at, id). Returns the number added.
+        """
+        cursor = self.synced_through()
+        added = 0
+        while True:
+            query = (
+                supabase_client.table("articles").select("id, title, content, created_at")
+                .order("created_at").order("id").limit(SYNC_PAGE_SIZE)
+            )
+            if cursor:
+                created_at, article_id = cursor
+                query = query.or_(keyset_filter(created_at, article_id))
+            rows = query.execute().data or []
+            if not rows:
+                break
+            for row in rows:
+                # Articles saved by this process are already embedded
+                if str(row["id"]) not in self._position:
+                    self.add(row["id"], row.get("title") or "", row.get("created_at"), row.get("content") or "")
+                    added += 1
+            cursor = (rows[-1]["created_at"], rows[-1]["id"])
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO index_meta (key, value) VALUES ('synced_through', ?)",
+                    (json.dumps(list(cursor)),),
+                )
+            if len(rows) < SYNC_PAGE_SIZE:
+                break
+        if added:
+            print(f"[{datetime.now()}] 🧭 Semantic index caught up: {added} article(s) embedded ({len(self)} total)")
+        return added
@@ -0,0 +1,109 @@
+"""
+Concurrent fetch engine for news sources.
+
+Runs a set of fetcher callables in parallel on a thread pool under a single
+global deadline. Whatever finishes in time is returned; sources that fail or
+miss the deadline are reported but never block the caller. The deadline is
+also handed to http_client, so a fetcher's retries stop when it passes.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+import http_client
+
+# Global deadline for one fan-out (seconds). Individual requests still use
+# their own socket timeouts; this caps the wall time of the whole pass.
+DEFAULT_DEADLINE_SECONDS = float(os.getenv("NEWS_FETCH_DEADLINE_SECONDS", "15"))
+DEFAULT_MAX_WORKERS = int(os.getenv("NEWS_FETCH_MAX_WORKERS", "8"))
+
+
+def run_fetchers(fetchers, deadline=None, max_workers=None, label="sources"):
+    """
+    Run fetchers concurrently and collect results before the deadline.
+
+    Args:
+        fetchers: dict mapping a source name to a zero-argument callable
+        deadline: seconds to wait for all fetchers (default NEWS_FETCH_DEADLINE_SECONDS)
+        max_workers: thread pool size (default NEWS_FETCH_MAX_WORKERS)
+        label: name used in log output
+
+    Returns:
+        (results, report) where results maps source name to the fetcher's
+        return value (only for sources that succeeded in time) and report maps
+        every source name to {"status", "latency_ms", "count", "error"}.
+        status is one of "ok", "error" or "timeout".
+    """
+    if deadline is None:
+        deadline = DEFAULT_DEADLINE_SECONDS
+    if max_workers is None:
+        max_workers = DEFAULT_MAX_WORKERS
+
+    results = {}
+    report = {}
+    if not fetchers:
+        return results, report
+
+    started = {}
+    finished = {}
+    # Nested passes (e.g. subreddits inside the Reddit source) keep the enclosing deadline
+    enclosing = http_client.current_deadline()
+    if enclosing is not None:
+        deadline = max(0.0, min(deadline, enclosing - time.monotonic()))
+    deadline_at = time.monotonic() + deadline
+
+    def timed(name, fn):
+        started[name] = time.perf_counter()
+        try:
+            with http_client.deadline(deadline_at):
+                return fn()
+        finally:
+            finished[name] = time.perf_counter()
+
+    pass_start = time.perf_counter()
+    executor = ThreadPoolExecutor(
+        max_workers=min(max_workers, len(fetchers)),
+        thread_name_prefix="news-fetch",
+    )
+    try:
+        futures = {executor.submit(timed, name, fn): name for name, fn in fetchers.items()}
+        done, not_done = wait(futures, timeout=deadline)
+
+        for future in done:
+            name = futures[future]
+            latency_ms = round((finished.get(name, time.perf_counter()) - started.get(name, pass_start)) * 1000, 1)
+            error = future.exception()
+            if error is not None:
+                report[name] = {"status": "error", "latency_ms": latency_ms, "count": 0, "error": str(error)}
+                continue
+            value = future.result()
+            results[name] = value
+            report[name] = {
+                "status": "ok",
+                "latency_ms": latency_ms,
+                "count": len(value) if hasattr(value, "__len__") else None,
+                "error": None,
+            }
+
+        for future in not_done:
+            name = futures[future]
+            future.cancel()
+            report[name] = {
+                "status": "timeout",
+                "latency_ms": round((time.perf_counter() - started.get(name, pass_start)) * 1000, 1),
+                "count": 0,
+                "error": f"exceeded {deadline}s deadline",
+            }
+    finally:
+        # Don't wait for stragglers - they finish in the background and are discarded
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    total_ms = round((time.perf_counter() - pass_start) * 1000, 1)
+    ok = sum(1 for r in report.values() if r["status"] == "ok")
+    print(f"[{datetime.now()}] 🌐 Fetched {ok}/{len(fetchers)} {label} in {total_ms}ms")
+    for name, entry in report.items():
+        if entry["status"] != "ok":
+            print(f"[{datetime.now()}] ⚠️  {name}: {entry['status']} after {entry['latency_ms']}ms ({entry['error']})")
+
+    return results, report
@@ -4,8 +4,14 @@ import os
 bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
 workers = multiprocessing.cpu_count() * 2 + 1
 worker_class = "sync"
-timeout = 300
+# Requests never wait on the LLM (generation runs in worker.py), so keep this short
+timeout = 60
 keepalive = 5
-max_requests = 1000
-max_requests_jitter = 50
+# Recycling would restart the scheduler leader mid-generation, so only recycle
+# workers that just serve requests (generation runs in `python worker.py`)
+if os.getenv('EMBEDDED_WORKER', 'false').lower() == 'true':
+    max_requests = 0
+else:
+    max_requests = 1000
+    max_requests_jitter = 50
 
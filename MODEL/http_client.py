@@ -0,0 +1,230 @@
+"""
+Shared pooled HTTP client for all news fetchers.
+
+One requests.Session is reused across every source so connections (and their
+DNS/TCP/TLS setup) are kept alive between fetch cycles. On top of that it adds:
+- a per-host concurrency limit
+- retry with jittered exponential backoff for transient failures
+- ETag/Last-Modified conditional requests, so unchanged feeds return a cheap
+  304 and are served from the last stored body
+- a per-thread deadline (set by the fetch engine for each pass): request
+  timeouts and retry backoff are capped at the time left before it
+"""
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "4"))
+POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "16"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+BACKOFF_BASE_SECONDS = float(os.getenv("HTTP_BACKOFF_BASE_SECONDS", "0.5"))
+BACKOFF_MAX_SECONDS = float(os.getenv("HTTP_BACKOFF_MAX_SECONDS", "8"))
+CONDITIONAL_CACHE_SIZE = int(os.getenv("HTTP_CONDITIONAL_CACHE_SIZE", "256"))
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+_host_limits = {}
+_host_limits_lock = threading.Lock()
+
+# Monotonic time by which this thread's fetches must finish (see deadline)
+_deadline = threading.local()
+
+# url -> {"etag", "last_modified", "content", "encoding", "headers"}
+_validators = OrderedDict()
+_validators_lock = threading.Lock()
+
+
+class HttpResult:
+    """Minimal response object shared by fresh (200) and revalidated (304) responses"""
+    __slots__ = ("url", "status_code", "content", "encoding", "headers", "not_modified")
+
+    def __init__(self, url, status_code, content, encoding=None, headers=None, not_modified=False):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding
+        self.headers = headers or {}
+        self.not_modified = not_modified
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error for url: {self.url}")
+
+
+def get_session():
+    """Return the process-wide pooled session (created on first use)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                # Retries are handled here (with jitter), not by urllib3
+                adapter = HTTPAdapter(
+                    pool_connections=POOL_HOSTS,
+                    pool_maxsize=MAX_CONNECTIONS_PER_HOST,
+                    pool_block=True,
+                    max_retries=0,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+@contextmanager
+def deadline(at):
+    """Cap requests made on this thread inside the block at monotonic time at (an earlier enclosing deadline wins)"""
+    previous = getattr(_deadline, "at", None)
+    _deadline.at = at if previous is None else min(at, previous)
+    try:
+        yield
+    finally:
+        _deadline.at = previous
+
+
+def current_deadline():
+    """Monotonic deadline for this thread's requests, or None"""
+    return getattr(_deadline, "at", None)
+
+
+def _time_left():
+    at = current_deadline()
+    return None if at is None else at - time.monotonic()
+
+
+def _host_limit(url):
+    host = urlsplit(url).netloc.lower()
+    with _host_limits_lock:
+        limit = _host_limits.get(host)
+        if limit is None:
+            limit = threading.BoundedSemaphore(MAX_CONNECTIONS_PER_HOST)
+            _host_limits[host] = limit
+    return limit
+
+
+def _backoff_delay(attempt, retry_after=None):
+    """Full-jitter exponential backoff, honoring a numeric Retry-After header"""
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_MAX_SECONDS)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+
+def _can_wait(delay):
+    """Whether a backoff of delay seconds still leaves time for another attempt"""
+    left = _time_left()
+    return left is None or delay < left
+
+
+def _cache_key(url, params):
+    if not params:
+        return url
+    return f"{url}?{urlencode(sorted(params.items()))}"
+
+
+def get(url, params=None, headers=None, timeout=10, conditional=True):
+    """
+    GET a URL through the shared session.
+
+    When conditional is True the last ETag/Last-Modified seen for this URL are
+    sent, and a 304 response is returned as an HttpResult carrying the stored
+    body with status_code 200 and not_modified=True. A 304 with no stored body
+    is refetched once unconditionally, then raised as an HTTPError.
+    """
+    key = _cache_key(url, params)
+    request_headers = dict(headers or {})
+    cached = None
+    if conditional:
+        with _validators_lock:
+            cached = _validators.get(key)
+            if cached is not None:
+                _validators.move_to_end(key)
+        if cached is not None:
+            if cached.get("etag"):
+                request_headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                request_headers["If-Modified-Since"] = cached["last_modified"]
+
+    session = get_session()
+    attempt = 0
+    refetched = False
+    while True:
+        left = _time_left()
+        if left is not None and left <= 0:
+            raise requests.Timeout(f"fetch deadline passed before requesting {url}")
+        try:
+            with _host_limit(url):
+                response = session.get(
+                    url, params=params, headers=request_headers,
+                    timeout=timeout if left is None else min(timeout, left),
+                )
+        except (requests.ConnectionError, requests.Timeout):
+            delay = _backoff_delay(attempt)
+            if attempt >= MAX_RETRIES or not _can_wait(delay):
+                raise
+            time.sleep(delay)
+            attempt += 1
+            continue
+
+        if response.status_code in RETRY_STATUS_CODES and attempt < MAX_RETRIES:
+            delay = _backoff_delay(attempt, response.headers.get("Retry-After"))
+            if _can_wait(delay):
+                response.close()
+                time.sleep(delay)
+                attempt += 1
+                continue
+        if response.status_code == 304 and cached is None:
+            # No stored body to serve (e.g. a proxy answered 304): ask once more for the full body
+            response.close()
+            if refetched:
+                raise requests.HTTPError(f"304 Not Modified without a stored body for url: {url}")
+            refetched = True
+            request_headers = {
+                name: value for name, value in request_headers.items()
+                if name not in ("If-None-Match", "If-Modified-Since")
+            }
+            request_headers["Cache-Control"] = "no-cache"
+            continue
+        break
+
+    if response.status_code == 304:
+        return HttpResult(url, 200, cached["content"], cached["encoding"], cached["headers"], not_modified=True)
+
+    result = HttpResult(url, response.status_code, response.content, response.encoding, dict(response.headers))
+
+    if conditional and response.status_code == 200:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            with _validators_lock:
+                _validators[key] = {
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "content": result.content,
+                    "encoding": result.encoding,
+                    "headers": result.headers,
+                }
+                _validators.move_to_end(key)
+                while len(_validators) > CONDITIONAL_CACHE_SIZE:
+                    _validators.popitem(last=False)
+
+    return result
@@ -0,0 +1,147 @@
+"""
+Continuous ingestion of raw news into the local store (ingest_store.py).
+
+Each source is polled on its own cadence: INGEST_CADENCE_<SOURCE> seconds,
+defaulting to SOURCE_CADENCES (keyed APIs are polled less often to stay
+within their free daily quotas). Every INGEST_TICK_SECONDS the sources that
+are due are fetched together through the concurrent fetch engine, bypassing
+the source snapshot cache, then normalized by their adapters and upserted
+by canonical URL.
+
+The generator reads fresh_items(): what was first seen since the last
+article, instead of re-downloading every source each cycle. It falls back to
+a live fetch when the store is not being kept current.
+
+Runs inside the generation worker when INGEST_ENABLED (polling only while
+the process holds scheduler leadership), or on its own:
+    python ingest.py          # poll forever
+    python ingest.py --once   # poll every source once and exit
+"""
+import os
+import sys
+import time
+from datetime import datetime
+
+from fetch_engine import run_fetchers
+from ingest_store import get_store
+from news_sources import UNCACHED_SOURCES
+from normalized_article import ADAPTERS
+
+INGEST_ENABLED = os.getenv("INGEST_ENABLED", "true").lower() == "true"
+INGEST_TICK_SECONDS = float(os.getenv("INGEST_TICK_SECONDS", "30"))
+# Default poll interval per source (seconds)
+SOURCE_CADENCES = {
+    "newsapi": 900,
+    "newsdata": 900,
+    "gdelt": 600,
+    "google_news": 300,
+    "bbc": 300,
+    "reddit": 300,
+}
+# The generator only trusts the store if some source was ingested this recently
+INGEST_STALE_SECONDS = float(os.getenv("INGEST_STALE_SECONDS", "1800"))
+# How far back the generator looks when no article has set a watermark yet
+INGEST_LOOKBACK_SECONDS = float(os.getenv("INGEST_LOOKBACK_SECONDS", "86400"))
+# Fewer new items than this and the generator takes everything still being reported instead
+INGEST_MIN_NEW_ITEMS = int(os.getenv("INGEST_MIN_NEW_ITEMS", "20"))
+INGEST_MAX_ITEMS = int(os.getenv("INGEST_MAX_ITEMS", "1000"))
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+def source_cadence(source):
+    return float(os.getenv(f"INGEST_CADENCE_{source.upper()}", SOURCE_CADENCES.get(source, 600)))
+
+
+def due_sources(store, now=None):
+    """Sources whose cadence has elapsed since their last poll"""
+    now = now or time.time()
+    states = store.source_states()
+    return [
+        source for source in UNCACHED_SOURCES
+        if now - (states.get(source) or {}).get("last_polled", 0) >= source_cadence(source)
+    ]
+
+
+def ingest_once(store=None, sources=None):
+    """
+    Poll sources (default: the ones that are due) and upsert what they return.
+    Returns {source: {"status", "items", "new"}}.
+    """
+    store = store or get_store()
+    sources = due_sources(store) if sources is None else sources
+    if not sources:
+        return {}
+    results, report = run_fetchers({source: UNCACHED_SOURCES[source] for source in sources}, label="ingest sources")
+    summary = {}
+    for source in sources:
+        entry = report.get(source) or {}
+        if source not in results:
+            store.record_poll(source, latency_ms=entry.get("latency_ms"), error=entry.get("error") or entry.get("status"))
+            summary[source] = {"status": entry.get("status", "error"), "items": 0, "new": 0}
+            continue
+        adapt = ADAPTERS[source]
+        items = [adapt(raw) for raw in results[source]]
+        new, _ = store.upsert(items)
+        store.record_poll(source, items=len(items), new_items=new, latency_ms=entry.get("latency_ms"))
+        summary[source] = {"status": "ok", "items": len(items), "new": new}
+    new_total = sum(entry["new"] for entry in summary.values())
+    print(f"[{datetime.now()}] 📥 Ingested {', '.join(sources)}: {new_total} new item(s)")
+    return summary
+
+
+def ingest_loop(store=None, leader=None):
+    """
+    Poll due sources every INGEST_TICK_SECONDS forever. With a LeaderLock,
+    only polls while this process leads (the scheduler thread acquires it).
+    """
+    store = store or get_store()
+    cadences = ", ".join(f"{source} {source_cadence(source):g}s" for source in UNCACHED_SOURCES)
+    print(f"[{datetime.now()}] Ingestion loop started ({cadences}).")
+    last_prune = 0.0
+    while True:
+        if leader is None or leader.is_leader:
+            try:
+                ingest_once(store)
+                if time.monotonic() - last_prune >= PRUNE_INTERVAL_SECONDS:
+                    store.prune()
+                    last_prune = time.monotonic()
+            except Exception as e:
+                print(f"[{datetime.now()}] ⚠️  Ingestion pass failed: {e}")
+        time.sleep(INGEST_TICK_SECONDS)
+
+
+def fresh_items(store=None):
+    """
+    (articles, read_at) for the next article's candidates: items first seen
+    since the watermark (bounded by INGEST_LOOKBACK_SECONDS), or every item
+    still reported within the lookback when too few are new. read_at becomes
+    the store's watermark once the article is published.
+
+    Returns (None, None) when ingestion is disabled or the store is stale,
+    so the caller fetches live.
+    """
+    if not INGEST_ENABLED:
+        return None, None
+    store = store or get_store()
+    read_at = time.time()
+    last = store.last_ingested()
+    if last is None or read_at - last > INGEST_STALE_SECONDS:
+        return None, None
+    floor = read_at - INGEST_LOOKBACK_SECONDS
+    since = max(store.watermark() or 0, floor)
+    articles = store.new_since(since, limit=INGEST_MAX_ITEMS)
+    if len(articles) < INGEST_MIN_NEW_ITEMS:
+        print(f"[{datetime.now()}] 📥 Only {len(articles)} new ingested item(s); using everything reported in the lookback window")
+        articles = store.seen_since(floor, limit=INGEST_MAX_ITEMS)
+        if not articles:
+            return None, None
+    else:
+        print(f"[{datetime.now()}] 📥 {len(articles)} item(s) ingested since the last article")
+    return articles, read_at
+
+
+if __name__ == "__main__":
+    if "--once" in sys.argv[1:]:
+        ingest_once(sources=list(UNCACHED_SOURCES))
+    else:
+        ingest_loop()
@@ -0,0 +1,280 @@
+"""
+Local store of raw news items, kept current by the ingestion loop (ingest.py).
+
+Every fetched item is upserted by canonical URL: the first sighting inserts
+it with first_seen, later sightings refresh last_seen, seen_count and any
+fields the new copy fills in (a longer body, an image). Titles and bodies are
+indexed with FTS5 for keyword search.
+
+The generator reads the delta since the last article (new_since, an index
+range scan on first_seen) instead of downloading every source per cycle.
+The watermark of what the last article already covered is kept here too,
+as is the poll state of each source. Items not seen for
+INGEST_RETENTION_DAYS are pruned.
+"""
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from threading import Lock
+
+from normalized_article import NormalizedArticle
+
+INGEST_STORE_PATH = os.getenv(
+    "INGEST_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "ingest_store.sqlite3"),
+)
+INGEST_RETENTION_DAYS = float(os.getenv("INGEST_RETENTION_DAYS", "7"))
+
+_ITEM_COLUMNS = "title, url, canonical_url, body, image_url, source_name, published_at, score, origin"
+# Bound on SQL variables per IN (...) lookup
+_LOOKUP_CHUNK = 500
+
+
+def _fts_query(text):
+    """Free text -> FTS5 query matching any of its words (quoted, so punctuation is literal)"""
+    terms = [term.replace('"', '""') for term in text.split() if term.strip('"')]
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class IngestStore:
+    """Raw news items keyed by canonical URL, with first/last seen times, in SQLite"""
+
+    def __init__(self, path=INGEST_STORE_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS items (
+                    id INTEGER PRIMARY KEY,
+                    canonical_url TEXT NOT NULL UNIQUE,
+                    url TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    body TEXT NOT NULL DEFAULT '',
+                    image_url TEXT NOT NULL DEFAULT '',
+                    source_name TEXT NOT NULL DEFAULT '',
+                    published_at TEXT,
+                    score REAL NOT NULL DEFAULT 0,
+                    origin TEXT NOT NULL DEFAULT '',
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL,
+                    seen_count INTEGER NOT NULL DEFAULT 1
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_items_first_seen ON items(first_seen)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_items_last_seen ON items(last_seen)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sources (
+                    source TEXT PRIMARY KEY,
+                    last_polled REAL NOT NULL,
+                    last_ok REAL,
+                    items INTEGER NOT NULL DEFAULT 0,
+                    new_items INTEGER NOT NULL DEFAULT 0,
+                    latency_ms REAL,
+                    error TEXT
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self.fts = self._create_fts(conn)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _create_fts(conn):
+        """Full-text index over items kept in sync by triggers; False if SQLite lacks FTS5"""
+        try:
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(title, body, content='items', content_rowid='id')"
+            )
+        except sqlite3.OperationalError as e:
+            print(f"[{datetime.now()}] ⚠️  FTS5 unavailable, ingested news search disabled: {e}")
+            return False
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items BEGIN
+                INSERT INTO items_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items BEGIN
+                INSERT INTO items_fts(items_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+            END
+        """)
+        # Re-sightings only touch last_seen, so most upserts leave the index alone
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS items_fts_update AFTER UPDATE OF title, body ON items
+            WHEN old.title IS NOT new.title OR old.body IS NOT new.body BEGIN
+                INSERT INTO items_fts(items_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+                INSERT INTO items_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+            END
+        """)
+        return True
+
+    def upsert(self, articles, seen_at=None):
+        """
+        Insert new NormalizedArticles and refresh the ones already stored.
+        Items without a URL are skipped. Returns (new, updated) counts.
+        """
+        seen_at = seen_at or time.time()
+        rows = {}
+        for article in articles:
+            if article.canonical_url and article.title:
+                rows.setdefault(article.canonical_url, article)
+        if not rows:
+            return 0, 0
+        keys = list(rows)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            known = set()
+            for i in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[i:i + _LOOKUP_CHUNK]
+                known.update(row[0] for row in conn.execute(
+                    f"SELECT canonical_url FROM items WHERE canonical_url IN ({','.join('?' * len(chunk))})", chunk
+                ))
+            conn.executemany(
+                f"INSERT INTO items ({_ITEM_COLUMNS}, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(canonical_url) DO UPDATE SET "
+                "last_seen = excluded.last_seen, seen_count = seen_count + 1, "
+                "body = CASE WHEN length(excluded.body) > length(body) THEN excluded.body ELSE body END, "
+                "image_url = CASE WHEN image_url = '' THEN excluded.image_url ELSE image_url END, "
+                "published_at = COALESCE(published_at, excluded.published_at), "
+                "score = MAX(score, excluded.score)",
+                [
+                    (
+                        a.title, a.url, a.canonical_url, a.body, a.image_url, a.source_name,
+                        a.published_at.isoformat() if a.published_at else None, a.score, a.origin,
+                        seen_at, seen_at,
+                    )
+                    for a in rows.values()
+                ],
+            )
+            conn.execute("COMMIT")
+        return len(rows) - len(known), len(known)
+
+    @staticmethod
+    def _article(row):
+        title, url, canonical, body, image_url, source_name, published_at, score, origin = row
+        return NormalizedArticle(
+            title=title, url=url, canonical_url=canonical, body=body, image_url=image_url,
+            source_name=source_name,
+            published_at=datetime.fromisoformat(published_at) if published_at else None,
+            score=score, origin=origin,
+        )
+
+    def new_since(self, since, limit=None):
+        """Items first seen after since (epoch seconds), newest first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {_ITEM_COLUMNS} FROM items WHERE first_seen > ? ORDER BY first_seen DESC LIMIT ?",
+                (since, limit if limit is not None else -1),
+            ).fetchall()
+        return [self._article(row) for row in rows]
+
+    def seen_since(self, since, limit=None):
+        """Items any source still reported after since (epoch seconds), most recently seen first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {_ITEM_COLUMNS} FROM items WHERE last_seen > ? ORDER BY last_seen DESC LIMIT ?",
+                (since, limit if limit is not None else -1),
+            ).fetchall()
+        return [self._article(row) for row in rows]
+
+    def search(self, text, limit=20, since=None):
+        """Items matching any word of text, best match first (optionally only those seen after since)"""
+        query = _fts_query(text or "")
+        if not self.fts or not query:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join('items.' + c.strip() for c in _ITEM_COLUMNS.split(','))} "
+                "FROM items_fts JOIN items ON items.id = items_fts.rowid "
+                "WHERE items_fts MATCH ? AND items.last_seen > ? ORDER BY bm25(items_fts) LIMIT ?",
+                (query, since or 0, limit),
+            ).fetchall()
+        return [self._article(row) for row in rows]
+
+    def watermark(self):
+        """Epoch seconds up to which ingested items are covered by a published article, or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'watermark'").fetchone()
+        return float(row[0]) if row else None
+
+    def set_watermark(self, timestamp):
+        """Advance the watermark (it never moves back)"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('watermark', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = MAX(CAST(value AS REAL), CAST(excluded.value AS REAL))",
+                (str(float(timestamp)),),
+            )
+
+    def record_poll(self, source, items=0, new_items=0, latency_ms=None, error=None, polled_at=None):
+        """Remember when a source was polled and how it went"""
+        polled_at = polled_at or time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO sources (source, last_polled, last_ok, items, new_items, latency_ms, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(source) DO UPDATE SET "
+                "last_polled = excluded.last_polled, last_ok = COALESCE(excluded.last_ok, last_ok), "
+                "items = excluded.items, new_items = excluded.new_items, "
+                "latency_ms = excluded.latency_ms, error = excluded.error",
+                (source, polled_at, None if error else polled_at, items, new_items, latency_ms, error),
+            )
+
+    def source_states(self):
+        """{source: {last_polled, last_ok, items, new_items, latency_ms, error}}"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT source, last_polled, last_ok, items, new_items, latency_ms, error FROM sources"
+            ).fetchall()
+        return {
+            source: {
+                "last_polled": last_polled, "last_ok": last_ok, "items": items,
+                "new_items": new_items, "latency_ms": latency_ms, "error": error,
+            }
+            for source, last_polled, last_ok, items, new_items, latency_ms, error in rows
+        }
+
+    def last_ingested(self):
+        """Epoch seconds of the latest successful poll of any source, or None"""
+        with self._connect() as conn:
+            return conn.execute("SELECT MAX(last_ok) FROM sources").fetchone()[0]
+
+    def prune(self, retention_days=INGEST_RETENTION_DAYS):
+        """Delete items no source has reported for retention_days"""
+        cutoff = time.time() - retention_days * 86400
+        with self._connect() as conn:
+            deleted = conn.execute("DELETE FROM items WHERE last_seen < ?", (cutoff,)).rowcount
+        if deleted:
+            print(f"[{datetime.now()}] 🧹 Pruned {deleted} ingested item(s) not seen for {retention_days:g} days")
+        return deleted
+
+    def stats(self):
+        with self._connect() as conn:
+            count, newest = conn.execute("SELECT COUNT(*), MAX(first_seen) FROM items").fetchone()
+        return {
+            "items": count,
+            "newest_item_age": round(time.time() - newest, 1) if newest else None,
+            "watermark": self.watermark(),
+            "search": self.fts,
+            "sources": self.source_states(),
+        }
+
+
+_store = None
+_store_lock = Lock()
+
+
+def get_store():
+    """The process-wide IngestStore at INGEST_STORE_PATH (created on first use)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = IngestStore()
+        return _store
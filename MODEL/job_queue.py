@@ -0,0 +1,254 @@
+"""
+Persistent job queue for article generation.
+
+A small queue shared by the web tier (which enqueues jobs and reports their
+status) and the generation worker (which claims and runs them). Claiming is
+atomic across processes, and jobs survive restarts. Two backends:
+- "sqlite" (JobQueue): a file at JOBS_DB_PATH, for a worker on the same host
+  or volume as the web process (e.g. EMBEDDED_WORKER=true)
+- "supabase" (SupabaseJobQueue): the generation_jobs table and the functions
+  in add_generation_jobs.sql, for a worker running as its own service
+
+The worker heartbeats running jobs, so a job whose worker died is failed
+within JOB_STALE_SECONDS rather than blocking new requests as "in progress".
+"""
+import json
+import os
+import sqlite3
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+JOBS_DB_PATH = os.getenv(
+    "JOBS_DB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "generation_jobs.sqlite3"),
+)
+
+# "sqlite" (web and worker on one host/volume) or "supabase" (separate services)
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "sqlite").lower()
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+# A running job with no heartbeat for this long is treated as lost
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "120"))
+
+
+class JobQueue:
+    """Generation jobs: queued -> running -> succeeded | failed"""
+
+    def __init__(self, path=JOBS_DB_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    payload TEXT,
+                    result TEXT,
+                    error TEXT,
+                    worker TEXT,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT
+                )
+            """)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "heartbeat_at" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+
+    @contextmanager
+    def _connect(self):
+        # Autocommit connection; multi-statement updates use explicit BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _to_dict(row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"]) if job["payload"] else None
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def enqueue(self, kind="generate_article", payload=None, dedupe=True):
+        """
+        Add a job and return it.
+
+        With dedupe, an already queued or running job of the same kind is
+        returned instead of creating another one (running jobs only while
+        their worker is still heartbeating); its "deduplicated" key is True.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing = None
+                if dedupe:
+                    existing = conn.execute(
+                        "SELECT * FROM jobs WHERE kind = ? AND (status = 'queued' OR "
+                        "(status = 'running' AND COALESCE(heartbeat_at, started_at) >= ?)) "
+                        "ORDER BY created_at LIMIT 1",
+                        (kind, self._stale_cutoff(JOB_STALE_SECONDS)),
+                    ).fetchone()
+                if existing is not None:
+                    row = existing
+                else:
+                    job_id = uuid.uuid4().hex
+                    conn.execute(
+                        "INSERT INTO jobs (id, kind, status, payload, created_at) VALUES (?, ?, 'queued', ?, ?)",
+                        (job_id, kind, json.dumps(payload) if payload is not None else None,
+                         datetime.now().isoformat()),
+                    )
+                    row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        job = self._to_dict(row)
+        job["deduplicated"] = existing is not None
+        return job
+
+    def claim_next(self, worker_id, kind="generate_article"):
+        """Atomically move the oldest queued job to running and return it (or None)"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                job = None
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE kind = ? AND status = 'queued' ORDER BY created_at LIMIT 1",
+                    (kind,),
+                ).fetchone()
+                if row is not None:
+                    now = datetime.now().isoformat()
+                    conn.execute(
+                        "UPDATE jobs SET status = 'running', worker = ?, started_at = ?, heartbeat_at = ? WHERE id = ?",
+                        (worker_id, now, now, row["id"]),
+                    )
+                    job = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return self._to_dict(job)
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, json.dumps(result, default=str) if result is not None else None, error,
+                 datetime.now().isoformat(), job_id),
+            )
+
+    def complete(self, job_id, result=None):
+        self._finish(job_id, "succeeded", result=result)
+
+    def fail(self, job_id, error, result=None):
+        self._finish(job_id, "failed", result=result, error=error)
+
+    def heartbeat(self, job_id):
+        """Mark a running job as still alive"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running'",
+                (datetime.now().isoformat(), job_id),
+            )
+
+    @staticmethod
+    def _stale_cutoff(max_silent_seconds):
+        return datetime.fromtimestamp(datetime.now().timestamp() - max_silent_seconds).isoformat()
+
+    def fail_stale(self, max_silent_seconds=JOB_STALE_SECONDS):
+        """Fail running jobs with no heartbeat for max_silent_seconds (the worker died mid-job). Returns the count."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'worker lost', finished_at = ? "
+                "WHERE status = 'running' AND COALESCE(heartbeat_at, started_at) < ?",
+                (datetime.now().isoformat(), self._stale_cutoff(max_silent_seconds)),
+            )
+            return cursor.rowcount
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            return self._to_dict(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+
+class SupabaseJobQueue:
+    """The same queue on the Supabase generation_jobs table, shared across hosts"""
+
+    def __init__(self, supabase_client, table="generation_jobs"):
+        self.client = supabase_client
+        self.table = table
+
+    @staticmethod
+    def _first(response):
+        return (response.data or [None])[0]
+
+    def enqueue(self, kind="generate_article", payload=None, dedupe=True):
+        """Add a job and return it (see JobQueue.enqueue)"""
+        job_id = uuid.uuid4().hex
+        job = self._first(self.client.rpc("enqueue_generation_job", {
+            "job_id": job_id,
+            "job_kind": kind,
+            "job_payload": payload,
+            "stale_seconds": JOB_STALE_SECONDS,
+            "dedupe": dedupe,
+        }).execute())
+        job["deduplicated"] = job["id"] != job_id
+        return job
+
+    def claim_next(self, worker_id, kind="generate_article"):
+        """Atomically move the oldest queued job to running and return it (or None)"""
+        return self._first(self.client.rpc("claim_generation_job", {
+            "job_kind": kind,
+            "worker_id": worker_id,
+        }).execute())
+
+    def _finish(self, job_id, status, result=None, error=None):
+        self.client.table(self.table).update({
+            "status": status,
+            # Round-trip through JSON so dates and other values are serializable
+            "result": json.loads(json.dumps(result, default=str)) if result is not None else None,
+            "error": error,
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+        }).eq("id", job_id).execute()
+
+    def complete(self, job_id, result=None):
+        self._finish(job_id, "succeeded", result=result)
+
+    def fail(self, job_id, error, result=None):
+        self._finish(job_id, "failed", result=result, error=error)
+
+    def heartbeat(self, job_id):
+        """Mark a running job as still alive"""
+        self.client.table(self.table).update({
+            "heartbeat_at": datetime.now(timezone.utc).isoformat(),
+        }).eq("id", job_id).eq("status", "running").execute()
+
+    def fail_stale(self, max_silent_seconds=JOB_STALE_SECONDS):
+        """Fail running jobs with no heartbeat for max_silent_seconds. Returns the count."""
+        now = datetime.now(timezone.utc)
+        # claim_generation_job sets heartbeat_at, so every running job has one
+        response = self.client.table(self.table).update({
+            "status": "failed",
+            "error": "worker lost",
+            "finished_at": now.isoformat(),
+        }).eq("status", "running").lt("heartbeat_at", (now - timedelta(seconds=max_silent_seconds)).isoformat()).execute()
+        return len(response.data or [])
+
+    def get(self, job_id):
+        return self._first(self.client.table(self.table).select("*").eq("id", job_id).limit(1).execute())
+
+
+def get_job_queue(supabase_client=None, backend=JOB_QUEUE_BACKEND):
+    """The queue for the configured backend (JOB_QUEUE_BACKEND)"""
+    if backend == "supabase":
+        if supabase_client is None:
+            raise ValueError("JOB_QUEUE_BACKEND=supabase needs a Supabase client")
+        return SupabaseJobQueue(supabase_client)
+    return JobQueue()
@@ -0,0 +1,130 @@
+"""
+Leader election for the article generation scheduler.
+
+Gunicorn runs several workers (and possibly several hosts), but only one of them
+should run the 30-minute generation cycle. Election happens in two layers:
+- a non-blocking file lock elects one process per host (released automatically
+  when the process exits, so a recycled worker hands leadership over)
+- optionally, a lease row in Supabase elects one host across the deployment.
+  The lease is taken and renewed through the acquire_scheduler_lease()
+  function in supabase_schema.sql and expires if the leader stops renewing it.
+
+Processes that lose the election never generate and keep serving requests.
+"""
+import fcntl
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime
+
+LOCK_FILE = os.getenv("SCHEDULER_LOCK_FILE", "/tmp/flash_news_scheduler.lock")
+# "file" (one leader per host), "supabase" (one leader across hosts) or "none"
+LOCK_BACKEND = os.getenv("SCHEDULER_LOCK_BACKEND", "file").lower()
+LEASE_NAME = os.getenv("SCHEDULER_LEASE_NAME", "article_scheduler")
+LEASE_TTL_SECONDS = int(os.getenv("SCHEDULER_LEASE_TTL_SECONDS", "180"))
+
+
+class LeaderLock:
+    """Holds (or waits for) scheduler leadership for this process"""
+
+    def __init__(self, supabase_client=None, backend=LOCK_BACKEND, lock_file=LOCK_FILE,
+                 lease_name=LEASE_NAME, lease_ttl=LEASE_TTL_SECONDS):
+        self.supabase_client = supabase_client
+        self.backend = backend
+        self.lock_file = lock_file
+        self.lease_name = lease_name
+        self.lease_ttl = lease_ttl
+        self.holder_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock_fd = None
+        self._has_lease = False
+        self._heartbeat = None
+        self._stop = threading.Event()
+
+    @property
+    def is_leader(self):
+        if self.backend == "none":
+            return True
+        if self._lock_fd is None:
+            return False
+        return self.backend != "supabase" or self._has_lease
+
+    def try_acquire(self):
+        """Try to become leader without blocking. Returns True if this process leads."""
+        if self.backend == "none":
+            return True
+        if self._lock_fd is None and not self._acquire_file_lock():
+            return False
+        if self.backend == "supabase":
+            self._has_lease = self._renew_lease()
+            if not self._has_lease:
+                return False
+            self._start_heartbeat()
+        return True
+
+    def wait_for_leadership(self, poll_seconds=None):
+        """Block until this process becomes leader, retrying every poll_seconds"""
+        if poll_seconds is None:
+            poll_seconds = max(5, self.lease_ttl // 3)
+        while not self.try_acquire():
+            time.sleep(poll_seconds)
+
+    def release(self):
+        self._stop.set()
+        if self._has_lease and self.supabase_client is not None:
+            try:
+                self.supabase_client.rpc("release_scheduler_lease", {
+                    "lease_name": self.lease_name,
+                    "lease_holder": self.holder_id,
+                }).execute()
+            except Exception as e:
+                print(f"[{datetime.now()}] ⚠️  Could not release scheduler lease: {e}")
+        self._has_lease = False
+        if self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def _acquire_file_lock(self):
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, self.holder_id.encode("utf-8"))
+        self._lock_fd = fd
+        return True
+
+    def _renew_lease(self):
+        """Take or extend the Supabase lease. Returns True if we hold it."""
+        if self.supabase_client is None:
+            print(f"[{datetime.now()}] ⚠️  Supabase lease backend selected but no client available")
+            return False
+        try:
+            response = self.supabase_client.rpc("acquire_scheduler_lease", {
+                "lease_name": self.lease_name,
+                "lease_holder": self.holder_id,
+                "ttl_seconds": self.lease_ttl,
+            }).execute()
+        except Exception as e:
+            print(f"[{datetime.now()}] ⚠️  Scheduler lease check failed: {e}")
+            return False
+        return bool(response.data)
+
+    def _start_heartbeat(self):
+        if self._heartbeat is not None and self._heartbeat.is_alive():
+            return
+
+        def heartbeat():
+            interval = max(1, self.lease_ttl // 3)
+            while not self._stop.wait(interval):
+                held = self._renew_lease()
+                if self._has_lease and not held:
+                    print(f"[{datetime.now()}] ⚠️  Lost scheduler lease {self.lease_name}")
+                self._has_lease = held
+
+        self._heartbeat = threading.Thread(target=heartbeat, daemon=True, name="scheduler-lease")
+        self._heartbeat.start()
@@ -0,0 +1,230 @@
+"""
+On-disk cache of LLM responses, keyed by a fingerprint of the request.
+
+A retried generation (after a timeout or 429) or a manual generation shortly
+after the scheduler ran sends many identical prompts: same model, same
+parameters, same fetched data. Responses are stored in SQLite under
+sha256(model, sampling parameters, tools, response model, callbacks,
+messages), so a replay only pays for the calls whose prompt actually changed.
+
+Entries expire after LLM_CACHE_TTL_SECONDS, which defaults to half the
+scheduler interval: a retry or a manual run shortly after a scheduled one
+hits, but the next scheduled run does not. The cache is bounded by
+LLM_CACHE_MAX_ENTRIES and LLM_CACHE_MAX_BYTES, evicting least recently used
+entries first.
+
+The writer stage records the keys of its calls (recording). If its draft is
+rejected (no article content) they are invalidated, since the redo would
+otherwise send the same prompt and get the same bad response back. Once the
+draft is published they are invalidated too, so a later run with the same
+inputs cannot replay an article that was already saved.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from threading import Lock, local
+
+import run_metrics
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "llm_cache.sqlite3"),
+)
+# Keep below SCHEDULER_INTERVAL_SECONDS (1800) so scheduled runs never replay the previous one
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "900"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# LLM attributes that change the response
+SAMPLING_PARAMS = (
+    "temperature", "max_tokens", "top_p", "frequency_penalty", "presence_penalty", "stop", "seed",
+    "response_format",
+)
+
+
+def _schema(response_model):
+    """Stable description of a structured-output model (its JSON schema for pydantic models)"""
+    if response_model is None:
+        return None
+    if hasattr(response_model, "model_json_schema"):
+        return response_model.model_json_schema()
+    return f"{getattr(response_model, '__module__', '')}.{getattr(response_model, '__qualname__', repr(response_model))}"
+
+
+def fingerprint(model, params, messages, tools=None, response_model=None, callbacks=None):
+    """Content address of one LLM request"""
+    payload = json.dumps(
+        {
+            "model": model,
+            "params": params,
+            "tools": tools,
+            "response_model": _schema(response_model),
+            # Callback types, not instances: a new handler per run must still hit
+            "callbacks": [f"{type(cb).__module__}.{type(cb).__qualname__}" for cb in callbacks or ()],
+            "messages": messages,
+        },
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """SQLite response store with TTL expiry and LRU eviction"""
+
+    def __init__(self, path=LLM_CACHE_PATH, ttl=LLM_CACHE_TTL_SECONDS,
+                 max_entries=LLM_CACHE_MAX_ENTRIES, max_bytes=LLM_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        """Cached response for key, or None if missing or expired"""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response FROM responses WHERE key = ? AND created_at > ?", (key, now - self.ttl)
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return row[0] if row else None
+
+    def put(self, key, model, response):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, len(response.encode("utf-8")), now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        """Drop expired entries, then least recently used ones until both bounds hold"""
+        conn.execute("DELETE FROM responses WHERE created_at <= ?", (now - self.ttl,))
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        removed = 0
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+            removed += 1
+        if removed:
+            print(f"[{datetime.now()}] 🧹 LLM cache evicted {removed} least recently used response(s)")
+
+    def invalidate(self, keys):
+        """Drop the responses stored under keys; returns how many were removed"""
+        keys = list(keys)
+        if not keys:
+            return 0
+        with self._connect() as conn:
+            removed = conn.execute(
+                f"DELETE FROM responses WHERE key IN ({','.join('?' * len(keys))})", keys
+            ).rowcount
+        if removed:
+            print(f"[{datetime.now()}] 🧹 LLM cache invalidated {removed} response(s)")
+        return removed
+
+    def stats(self):
+        with self._connect() as conn:
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": count,
+                "bytes": total,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+_cache = None
+_recording = local()
+
+
+def active_cache():
+    """The cache in front of the LLM in this process (None until the model layer loads, or when disabled)"""
+    return _cache
+
+
+@contextmanager
+def recording():
+    """Collect the cache keys of the llm.call()s made on this thread inside the block"""
+    keys = []
+    _recording.keys = keys
+    try:
+        yield keys
+    finally:
+        _recording.keys = None
+
+
+def cache_llm(llm, model, cache=None):
+    """Serve repeated llm.call() requests from an LLMCache; returns the cache (None when disabled)"""
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    cache = _cache = cache or LLMCache()
+    original_call = llm.call
+    params = {name: getattr(llm, name, None) for name in SAMPLING_PARAMS}
+
+    def call(messages, *args, **kwargs):
+        # Native function calling runs the tools inside the call: never replay it
+        if kwargs.get("available_functions"):
+            return original_call(messages, *args, **kwargs)
+        tools = args[0] if args else kwargs.get("tools")
+        callbacks = args[1] if len(args) > 1 else kwargs.get("callbacks")
+        key = fingerprint(model, params, messages, tools, kwargs.get("response_model"), callbacks)
+        recorded = getattr(_recording, "keys", None)
+        if recorded is not None:
+            recorded.append(key)
+        cached = cache.get(key)
+        if cached is not None:
+            run = run_metrics.current_run()
+            if run is not None:
+                run.record_cache_hit()
+            return cached
+        response = original_call(messages, *args, **kwargs)
+        if isinstance(response, str) and response.strip():
+            cache.put(key, model, response)
+        return response
+
+    object.__setattr__(llm, "call", call)
+    return cache
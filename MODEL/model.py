@@ -1,13 +1,31 @@
 import os
-import requests
 import json
-import feedparser
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 from datetime import datetime
 from crewai import Agent, Task, Crew, LLM
 from crewai.tools import BaseTool
-from typing import Type
+from typing import List
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
+from candidates import build_candidate_digest
+from article_parser import ArticleOutput, parse_writer_output
+from normalized_article import (
+    from_bbc, from_gdelt, from_google_news, from_newsapi, from_newsdata, from_reddit,
+)
+from news_sources import (
+    aggregate_all_news, fetch_bbc_rss, fetch_gdelt, fetch_google_news_rss, fetch_newsapi,
+    fetch_newsdata, fetch_reddit_news,
+)
+import checkpoints
+import ingest
+import ingest_store
+import llm_cache
+import rate_limiter
+import run_metrics
+import source_cache
 
 load_dotenv()
 
@@ -31,302 +49,87 @@ shared_llm = LLM(
     frequency_penalty=0.1,
     presence_penalty=0.1,
 )
-
-# News API functions
-def fetch_newsapi():
-    """Fetch news from NewsAPI"""
-    try:
-        url = "https://newsapi.org/v2/top-headlines?country=in&apiKey=2af46c8507fe47e18b7b2fcd5ef74dce"
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            return data.get('articles', [])
-    except Exception as e:
-        print(f"NewsAPI error: {e}")
-    return []
-
-def fetch_newsdata():
-    """Fetch news from NewsData.io"""
-    try:
-        url = "https://newsdata.io/api/1/news?apikey=pub_c894654a54c547af95e9f015b256dd28&q=technology"
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            return data.get('results', [])
-    except Exception as e:
-        print(f"NewsData.io error: {e}")
-    return []
-
-def fetch_gdelt(query="world"):
-    """Fetch news from GDELT"""
-    try:
-        url = f"https://api.gdeltproject.org/api/v2/doc/doc?query={query}&mode=ArtList&format=json&maxrecords=50"
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            return data.get('articles', [])
-    except Exception as e:
-        print(f"GDELT error: {e}")
-    return []
-
-def fetch_rss_feed(url):
-    """Fetch news from RSS feed"""
-    try:
-        feed = feedparser.parse(url)
-        articles = []
-        for entry in feed.entries[:20]:  # Limit to 20 entries
-            # Extract image from media:content or enclosure
-            image_url = ''
-            if hasattr(entry, 'media_content'):
-                for media in entry.media_content:
-                    if media.get('type', '').startswith('image/'):
-                        image_url = media.get('url', '')
-                        break
-            if not image_url and hasattr(entry, 'enclosures'):
-                for enclosure in entry.enclosures:
-                    if enclosure.get('type', '').startswith('image/'):
-                        image_url = enclosure.get('href', '')
-                        break
-            # Also check for media:thumbnail
-            if not image_url and hasattr(entry, 'media_thumbnail'):
-                for thumb in entry.media_thumbnail:
-                    image_url = thumb.get('url', '')
-                    break
-            
-            articles.append({
-                'title': entry.get('title', ''),
-                'description': entry.get('description', ''),
-                'link': entry.get('link', ''),
-                'published': entry.get('published', ''),
-                'source': feed.feed.get('title', 'RSS Feed'),
-                'image_url': image_url
-            })
-        return articles
-    except Exception as e:
-        print(f"RSS feed error ({url}): {e}")
-    return []
-
-def fetch_google_news_rss():
-    """Fetch from Google News RSS"""
-    return fetch_rss_feed("https://news.google.com/rss")
-
-def fetch_bbc_rss():
-    """Fetch from BBC RSS"""
-    return fetch_rss_feed("https://feeds.bbci.co.uk/news/rss.xml")
-
-def fetch_reddit_news():
-    """Fetch top posts from Reddit news subreddits"""
-    try:
-        subreddits = ['news', 'worldnews', 'technology']
-        articles = []
-        for subreddit in subreddits:
-            url = f"https://www.reddit.com/r/{subreddit}/hot.json?limit=10"
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(url, headers=headers, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                for post in data.get('data', {}).get('children', []):
-                    post_data = post.get('data', {})
-                    # Extract image URL from Reddit post
-                    image_url = ''
-                    # Check preview images
-                    if 'preview' in post_data and 'images' in post_data['preview']:
-                        if post_data['preview']['images']:
-                            image_url = post_data['preview']['images'][0].get('source', {}).get('url', '')
-                            # Reddit URLs are escaped, unescape them
-                            if image_url:
-                                image_url = image_url.replace('&amp;', '&')
-                    # Check thumbnail
-                    if not image_url:
-                        thumbnail = post_data.get('thumbnail', '')
-                        if thumbnail and thumbnail not in ['self', 'default', 'nsfw']:
-                            image_url = thumbnail
-                    # Check URL if it's a direct image link
-                    url_link = post_data.get('url', '')
-                    if not image_url and url_link:
-                        if any(ext in url_link.lower() for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp']):
-                            image_url = url_link
-                    
-                    articles.append({
-                        'title': post_data.get('title', ''),
-                        'description': post_data.get('selftext', ''),
-                        'link': f"https://reddit.com{post_data.get('permalink', '')}",
-                        'published': datetime.fromtimestamp(post_data.get('created_utc', 0)).isoformat(),
-                        'source': f"Reddit r/{subreddit}",
-                        'score': post_data.get('score', 0),
-                        'image_url': image_url
-                    })
-    except Exception as e:
-        print(f"Reddit error: {e}")
-    return articles
-
-def aggregate_all_news():
-    """Fetch from all news sources and aggregate"""
-    all_articles = []
-    
-    # Fetch from APIs
-    newsapi_articles = fetch_newsapi()
-    newsdata_articles = fetch_newsdata()
-    gdelt_articles = fetch_gdelt("world")
-    google_news = fetch_google_news_rss()
-    bbc_news = fetch_bbc_rss()
-    reddit_news = fetch_reddit_news()
-    
-    # Normalize and add source info
-    for article in newsapi_articles:
-        article['source_name'] = article.get('source', {}).get('name', 'NewsAPI')
-        article['image_url'] = article.get('urlToImage', '')
-        all_articles.append(article)
-    
-    for article in newsdata_articles:
-        article['source_name'] = article.get('source_id', 'NewsData.io')
-        article['image_url'] = article.get('image_url', '')
-        all_articles.append(article)
-    
-    for article in gdelt_articles:
-        article['source_name'] = article.get('source', 'GDELT')
-        article['image_url'] = article.get('image', '')
-        all_articles.append(article)
-    
-    for article in google_news:
-        article['source_name'] = 'Google News'
-        if 'image_url' not in article:
-            article['image_url'] = ''
-        all_articles.append(article)
-    
-    for article in bbc_news:
-        article['source_name'] = 'BBC'
-        if 'image_url' not in article:
-            article['image_url'] = ''
-        all_articles.append(article)
-    
-    for article in reddit_news:
-        article['source_name'] = article.get('source', 'Reddit')
-        if 'image_url' not in article:
-            article['image_url'] = ''
-        all_articles.append(article)
-    
-    return all_articles
+# Token and latency accounting per generation run (run_metrics.py), behind a
+# client-side RPM/TPM limiter so calls are spaced out instead of hitting 429s
+run_metrics.instrument_llm(shared_llm)
+gemini_limiter = rate_limiter.limit_llm(shared_llm, gemini_model)
+# Replayed prompts (retries, back-to-back generations) are answered from disk
+# without touching the quota
+gemini_cache = llm_cache.cache_llm(shared_llm, gemini_model)
 
 # Create CrewAI tools using BaseTool
+# Tools hand the agent a compact, deduplicated and pre-ranked candidate list
+# (see candidates.py) rather than raw JSON dumps of every fetched article.
+PER_SOURCE_TOKEN_BUDGET = int(os.getenv("PER_SOURCE_TOKEN_BUDGET", "2500"))
+
 class FetchAllNewsSourcesTool(BaseTool):
     name: str = "fetch_all_news_sources"
-    description: str = "Fetch real-time news from all available sources: NewsAPI, NewsData.io, GDELT, Google News RSS, BBC RSS, and Reddit. Returns aggregated news articles with full content and image URLs. IMPORTANT: Extract and include image_url field from each article."
+    description: str = "Fetch real-time news from all available sources: NewsAPI, NewsData.io, GDELT, Google News RSS, BBC RSS, and Reddit. Returns deduplicated event candidates (one JSON object per line), pre-ranked by cross-source coverage and recency, each with its sources, URLs and image_urls. Call this first. IMPORTANT: Carry the image_urls of the events you select into your output."
     
     def _run(self) -> str:
-        result = aggregate_all_news()
-        # Ensure image URLs are prominently included in the output
-        formatted_result = []
-        for article in result:
-            formatted_article = {
-                "title": article.get('title', ''),
-                "description": article.get('description', ''),
-                "content": article.get('content', ''),
-                "url": article.get('url', ''),
-                "image_url": article.get('image_url', '') or article.get('urlToImage', '') or article.get('image', ''),
-                "source_name": article.get('source_name', ''),
-                "published": article.get('published', '') or article.get('publishedAt', ''),
-            }
-            formatted_result.append(formatted_article)
-        return json.dumps(formatted_result, indent=2, default=str)
+        # A resumed run reuses the candidates it fetched before (so prompts, and cached responses, match)
+        checkpoint = checkpoints.active()
+        digest = checkpoint.get("candidates") if checkpoint else None
+        if digest is None:
+            # What the ingestion loop collected since the last article; a live fetch if it isn't running
+            articles, read_at = ingest.fresh_items()
+            if articles is None:
+                articles = aggregate_all_news()
+            digest = build_candidate_digest(articles)
+            if checkpoint:
+                checkpoint.save("candidates", digest)
+                if read_at:
+                    checkpoint.save("ingest_read_at", read_at)
+        return digest
+
+class SearchIngestedNewsTool(BaseTool):
+    name: str = "search_ingested_news"
+    description: str = "Search recently collected news items from every source by keywords (no network call). Returns compact candidates with sources, URLs and image_urls. Call with: search_ingested_news(query='your keywords')"
+    
+    def _run(self, query: str) -> str:
+        result = ingest_store.get_store().search(query, limit=30, since=time.time() - ingest.INGEST_LOOKBACK_SECONDS)
+        return build_candidate_digest(result, token_budget=PER_SOURCE_TOKEN_BUDGET)
 
 class FetchNewsAPITool(BaseTool):
     name: str = "fetch_newsapi_articles"
-    description: str = "Fetch top headlines from NewsAPI for India. Returns articles with image URLs in urlToImage field."
+    description: str = "Fetch top headlines from NewsAPI for India. Returns compact candidates with image_urls."
     
     def _run(self) -> str:
-        result = fetch_newsapi()
-        # Format to highlight image URLs
-        formatted = []
-        for article in result:
-            formatted.append({
-                "title": article.get('title', ''),
-                "description": article.get('description', ''),
-                "url": article.get('url', ''),
-                "image_url": article.get('urlToImage', ''),
-                "source": article.get('source', {}).get('name', ''),
-                "publishedAt": article.get('publishedAt', '')
-            })
-        return json.dumps(formatted, indent=2, default=str)
+        result = [from_newsapi(a) for a in fetch_newsapi()]
+        return build_candidate_digest(result, token_budget=PER_SOURCE_TOKEN_BUDGET)
 
 class FetchNewsDataTool(BaseTool):
     name: str = "fetch_newsdata_articles"
-    description: str = "Fetch technology news from NewsData.io. Returns articles with image URLs in image_url field."
+    description: str = "Fetch technology news from NewsData.io. Returns compact candidates with image_urls."
     
     def _run(self) -> str:
-        result = fetch_newsdata()
-        # Format to highlight image URLs
-        formatted = []
-        for article in result:
-            formatted.append({
-                "title": article.get('title', ''),
-                "description": article.get('description', ''),
-                "url": article.get('link', ''),
-                "image_url": article.get('image_url', ''),
-                "source": article.get('source_id', ''),
-                "pubDate": article.get('pubDate', '')
-            })
-        return json.dumps(formatted, indent=2, default=str)
+        result = [from_newsdata(a) for a in fetch_newsdata()]
+        return build_candidate_digest(result, token_budget=PER_SOURCE_TOKEN_BUDGET)
 
 class FetchGDELTTool(BaseTool):
     name: str = "fetch_gdelt_articles"
-    description: str = "Fetch global events from GDELT API. Provide a query term to search for specific topics. Returns articles with image URLs in image field. Call with: fetch_gdelt_articles(query='your_search_term')"
+    description: str = "Fetch global events from GDELT API. Provide a query term to search for specific topics. Returns compact candidates with image_urls. Call with: fetch_gdelt_articles(query='your_search_term')"
     
     def _run(self, query: str = "world") -> str:
-        result = fetch_gdelt(query)
-        # Format to highlight image URLs
-        formatted = []
-        for article in result:
-            formatted.append({
-                "title": article.get('title', ''),
-                "url": article.get('url', ''),
-                "image_url": article.get('image', ''),
-                "source": article.get('source', ''),
-                "published": article.get('seendate', '')
-            })
-        return json.dumps(formatted, indent=2, default=str)
+        result = [from_gdelt(a) for a in fetch_gdelt(query)]
+        return build_candidate_digest(result, token_budget=PER_SOURCE_TOKEN_BUDGET)
 
 class FetchRSSFeedsTool(BaseTool):
     name: str = "fetch_rss_feeds"
-    description: str = "Fetch news from Google News RSS and BBC RSS feeds. Returns articles with image URLs extracted from media content."
+    description: str = "Fetch news from Google News RSS and BBC RSS feeds. Returns compact candidates with image_urls extracted from media content."
     
     def _run(self) -> str:
-        google = fetch_google_news_rss()
-        bbc = fetch_bbc_rss()
-        # Format to highlight image URLs
-        formatted_google = [{
-            "title": a.get('title', ''),
-            "description": a.get('description', ''),
-            "url": a.get('link', ''),
-            "image_url": a.get('image_url', ''),
-            "published": a.get('published', '')
-        } for a in google]
-        formatted_bbc = [{
-            "title": a.get('title', ''),
-            "description": a.get('description', ''),
-            "url": a.get('link', ''),
-            "image_url": a.get('image_url', ''),
-            "published": a.get('published', '')
-        } for a in bbc]
-        result = {"google_news": formatted_google, "bbc_news": formatted_bbc}
-        return json.dumps(result, indent=2, default=str)
+        result = [from_google_news(a) for a in fetch_google_news_rss()]
+        result.extend(from_bbc(a) for a in fetch_bbc_rss())
+        return build_candidate_digest(result, token_budget=PER_SOURCE_TOKEN_BUDGET)
 
 class FetchRedditNewsTool(BaseTool):
     name: str = "fetch_reddit_news"
-    description: str = "Fetch top posts from Reddit subreddits: r/news, r/worldnews, r/technology. Returns posts with image URLs from previews or direct image links."
+    description: str = "Fetch top posts from Reddit subreddits: r/news, r/worldnews, r/technology. Returns compact candidates with image_urls from previews or direct image links."
     
     def _run(self) -> str:
-        result = fetch_reddit_news()
-        # Format to highlight image URLs
-        formatted = [{
-            "title": a.get('title', ''),
-            "description": a.get('description', ''),
-            "url": a.get('link', ''),
-            "image_url": a.get('image_url', ''),
-            "source": a.get('source', ''),
-            "score": a.get('score', 0)
-        } for a in result]
-        return json.dumps(formatted, indent=2, default=str)
+        result = [from_reddit(a) for a in fetch_reddit_news()]
+        return build_candidate_digest(result, token_budget=PER_SOURCE_TOKEN_BUDGET)
 
 # Instantiate tools
 fetch_all_news_sources_tool = FetchAllNewsSourcesTool()
@@ -335,6 +138,10 @@ fetch_newsdata_tool = FetchNewsDataTool()
 fetch_gdelt_tool = FetchGDELTTool()
 fetch_rss_feeds_tool = FetchRSSFeedsTool()
 fetch_reddit_news_tool = FetchRedditNewsTool()
+search_ingested_news_tool = SearchIngestedNewsTool()
+for _tool in (fetch_all_news_sources_tool, fetch_newsapi_tool, fetch_newsdata_tool,
+              fetch_gdelt_tool, fetch_rss_feeds_tool, fetch_reddit_news_tool, search_ingested_news_tool):
+    run_metrics.instrument_tool(_tool)
 
 # Define three agents with distinct responsibilities
 news_researcher = Agent(
@@ -378,7 +185,11 @@ research_task = Task(
     - fetch_rss_feeds_tool: Google News and BBC RSS feeds
     - fetch_reddit_news_tool: Reddit news from r/news, r/worldnews, r/technology
     
-    After collecting all news articles from these sources, rate each event according to:
+    Start with fetch_all_news_sources_tool: it returns deduplicated event candidates, already
+    clustered across sources and pre-ranked. Only call the per-source tools when you need more
+    detail on a specific source.
+    
+    After reviewing the candidate events, rate each event according to:
     1. Global importance (scale 1-10)
     2. Impact level (scale 1-10)
     3. Timeliness/relevance
@@ -465,33 +276,48 @@ validate_task = Task(
     agent=fact_checker
 )
 
-write_task = Task(
-    description="""
+# Structured-output mode: the copywriter returns an ArticleOutput, so parsing is
+# schema validation (article_parser.parse_writer_output falls back to the text parser)
+STRUCTURED_OUTPUT_ENABLED = os.getenv("STRUCTURED_OUTPUT_ENABLED", "true").lower() == "true"
+
+WRITE_TASK_BRIEF = """
     Using the verified event information from the fact-checker, create a comprehensive Flash News article.
     
-    CRITICAL: The article MUST start with a clear, engaging headline/title on the FIRST LINE.
     The title should:
     - Be 10-100 characters long
     - Capture the essence of the top 5 global events being covered
     - Be informative, attention-grabbing, and newsworthy
     - NOT end with a period, exclamation mark, or question mark
-    - Be on its own line at the very beginning, before any article content
     
     The article should:
-    1. Start with an engaging headline/title on the first line
-    2. Be written in a lively, energetic tone
-    3. Cover all verified events in a cohesive narrative
-    4. Be well-structured with clear paragraphs
-    5. Include relevant details and context
-    6. Be comprehensive (500-1500 words)
+    1. Be written in a lively, energetic tone
+    2. Cover all verified events in a cohesive narrative
+    3. Be well-structured with clear paragraphs
+    4. Include relevant details and context
+    5. Be comprehensive (500-1500 words)
     
     CRITICAL REQUIREMENT - IMAGES:
-    You MUST include at least ONE image URL in the Images section. 
+    You MUST include at least ONE image URL.
     - Extract image URLs from the news sources provided by the researcher
     - Include at least 1-3 relevant images from the original news articles
     - Images should be from credible news sources (BBC, Reuters, CNN, etc.)
     - DO NOT create fake or placeholder image URLs
     - If you cannot find images, use image URLs from the source articles provided
+"""
+
+WRITE_TASK_STRUCTURED_FORMAT = """
+    OUTPUT FORMAT:
+    Return the article as structured data with these fields:
+    - title: the headline only
+    - content: the article body as plain-text paragraphs separated by blank lines
+      (no headline, no image list, no source list inside it)
+    - image_urls: 1-3 image URLs from the source articles (at least one)
+    - sources: the sources used, each with a name (e.g. "BBC News") and a url
+"""
+
+WRITE_TASK_TEXT_FORMAT = """
+    CRITICAL: The article MUST start with the headline/title on the FIRST LINE,
+    on its own line before any article content.
     
     CRITICAL FORMATTING REQUIREMENT:
     Format the article as follows:
@@ -521,8 +347,18 @@ write_task = Task(
     
     Sources:
     Source: BBC News - https://www.bbc.com/news/article1
-    """,
-    expected_output="""
+"""
+
+if STRUCTURED_OUTPUT_ENABLED:
+    write_task_output = """
+    A Flash News article as structured data:
+    - title: clear, engaging headline (10-100 characters, no ending punctuation)
+    - content: comprehensive, lively article body (500-1500 words) in clear paragraphs
+    - image_urls: AT LEAST ONE image URL from the news sources (REQUIRED)
+    - sources: source names and URLs
+    """
+else:
+    write_task_output = """
     A well-formatted Flash News article with:
     - Clear, engaging headline/title on the FIRST LINE (10-100 characters, no ending punctuation)
     - Comprehensive article content (500-1500 words)
@@ -531,56 +367,295 @@ write_task = Task(
     - Images section with AT LEAST ONE image URL from news sources (REQUIRED - must include at least 1 image)
     - Sources section at the bottom with source names and URLs
     Format: Title on first line, then content, then "Image: [URL]" for images (minimum 1 image required) and "Source: [Name] - [URL]" for sources
-    """,
+    """
+
+write_task = Task(
+    description=WRITE_TASK_BRIEF + (WRITE_TASK_STRUCTURED_FORMAT if STRUCTURED_OUTPUT_ENABLED else WRITE_TASK_TEXT_FORMAT),
+    expected_output=write_task_output,
+    output_pydantic=ArticleOutput if STRUCTURED_OUTPUT_ENABLED else None,
     agent=copywriter,
     async_execution=False  # ensure it runs after validation completes
 )
 
 # Assemble the crew and execute
+TASK_NAMES = ["research", "validate", "write"]  # labels for run_metrics, in task order
 crew = Crew(
     agents=[news_researcher, fact_checker, copywriter],
     tasks=[research_task, validate_task, write_task],
+    task_callback=run_metrics.task_completed,
 )
 
+# Parallel per-event research: the researcher only selects the top events, then
+# each event is researched and fact-checked by its own small crew, several at
+# once, and the copywriter gets the merged reports. The serial crew above is
+# the fallback (and the whole pipeline with PARALLEL_RESEARCH_ENABLED=false).
+PARALLEL_RESEARCH_ENABLED = os.getenv("PARALLEL_RESEARCH_ENABLED", "true").lower() == "true"
+PARALLEL_RESEARCH_MAX_WORKERS = int(os.getenv("PARALLEL_RESEARCH_MAX_WORKERS", "5"))
+TOP_EVENTS = 5
+
+class SelectedEvent(BaseModel):
+    title: str = Field(..., description="Event title")
+    importance_rating: int = Field(..., description="Global importance, 1-10")
+    impact_rating: int = Field(..., description="Impact level, 1-10")
+    summary: str = Field(..., description="What happened, from the candidate data")
+    search_query: str = Field(..., description="Short GDELT search query for more coverage of this event")
+    source_urls: List[str] = Field(default_factory=list, description="Source article URLs")
+    image_urls: List[str] = Field(default_factory=list, description="Original image URLs from the candidate")
+    source_names: List[str] = Field(default_factory=list, description="Outlets covering the event")
+
+class EventSelection(BaseModel):
+    events: List[SelectedEvent] = Field(..., description="The top events, most important first")
+
+select_task = Task(
+    description=f"""
+    Call fetch_all_news_sources first: it returns deduplicated event candidates, already
+    clustered across sources and pre-ranked. Only call the per-source tools when you need more
+    detail on a specific source.
+    
+    Rate each candidate event by:
+    1. Global importance (scale 1-10)
+    2. Impact level (scale 1-10)
+    3. Timeliness/relevance
+    
+    Select the top {TOP_EVENTS} events by combined importance and impact. For each, keep its
+    source URLs, source names and image URLs exactly as given in the candidate data (never
+    invent URLs), summarize what happened, and write a short search query that would find
+    more coverage of the event. Each event will be researched and fact-checked separately.
+    """,
+    expected_output=f"The top {TOP_EVENTS} events with ratings, summary, search query, source URLs, source names and image URLs",
+    output_pydantic=EventSelection,
+    agent=news_researcher,
+)
+
+selection_crew = Crew(
+    agents=[news_researcher],
+    tasks=[select_task],
+    task_callback=run_metrics.task_completed,
+)
+
+EVENT_SEARCH_HINT = (
+    "Use search_ingested_news and fetch_gdelt_articles with the search query (or a refined one) to find more coverage."
+    if ingest.INGEST_ENABLED else
+    "Use fetch_gdelt_articles with the search query (or a refined one) to find more coverage."
+)
+
+def _event_crew(event):
+    """A research + fact-check crew for one selected event (fresh agents: crews run concurrently)"""
+    researcher = Agent(
+        role="Event Research Analyst",
+        goal="Research one global news event thoroughly using trusted international news sources, with original images only",
+        backstory="You are a precise news analyst who compiles complete, well-sourced reports on a single story.",
+        llm=shared_llm,
+        tools=[search_ingested_news_tool, fetch_gdelt_tool] if ingest.INGEST_ENABLED else [fetch_gdelt_tool],
+    )
+    checker = Agent(
+        role=fact_checker.role,
+        goal=fact_checker.goal,
+        backstory=fact_checker.backstory,
+        llm=shared_llm,
+    )
+    research = Task(
+        description=f"""
+        Research this event in depth:
+        {event.model_dump_json(indent=2)}
+        
+        {EVENT_SEARCH_HINT}
+        Collect the complete details: what happened, context, key figures, publication dates,
+        source names and URLs (several sources where possible) and original image URLs from the
+        news sources (at least one; never AI-generated or invented). Do not summarize away details.
+        """,
+        expected_output="""
+        A JSON object: {"title", "full_content", "description", "source_urls", "image_urls",
+        "publication_dates", "source_names", "importance_rating", "impact_rating"}
+        """,
+        agent=researcher,
+    )
+    verify = Task(
+        description="""
+        Fact-check the research report for this event:
+        - Verify claims against the listed sources and cross-reference outlets
+        - Check for consistency and identify discrepancies or uncertainties
+        - Verify image authenticity (original news images, not AI-generated)
+        - Validate publication dates and source credibility
+        """,
+        expected_output="""
+        A JSON object: {"event_title", "status": "VERIFIED" | "FLAGGED" | "PARTIALLY_VERIFIED",
+        "confidence_score": 0-100, "source_agreement", "discrepancies", "image_verification",
+        "notes", "recommended_action": "proceed" | "review" | "exclude"}
+        """,
+        agent=checker,
+        context=[research],
+    )
+    return Crew(agents=[researcher, checker], tasks=[research, verify], task_callback=run_metrics.task_completed)
+
+def _record_usage(output):
+    run = run_metrics.current_run()
+    if run is not None:
+        run.record_crew_usage(getattr(output, "token_usage", None))
+
+_JSON_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+
+def _selected_events(output):
+    """EventSelection from the selection crew's output (pydantic, or JSON text)"""
+    selection = getattr(output, "pydantic", None)
+    if not isinstance(selection, EventSelection):
+        selection = EventSelection.model_validate_json(_JSON_FENCE_RE.sub("", str(getattr(output, "raw", output))))
+    return selection.events[:TOP_EVENTS]
+
+def _research_event(index, event, checkpoint=None):
+    run_metrics.expect_tasks([f"research_event_{index}", f"verify_event_{index}"])
+    output = _event_crew(event).kickoff()
+    _record_usage(output)
+    research, verification = (task.raw for task in output.tasks_output[:2])
+    report = {"event": event.title, "research": research, "verification": verification}
+    if checkpoint:
+        checkpoint.save(f"event_{index}", report)
+    return report
+
+def research_events_parallel(events, checkpoint=None):
+    """
+    Research and fact-check events concurrently; returns the reports of those
+    that succeeded, in order. Events with a checkpointed report are not redone.
+    """
+    reports = {}
+    pending = []
+    for i, event in enumerate(events, 1):
+        saved = checkpoint.get(f"event_{i}") if checkpoint else None
+        if saved is not None:
+            reports[i] = saved
+        else:
+            pending.append((i, event))
+    if pending:
+        workers = gemini_limiter.max_concurrency(PARALLEL_RESEARCH_MAX_WORKERS)
+        with ThreadPoolExecutor(max_workers=min(workers, len(pending)), thread_name_prefix="event-research") as executor:
+            futures = [(i, event, executor.submit(_research_event, i, event, checkpoint)) for i, event in pending]
+            for i, event, future in futures:
+                try:
+                    reports[i] = future.result()
+                except Exception as e:
+                    if rate_limiter.is_rate_limit_error(e):
+                        raise
+                    print(f"[{datetime.now()}] ⚠️  Research failed for '{event.title[:60]}': {e}")
+    return [reports[i] for i in sorted(reports)]
+
+def _write_task_for(reports):
+    """The copywriter task with the merged per-event reports in its description"""
+    return Task(
+        description=WRITE_TASK_BRIEF
+        + "\n    VERIFIED EVENT REPORTS (research and fact-check, one per event):\n"
+        + json.dumps(reports, indent=2, ensure_ascii=False)
+        + "\n"
+        + (WRITE_TASK_STRUCTURED_FORMAT if STRUCTURED_OUTPUT_ENABLED else WRITE_TASK_TEXT_FORMAT),
+        expected_output=write_task_output,
+        output_pydantic=ArticleOutput if STRUCTURED_OUTPUT_ENABLED else None,
+        agent=copywriter,
+    )
+
+def _forget_responses(cache_keys):
+    if gemini_cache is not None and cache_keys:
+        gemini_cache.invalidate(cache_keys)
+
+def _save_draft(checkpoint, output, cache_keys=()):
+    if not checkpoint:
+        # Nothing resumes from this draft, so no later run may replay the writer
+        _forget_responses(list(cache_keys))
+        return
+    structured = getattr(output, "pydantic", None)
+    checkpoint.save("draft", {
+        "raw": getattr(output, "raw", None) or str(output),
+        "structured": structured.model_dump() if isinstance(structured, ArticleOutput) else None,
+        # Responses behind this draft, invalidated once it is rejected or published
+        "cache_keys": list(cache_keys),
+    })
+
+def discard_draft(checkpoint):
+    """Reject the saved draft: the next attempt reruns the writer without replaying its cached responses"""
+    _forget_responses((checkpoint.stages.get("draft") or {}).get("cache_keys"))
+    checkpoint.discard("draft")
+
+def release_draft(checkpoint):
+    """The draft was published: drop its cached responses so a later run cannot write the same article again"""
+    _forget_responses((checkpoint.stages.get("draft") or {}).get("cache_keys"))
+
+def _stored_draft(data):
+    """A crew-output stand-in for a checkpointed draft (what parse_writer_output reads)"""
+    structured = data.get("structured")
+    return SimpleNamespace(
+        raw=data.get("raw") or "",
+        pydantic=ArticleOutput.model_validate(structured) if structured else None,
+        json_dict=None,
+        token_usage=None,
+    )
+
+def _run_parallel_pipeline(checkpoint=None):
+    started = time.perf_counter()
+    saved_events = checkpoint.get("selection") if checkpoint else None
+    if saved_events is not None:
+        events = [SelectedEvent.model_validate(event) for event in saved_events]
+    else:
+        run_metrics.expect_tasks(["select_events"])
+        selection = selection_crew.kickoff()
+        _record_usage(selection)
+        events = _selected_events(selection)
+        if not events:
+            raise ValueError("the researcher selected no events")
+        if checkpoint:
+            checkpoint.save("selection", [event.model_dump() for event in events])
+    reports = research_events_parallel(events, checkpoint)
+    if not reports:
+        raise RuntimeError("no selected event could be researched")
+    print(f"[{datetime.now()}] 🔀 Researched {len(reports)}/{len(events)} event(s) in parallel ({time.perf_counter() - started:.1f}s so far)")
+    run_metrics.expect_tasks(["write"])
+    writer_crew = Crew(agents=[copywriter], tasks=[_write_task_for(reports)], task_callback=run_metrics.task_completed)
+    with llm_cache.recording() as cache_keys:
+        result = writer_crew.kickoff()
+    _record_usage(result)
+    _save_draft(checkpoint, result, cache_keys)
+    return result
+
+def run_pipeline(checkpoint=None):
+    """
+    Generate one article and return the copywriter's CrewOutput: parallel
+    per-event research when enabled, the serial three-task crew otherwise
+    or if the parallel pipeline fails for a reason other than quota.
+    
+    With a checkpoint (checkpoints.Checkpoint), each stage's output is saved
+    as it finishes and stages already saved by an earlier attempt are skipped.
+    """
+    with checkpoints.activate(checkpoint), source_cache.run_scope():
+        draft = checkpoint.get("draft") if checkpoint else None
+        if draft is not None:
+            return _stored_draft(draft)
+        if PARALLEL_RESEARCH_ENABLED:
+            try:
+                return _run_parallel_pipeline(checkpoint)
+            except Exception as e:
+                if rate_limiter.is_rate_limit_error(e):
+                    raise
+                print(f"[{datetime.now()}] ⚠️  Parallel research failed ({e}); running the serial crew")
+        run_metrics.expect_tasks(TASK_NAMES)
+        with llm_cache.recording() as cache_keys:
+            result = crew.kickoff()
+        _record_usage(result)
+        _save_draft(checkpoint, result, cache_keys)
+        return result
+
 # Only run if executed directly (not when imported)
 if __name__ == "__main__":
-    result = crew.kickoff()
+    run = run_metrics.start_run(model=gemini_model)
+    result = run_pipeline()
+    run_metrics.finish_run(run, "succeeded")
     print(result)
     
     # Save result to file for API access
     try:
-        article_text = str(result)
-        sources = []
-        
-        # Extract sources if present
-        if "Sources:" in article_text:
-            sources_section = article_text.split("Sources:")[-1]
-            for line in sources_section.split('\n'):
-                line = line.strip()
-                if line and ('http' in line or 'www.' in line):
-                    if ' - ' in line:
-                        parts = line.split(' - ', 1)
-                        source_name = parts[0].replace('Source:', '').strip()
-                        source_url = parts[1].strip()
-                        sources.append({"name": source_name, "url": source_url})
-        
-        # Extract title
-        title = "Flash News: Top Global Events"
-        if '\n' in article_text:
-            first_line = article_text.split('\n')[0]
-            if len(first_line) < 100 and first_line.strip():
-                title = first_line.strip()
-        
-        # Extract content
-        content = article_text
-        if "Sources:" in content:
-            content = content.split("Sources:")[0].strip()
-        
+        parsed = parse_writer_output(result)
         article_data = {
-            "title": title,
-            "content": content,
-            "sources": sources,
-            "full_text": article_text
+            "title": parsed.title,
+            "content": parsed.content,
+            "sources": parsed.sources,
+            "images": parsed.images,
+            "full_text": parsed.full_text
         }
         
         # Only save to file if running locally (not in production)
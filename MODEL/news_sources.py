@@ -0,0 +1,238 @@
+"""
+Upstream news sources: raw fetchers, their logging wrappers and the
+concurrent aggregate over all of them.
+
+Each source has a raw fetcher that raises on failure (so the concurrent
+engine can report it) and a public wrapper that logs and returns [].
+Raw fetchers go through the source snapshot cache, so the aggregate tool,
+the per-source tools and the ingestion loop share one fetch per source
+(source_cache.py).
+
+Kept free of the model layer so the ingestion loop (ingest.py) can poll
+sources without importing CrewAI.
+"""
+from datetime import datetime, timezone
+
+import feedparser
+
+import http_client
+import run_metrics
+import source_cache
+from fetch_engine import run_fetchers
+from normalized_article import ADAPTERS
+
+
+def _quietly(fetch, label, *args):
+    """Run a raw fetcher, logging errors and returning [] on failure"""
+    try:
+        return fetch(*args)
+    except Exception as e:
+        print(f"{label} error: {e}")
+    return []
+
+@source_cache.snapshot("newsapi")
+def _fetch_newsapi():
+    url = "https://newsapi.org/v2/top-headlines?country=in&apiKey=2af46c8507fe47e18b7b2fcd5ef74dce"
+    response = http_client.get(url, timeout=10)
+    response.raise_for_status()
+    return response.json().get('articles', [])
+
+def fetch_newsapi():
+    """Fetch news from NewsAPI"""
+    return _quietly(_fetch_newsapi, "NewsAPI")
+
+@source_cache.snapshot("newsdata")
+def _fetch_newsdata():
+    url = "https://newsdata.io/api/1/news?apikey=pub_c894654a54c547af95e9f015b256dd28&q=technology"
+    response = http_client.get(url, timeout=10)
+    response.raise_for_status()
+    return response.json().get('results', [])
+
+def fetch_newsdata():
+    """Fetch news from NewsData.io"""
+    return _quietly(_fetch_newsdata, "NewsData.io")
+
+@source_cache.snapshot("gdelt")
+def _fetch_gdelt(query="world"):
+    url = f"https://api.gdeltproject.org/api/v2/doc/doc?query={query}&mode=ArtList&format=json&maxrecords=50"
+    response = http_client.get(url, timeout=10)
+    response.raise_for_status()
+    return response.json().get('articles', [])
+
+def fetch_gdelt(query="world"):
+    """Fetch news from GDELT"""
+    return _quietly(_fetch_gdelt, "GDELT", query)
+
+# Parsed entries of the last fetch per feed URL, reused when the feed answers 304
+_rss_parsed = {}
+
+@source_cache.snapshot("rss")
+def _fetch_rss_feed(url):
+    response = http_client.get(url, timeout=10)
+    response.raise_for_status()
+    if response.not_modified and url in _rss_parsed:
+        return [dict(article) for article in _rss_parsed[url]]
+    feed = feedparser.parse(response.content)
+    if not feed.entries and getattr(feed, 'bozo', False):
+        raise feed.get('bozo_exception') or ValueError("Unparseable feed")
+    articles = []
+    for entry in feed.entries[:20]:  # Limit to 20 entries
+        # Extract image from media:content or enclosure
+        image_url = ''
+        if hasattr(entry, 'media_content'):
+            for media in entry.media_content:
+                if media.get('type', '').startswith('image/'):
+                    image_url = media.get('url', '')
+                    break
+        if not image_url and hasattr(entry, 'enclosures'):
+            for enclosure in entry.enclosures:
+                if enclosure.get('type', '').startswith('image/'):
+                    image_url = enclosure.get('href', '')
+                    break
+        # Also check for media:thumbnail
+        if not image_url and hasattr(entry, 'media_thumbnail'):
+            for thumb in entry.media_thumbnail:
+                image_url = thumb.get('url', '')
+                break
+        
+        articles.append({
+            'title': entry.get('title', ''),
+            'description': entry.get('description', ''),
+            'link': entry.get('link', ''),
+            'published': entry.get('published', ''),
+            'source': feed.feed.get('title', 'RSS Feed'),
+            # Outlet of an aggregated item (the <source> element of Google News)
+            'publisher': (entry.get('source') or {}).get('title', ''),
+            'image_url': image_url
+        })
+    _rss_parsed[url] = [dict(article) for article in articles]
+    return articles
+
+def fetch_rss_feed(url):
+    """Fetch news from RSS feed"""
+    return _quietly(_fetch_rss_feed, f"RSS feed ({url})", url)
+
+GOOGLE_NEWS_RSS_URL = "https://news.google.com/rss"
+BBC_RSS_URL = "https://feeds.bbci.co.uk/news/rss.xml"
+
+def fetch_google_news_rss():
+    """Fetch from Google News RSS"""
+    return fetch_rss_feed(GOOGLE_NEWS_RSS_URL)
+
+def fetch_bbc_rss():
+    """Fetch from BBC RSS"""
+    return fetch_rss_feed(BBC_RSS_URL)
+
+REDDIT_SUBREDDITS = ['news', 'worldnews', 'technology']
+
+def _fetch_subreddit(subreddit):
+    url = f"https://www.reddit.com/r/{subreddit}/hot.json?limit=10"
+    headers = {'User-Agent': 'Mozilla/5.0'}
+    response = http_client.get(url, headers=headers, timeout=10)
+    response.raise_for_status()
+    articles = []
+    for post in response.json().get('data', {}).get('children', []):
+        post_data = post.get('data', {})
+        # Extract image URL from Reddit post
+        image_url = ''
+        # Check preview images
+        if 'preview' in post_data and 'images' in post_data['preview']:
+            if post_data['preview']['images']:
+                image_url = post_data['preview']['images'][0].get('source', {}).get('url', '')
+                # Reddit URLs are escaped, unescape them
+                if image_url:
+                    image_url = image_url.replace('&amp;', '&')
+        # Check thumbnail
+        if not image_url:
+            thumbnail = post_data.get('thumbnail', '')
+            if thumbnail and thumbnail not in ['self', 'default', 'nsfw']:
+                image_url = thumbnail
+        # Check URL if it's a direct image link
+        url_link = post_data.get('url', '')
+        if not image_url and url_link:
+            if any(ext in url_link.lower() for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp']):
+                image_url = url_link
+        
+        articles.append({
+            'title': post_data.get('title', ''),
+            'description': post_data.get('selftext', ''),
+            'link': f"https://reddit.com{post_data.get('permalink', '')}",
+            'published': datetime.fromtimestamp(post_data.get('created_utc', 0), tz=timezone.utc).isoformat(),
+            'source': f"Reddit r/{subreddit}",
+            'score': post_data.get('score', 0),
+            'image_url': image_url
+        })
+    return articles
+
+@source_cache.snapshot("reddit")
+def _fetch_reddit_news():
+    # Fan the subreddit requests out concurrently; keep whatever came back
+    results, report = run_fetchers(
+        {subreddit: (lambda s=subreddit: _fetch_subreddit(s)) for subreddit in REDDIT_SUBREDDITS},
+        label="subreddits",
+    )
+    if not results:
+        errors = '; '.join(f"r/{name}: {entry['error']}" for name, entry in report.items())
+        raise RuntimeError(f"all subreddit requests failed ({errors})")
+    articles = []
+    for subreddit in REDDIT_SUBREDDITS:
+        articles.extend(results.get(subreddit, []))
+    return articles
+
+def fetch_reddit_news():
+    """Fetch top posts from Reddit news subreddits"""
+    return _quietly(_fetch_reddit_news, "Reddit")
+
+# Raw fetchers run by aggregate_all_news, keyed by source name
+NEWS_SOURCES = {
+    'newsapi': _fetch_newsapi,
+    'newsdata': _fetch_newsdata,
+    'gdelt': lambda: _fetch_gdelt("world"),
+    'google_news': lambda: _fetch_rss_feed(GOOGLE_NEWS_RSS_URL),
+    'bbc': lambda: _fetch_rss_feed(BBC_RSS_URL),
+    'reddit': _fetch_reddit_news,
+}
+
+# The same fetchers without the snapshot cache, for the ingestion loop: its
+# polls must reach the network on their own cadence, not reuse a snapshot
+# frozen by a generation running in the same process
+UNCACHED_SOURCES = {
+    'newsapi': _fetch_newsapi.__wrapped__,
+    'newsdata': _fetch_newsdata.__wrapped__,
+    'gdelt': lambda: _fetch_gdelt.__wrapped__("world"),
+    'google_news': lambda: _fetch_rss_feed.__wrapped__(GOOGLE_NEWS_RSS_URL),
+    'bbc': lambda: _fetch_rss_feed.__wrapped__(BBC_RSS_URL),
+    'reddit': _fetch_reddit_news.__wrapped__,
+}
+
+def aggregate_all_news_with_report(deadline=None):
+    """
+    Fetch from all news sources concurrently and aggregate.
+    
+    Returns (articles, report): articles is a list of NormalizedArticle (each
+    raw item converted once by its source adapter) and report holds per-source
+    status, latency and failure details from the fetch engine.
+    """
+    # Fetch from all APIs in parallel under one global deadline
+    results, report = run_fetchers(NEWS_SOURCES, deadline=deadline, label="news sources")
+    
+    all_articles = []
+    for source in NEWS_SOURCES:
+        adapt = ADAPTERS[source]
+        all_articles.extend(adapt(raw) for raw in results.get(source, []))
+    return all_articles, report
+
+def aggregate_all_news():
+    """
+    Fetch from all news sources and aggregate into NormalizedArticle items.
+    The per-source report is logged and recorded on the active generation run.
+    """
+    articles, report = aggregate_all_news_with_report()
+    summary = ", ".join(
+        f"{name} {entry['status']} {entry['count'] or 0} in {entry['latency_ms']:.0f}ms" for name, entry in report.items()
+    )
+    print(f"[{datetime.now()}] 📊 Sources: {summary}")
+    run = run_metrics.current_run()
+    if run is not None:
+        run.sources = report
+    return articles
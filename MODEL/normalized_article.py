@@ -0,0 +1,198 @@
+"""
+Normalized news item shared by the whole fetch -> preprocess -> agent pipeline.
+
+Each source returns its own dict shape (NewsAPI urlToImage/publishedAt,
+NewsData link/image_url/pubDate, GDELT image/seendate, RSS link/published,
+Reddit permalink/score). The per-source adapters below turn a raw item into a
+NormalizedArticle exactly once; every downstream consumer reads that instead of
+re-keying dicts.
+"""
+import html
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+_TRACKING_PARAMS = {"fbclid", "gclid", "ocid", "cmpid", "ref", "rss", "at_medium", "at_campaign"}
+
+
+def clean_text(value):
+    """Strip HTML tags/entities and collapse whitespace"""
+    if not value:
+        return ""
+    return _SPACE_RE.sub(" ", html.unescape(_TAG_RE.sub(" ", str(value)))).strip()
+
+
+def canonical_url(url):
+    """Canonical form of an article URL for deduplication (scheme, www, tracking params, fragments)"""
+    if not url:
+        return ""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode([
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in _TRACKING_PARAMS
+    ])
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https", host, path, query, ""))
+
+
+def parse_published(value):
+    """Parse the timestamp formats used by the sources (ISO, RFC 822, GDELT) into UTC, or None"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        text = str(value).strip()
+        parsed = None
+        for parse in (
+            lambda t: datetime.fromisoformat(t.replace("Z", "+00:00")),
+            parsedate_to_datetime,
+            lambda t: datetime.strptime(t, "%Y%m%dT%H%M%SZ"),  # GDELT seendate
+            lambda t: datetime.strptime(t, "%Y-%m-%d %H:%M:%S"),  # NewsData pubDate
+        ):
+            try:
+                parsed = parse(text)
+                break
+            except (TypeError, ValueError):
+                continue
+        if parsed is None:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+@dataclass(slots=True)
+class NormalizedArticle:
+    """One fetched news item in canonical form"""
+    title: str
+    url: str
+    canonical_url: str
+    body: str = ""
+    image_url: str = ""
+    source_name: str = ""
+    published_at: Optional[datetime] = None
+    score: float = 0
+    origin: str = ""  # fetcher that produced it: newsapi, newsdata, gdelt, google_news, bbc, reddit
+
+    @classmethod
+    def build(cls, title, url, body="", image_url="", source_name="", published=None, score=0, origin=""):
+        url = (url or "").strip()
+        return cls(
+            title=clean_text(title),
+            url=url,
+            canonical_url=canonical_url(url),
+            body=clean_text(body),
+            image_url=(image_url or "").strip(),
+            source_name=source_name or "",
+            published_at=parse_published(published),
+            score=score or 0,
+            origin=origin,
+        )
+
+
+# Per-source adapters: raw fetcher item -> NormalizedArticle
+
+def from_newsapi(raw):
+    return NormalizedArticle.build(
+        title=raw.get("title"),
+        url=raw.get("url"),
+        body=raw.get("description") or raw.get("content"),
+        image_url=raw.get("urlToImage"),
+        source_name=(raw.get("source") or {}).get("name") or "NewsAPI",
+        published=raw.get("publishedAt"),
+        origin="newsapi",
+    )
+
+
+def from_newsdata(raw):
+    return NormalizedArticle.build(
+        title=raw.get("title"),
+        url=raw.get("link"),
+        body=raw.get("description") or raw.get("content"),
+        image_url=raw.get("image_url"),
+        source_name=raw.get("source_id") or "NewsData.io",
+        published=raw.get("pubDate"),
+        origin="newsdata",
+    )
+
+
+def from_gdelt(raw):
+    return NormalizedArticle.build(
+        title=raw.get("title"),
+        url=raw.get("url"),
+        image_url=raw.get("socialimage") or raw.get("image"),
+        source_name=raw.get("domain") or raw.get("source") or "GDELT",
+        published=raw.get("seendate"),
+        origin="gdelt",
+    )
+
+
+def from_rss(raw, source_name, origin):
+    return NormalizedArticle.build(
+        title=raw.get("title"),
+        url=raw.get("link"),
+        body=raw.get("description"),
+        image_url=raw.get("image_url"),
+        source_name=source_name,
+        published=raw.get("published"),
+        origin=origin,
+    )
+
+
+def _google_news_publisher(raw):
+    """
+    (title, publisher) of a Google News item. The outlet comes from the RSS
+    <source> element, else from the " - Outlet" suffix Google appends to every
+    title; the suffix is dropped from the title so copies from other sources
+    match it.
+    """
+    title = clean_text(raw.get("title"))
+    publisher = clean_text(raw.get("publisher"))
+    head, separator, suffix = title.rpartition(" - ")
+    if separator and head and (not publisher or suffix == publisher):
+        return head, publisher or suffix
+    return title, publisher
+
+
+def from_google_news(raw):
+    title, publisher = _google_news_publisher(raw)
+    return from_rss({**raw, "title": title}, publisher or "Google News", "google_news")
+
+
+def from_bbc(raw):
+    return from_rss(raw, "BBC", "bbc")
+
+
+def from_reddit(raw):
+    return NormalizedArticle.build(
+        title=raw.get("title"),
+        url=raw.get("link"),
+        body=raw.get("description"),
+        image_url=raw.get("image_url"),
+        source_name=raw.get("source") or "Reddit",
+        published=raw.get("published"),
+        score=raw.get("score", 0),
+        origin="reddit",
+    )
+
+
+ADAPTERS = {
+    "newsapi": from_newsapi,
+    "newsdata": from_newsdata,
+    "gdelt": from_gdelt,
+    "google_news": from_google_news,
+    "bbc": from_bbc,
+    "reddit": from_reddit,
+}
@@ -0,0 +1,34 @@
+"""
+Keyset pagination on (created_at, id) for the Supabase articles table.
+
+Shared by the feed endpoint (newest first, opaque cursors) and the local
+indexes that catch up from Supabase (oldest first). Ordering on id as well as
+created_at keeps rows that share a timestamp from being skipped or repeated
+at page boundaries.
+"""
+import base64
+import json
+
+
+def encode_cursor(article):
+    """Build an opaque pagination cursor from an article's (created_at, id)"""
+    raw = json.dumps([article.get('created_at'), article.get('id')])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor into (created_at, id); raises ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, article_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(created_at, str) or not isinstance(article_id, str):
+        raise ValueError("Invalid cursor")
+    return created_at, article_id
+
+
+def keyset_filter(created_at, article_id, descending=False):
+    """PostgREST or=() filter for the rows after (created_at, id) in (created_at, id) order"""
+    op = 'lt' if descending else 'gt'
+    return f'created_at.{op}."{created_at}",and(created_at.eq."{created_at}",id.{op}."{article_id}")'
@@ -0,0 +1,269 @@
+"""
+Client-side rate limiting for Gemini calls.
+
+RateLimiter keeps one token bucket per quota of the configured model:
+requests per minute (RPM), tokens per minute (TPM) and requests per day
+(RPD). Before each LLM call it reserves one request and the estimated
+prompt tokens, sleeping until every bucket has room, so bursts of agent
+steps are spaced out instead of failing with 429. After the call, the
+actual token usage is charged.
+
+If Gemini still answers 429 (another process shares the key, or the limits
+are lower than configured), the Retry-After / retryDelay hint pauses every
+call in this process. Short delays are retried in place; long ones (daily
+quota) are raised, and the scheduler sleeps until the pause ends.
+
+The scheduler sizes its interval from the measured cost of a run
+(sustainable_interval), so generation runs as often as the quota allows.
+Buckets are per process: the worker runs all generation, so that is where
+the limits apply.
+"""
+import os
+import re
+import time
+from datetime import datetime
+from threading import Lock
+
+import run_metrics
+
+# Free-tier limits (RPM, TPM, RPD) by model prefix; GEMINI_RPM / GEMINI_TPM / GEMINI_RPD override
+MODEL_LIMITS = {
+    "gemini-2.5-flash-lite": (15, 250_000, 1000),
+    "gemini-2.5-flash": (10, 250_000, 250),
+    "gemini-2.5-pro": (5, 250_000, 100),
+    "gemini-2.0-flash-lite": (30, 1_000_000, 1500),
+    "gemini-2.0-flash": (15, 1_000_000, 1500),
+    "gemini-1.5-flash": (15, 1_000_000, 1500),
+}
+DEFAULT_LIMITS = (10, 250_000, 250)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# Retry a 429 in place when Gemini asks to wait at most this long; longer waits are raised
+RATE_LIMIT_MAX_RETRY_WAIT = float(os.getenv("RATE_LIMIT_MAX_RETRY_WAIT", "90"))
+RATE_LIMIT_RETRIES = int(os.getenv("RATE_LIMIT_RETRIES", "3"))
+# Requests per minute of quota reserved for each crew running in parallel
+RPM_PER_PARALLEL_CREW = int(os.getenv("RPM_PER_PARALLEL_CREW", "6"))
+# Pause after a 429 that carries no retry hint
+RATE_LIMIT_DEFAULT_PAUSE = float(os.getenv("RATE_LIMIT_DEFAULT_PAUSE", "60"))
+
+_RETRY_DELAY_RES = (
+    re.compile(r"retryDelay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s", re.IGNORECASE),
+    re.compile(r"retry[ -]after['\"]?\s*[:=]?\s*['\"]?(\d+(?:\.\d+)?)", re.IGNORECASE),
+    re.compile(r"retry in (\d+(?:\.\d+)?)\s*s", re.IGNORECASE),
+)
+
+
+def model_limits(model):
+    """(rpm, tpm, rpd) for a model name such as 'gemini/gemini-2.0-flash-lite'"""
+    name = (model or "").split("/")[-1]
+    rpm, tpm, rpd = next((l for prefix, l in MODEL_LIMITS.items() if name.startswith(prefix)), DEFAULT_LIMITS)
+    return (
+        int(os.getenv("GEMINI_RPM", rpm)),
+        int(os.getenv("GEMINI_TPM", tpm)),
+        int(os.getenv("GEMINI_RPD", rpd)),
+    )
+
+
+def is_rate_limit_error(error):
+    """True for a 429 / RESOURCE_EXHAUSTED error from the Gemini client"""
+    if getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429:
+        return True
+    message = str(error)
+    return "RESOURCE_EXHAUSTED" in message or "429" in message
+
+
+def retry_after_seconds(error):
+    """Seconds the API asked us to wait (Retry-After header or retryDelay detail), or None"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        value = headers.get("Retry-After") or headers.get("retry-after")
+        if value:
+            return float(value)
+    except (TypeError, ValueError, AttributeError):
+        pass
+    message = str(error)
+    for pattern in _RETRY_DELAY_RES:
+        match = pattern.search(message)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+class TokenBucket:
+    """capacity units, refilled continuously at capacity per period seconds; may go into debt"""
+
+    def __init__(self, capacity, period):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until amount units are available (amounts above capacity wait for a full bucket)"""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount, now):
+        self._refill(now)
+        self.level -= amount
+
+    def remaining(self, now):
+        self._refill(now)
+        return max(0.0, self.level)
+
+
+class RateLimiter:
+    """RPM / TPM / RPD buckets for one model, plus a shared pause after 429s"""
+
+    def __init__(self, model, rpm, tpm, rpd):
+        self.model = model
+        self.rpm, self.tpm, self.rpd = rpm, tpm, rpd
+        self._requests = TokenBucket(rpm, 60)
+        self._tokens = TokenBucket(tpm, 60)
+        self._daily = TokenBucket(rpd, 86400)
+        self._paused_until = 0.0
+        self._lock = Lock()
+        self.throttled = 0
+        self.throttle_seconds = 0.0
+        self.rate_limited = 0
+
+    @classmethod
+    def for_model(cls, model):
+        return cls(model, *model_limits(model))
+
+    def acquire(self, tokens):
+        """Block until one request of ~tokens fits every quota; returns the seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max(
+                    self._paused_until - now,
+                    self._requests.wait_time(1, now),
+                    self._tokens.wait_time(tokens, now),
+                    self._daily.wait_time(1, now),
+                )
+                if wait <= 0:
+                    self._requests.take(1, now)
+                    self._tokens.take(tokens, now)
+                    self._daily.take(1, now)
+                    if waited:
+                        self.throttled += 1
+                        self.throttle_seconds += waited
+                    return waited
+            time.sleep(wait)
+            waited += wait
+
+    def charge(self, extra_tokens):
+        """Correct the token bucket once the real usage of a call is known"""
+        if extra_tokens:
+            with self._lock:
+                self._tokens.take(extra_tokens, time.monotonic())
+
+    def pause(self, seconds):
+        """Hold every call for seconds (after a 429)"""
+        with self._lock:
+            self.rate_limited += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def blocked_for(self):
+        """Seconds left on a 429 pause, 0 if calls may go out now"""
+        return max(0.0, self._paused_until - time.monotonic())
+
+    def time_until_available(self, llm_calls, total_tokens):
+        """Seconds until the buckets hold a whole run's worth of requests and tokens"""
+        with self._lock:
+            now = time.monotonic()
+            return max(
+                self._paused_until - now,
+                self._requests.wait_time(llm_calls, now),
+                self._tokens.wait_time(total_tokens, now),
+                self._daily.wait_time(llm_calls, now),
+            )
+
+    def max_concurrency(self, max_workers):
+        """How many crews may run at once: one per RPM_PER_PARALLEL_CREW of the RPM quota, at least 1"""
+        return max(1, min(max_workers, self.rpm // RPM_PER_PARALLEL_CREW))
+
+    def sustainable_interval(self, llm_calls, total_tokens, headroom=0.8):
+        """
+        Shortest interval (seconds) between runs that each make llm_calls
+        calls and use total_tokens tokens, using headroom of each quota.
+        """
+        per_minute = max(llm_calls / (self.rpm * headroom), total_tokens / (self.tpm * headroom))
+        per_day = llm_calls / (self.rpd * headroom)
+        return max(per_minute * 60, per_day * 86400)
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "model": self.model,
+                "limits": {"rpm": self.rpm, "tpm": self.tpm, "rpd": self.rpd},
+                "remaining": {
+                    "requests_this_minute": int(self._requests.remaining(now)),
+                    "tokens_this_minute": int(self._tokens.remaining(now)),
+                    "requests_today": int(self._daily.remaining(now)),
+                },
+                "blocked_for": round(max(0.0, self._paused_until - now), 1),
+                "throttled_calls": self.throttled,
+                "throttle_seconds": round(self.throttle_seconds, 1),
+                "rate_limited": self.rate_limited,
+            }
+
+
+_limiter = None
+
+
+def active_limiter():
+    """The limiter in front of the LLM in this process (None until the model layer loads)"""
+    return _limiter
+
+
+def limit_llm(llm, model):
+    """Put a RateLimiter for model in front of llm.call(); returns the limiter"""
+    global _limiter
+    limiter = _limiter = RateLimiter.for_model(model)
+    if not RATE_LIMIT_ENABLED:
+        return limiter  # limits still size the scheduler interval
+    original_call = llm.call
+
+    def call(messages, *args, **kwargs):
+        attempt = 0
+        while True:
+            reserved = run_metrics.estimate_tokens(messages)
+            waited = limiter.acquire(reserved)
+            run = run_metrics.current_run()
+            if waited and run is not None:
+                run.record_throttle(waited * 1000)
+            run_metrics.pop_call_usage()
+            try:
+                response = original_call(messages, *args, **kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                delay = retry_after_seconds(e)
+                limiter.pause(delay if delay is not None else RATE_LIMIT_DEFAULT_PAUSE)
+                attempt += 1
+                if attempt > RATE_LIMIT_RETRIES or (delay or RATE_LIMIT_DEFAULT_PAUSE) > RATE_LIMIT_MAX_RETRY_WAIT:
+                    raise
+                print(f"[{datetime.now()}] ⏳ Gemini rate limit hit, retrying in {limiter.blocked_for():.0f}s (attempt {attempt}/{RATE_LIMIT_RETRIES})")
+                continue
+            # This call's own usage as measured by run_metrics.instrument_llm (never other crews' tokens)
+            usage = run_metrics.pop_call_usage()
+            if usage is not None:
+                used = usage[0] + usage[1]
+            else:
+                used = reserved + run_metrics.estimate_tokens(response)
+            limiter.charge(used - reserved)
+            return response
+
+    object.__setattr__(llm, "call", call)
+    print(f"⏱️  Rate limiting {model}: {limiter.rpm} RPM, {limiter.tpm} TPM, {limiter.rpd} RPD")
+    return limiter
@@ -0,0 +1,390 @@
+"""
+Per-run accounting for crew.kickoff(): tokens, latency, tool calls and cost.
+
+A generation run is opened around each kickoff (start_run / finish_run).
+While it is active, the instrumented LLM and tools record every call into it:
+
+- LLM calls: wall time and prompt/completion tokens. Tokens come from the
+  LLM's own cumulative usage counters when it keeps them and no other call
+  overlapped (parallel crews share the counters, so an overlapping call's
+  delta would include the others' tokens); otherwise they are estimated
+  from message length (~4 characters per token) and flagged as estimated.
+- Tool calls: name, wall time, output size and errors.
+- Tasks: the crew's task_callback closes the current task, so every call is
+  attributed to the task (and agent) that was running when it happened.
+  Tasks are tracked per thread, so sub-crews running in parallel are
+  accounted separately.
+
+Finished runs are stored in the Supabase generation_runs table (see
+add_generation_runs.sql), linked to the article they produced.
+
+This module does not import crewai, so the web tier can read runs cheaply.
+"""
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from threading import Lock, get_ident, local
+
+CHARS_PER_TOKEN = 4
+
+# USD per 1M tokens (input, output); LLM_INPUT_COST_PER_MTOK / LLM_OUTPUT_COST_PER_MTOK override
+MODEL_PRICES = {
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-1.5-flash": (0.075, 0.30),
+}
+
+
+def model_price(model):
+    """(input, output) USD per 1M tokens for a model name such as 'gemini/gemini-2.0-flash-lite'"""
+    name = (model or "").split("/")[-1]
+    price = next((p for prefix, p in MODEL_PRICES.items() if name.startswith(prefix)), (0.0, 0.0))
+    return (
+        float(os.getenv("LLM_INPUT_COST_PER_MTOK", price[0])),
+        float(os.getenv("LLM_OUTPUT_COST_PER_MTOK", price[1])),
+    )
+
+
+def estimate_tokens(value):
+    """Rough token count of a prompt (string or chat messages) or a completion"""
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value) // CHARS_PER_TOKEN
+    if isinstance(value, dict):
+        return estimate_tokens(value.get("content"))
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_tokens(item) for item in value)
+    return len(str(value)) // CHARS_PER_TOKEN
+
+
+def usage_snapshot(llm):
+    """(prompt_tokens, completion_tokens) from the LLM's cumulative usage counters, or None"""
+    usage = getattr(llm, "_token_usage", None)
+    if not isinstance(usage, dict):
+        return None
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+
+# Calls in flight on instrumented LLMs, to tell whether a usage-counter delta is one call's own
+_calls_lock = Lock()
+_calls_in_flight = 0
+_calls_started = 0
+_call_usage = local()
+
+
+def pop_call_usage():
+    """
+    (prompt_tokens, completion_tokens, estimated) of the last instrumented
+    llm.call() on this thread, or None; cleared once read.
+    """
+    usage = getattr(_call_usage, "value", None)
+    _call_usage.value = None
+    return usage
+
+
+def _bucket():
+    return {
+        "wall_ms": 0.0,
+        "llm_calls": 0,
+        "llm_ms": 0.0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "tool_calls": 0,
+        "tool_ms": 0.0,
+        "tool_errors": 0,
+        "throttle_ms": 0.0,
+        "cache_hits": 0,
+    }
+
+
+class GenerationRun:
+    """Counters for one crew.kickoff(), broken down by task"""
+
+    def __init__(self, model=None):
+        self.id = uuid.uuid4().hex
+        self.model = model
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self._lock = Lock()
+        self.tasks = []  # finished tasks: {name, agent, **bucket}
+        # Per thread: the running task's counters, when it started, and names of the tasks to come
+        self._current = {}
+        self._task_start = {}
+        self._task_names = {}
+        self.tools = {}  # tool name -> {calls, ms, errors, output_chars}
+        self.totals = _bucket()
+        self.estimated_tokens = False
+        self.reported_usage = None
+        self.duration_ms = None
+        self.status = "running"
+        self.error = None
+        self.article_id = None
+        self.parse = None
+        self.rate_limit = None
+        self.llm_cache = None
+        self.checkpoint = None
+        self.source_cache = None
+        # Per-source status/latency/count of the live fetch, when the run fetched live
+        self.sources = None
+
+    def _add(self, **counts):
+        thread = get_ident()
+        if thread not in self._current:
+            self._current[thread] = _bucket()
+            self._task_start.setdefault(thread, time.perf_counter())
+        for bucket in (self._current[thread], self.totals):
+            for key, value in counts.items():
+                bucket[key] += value
+
+    def record_llm_call(self, elapsed_ms, prompt_tokens, completion_tokens, estimated=False):
+        with self._lock:
+            self._add(llm_calls=1, llm_ms=elapsed_ms, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+            self.estimated_tokens = self.estimated_tokens or estimated
+
+    def record_throttle(self, waited_ms):
+        """Time the rate limiter held a call back"""
+        with self._lock:
+            self._add(throttle_ms=waited_ms)
+
+    def record_cache_hit(self):
+        """An LLM call answered from the response cache (no request sent)"""
+        with self._lock:
+            self._add(cache_hits=1)
+
+    def record_tool_call(self, name, elapsed_ms, output_chars=0, error=False):
+        with self._lock:
+            self._add(tool_calls=1, tool_ms=elapsed_ms, tool_errors=int(error))
+            tool = self.tools.setdefault(name, {"calls": 0, "ms": 0.0, "errors": 0, "output_chars": 0})
+            tool["calls"] += 1
+            tool["ms"] += elapsed_ms
+            tool["errors"] += int(error)
+            tool["output_chars"] += output_chars
+
+    def expect_tasks(self, names):
+        """Names for the next tasks completed on this thread, in order"""
+        with self._lock:
+            self._task_names[get_ident()] = list(names)
+
+    def task_completed(self, task_output):
+        """Close the task running on this thread (crew task_callback)"""
+        now = time.perf_counter()
+        thread = get_ident()
+        with self._lock:
+            names = self._task_names.get(thread) or []
+            name = getattr(task_output, "name", None) or (names.pop(0) if names else f"task_{len(self.tasks) + 1}")
+            current = self._current.pop(thread, None) or _bucket()
+            current["wall_ms"] = (now - self._task_start.get(thread, self._start)) * 1000
+            self.tasks.append({"name": name, "agent": str(getattr(task_output, "agent", "") or ""), **current})
+            self._task_start[thread] = now
+
+    def record_crew_usage(self, usage):
+        """Add a crew's own UsageMetrics (CrewOutput.token_usage); called once per kickoff"""
+        if usage is None:
+            return
+        with self._lock:
+            if self.reported_usage is None:
+                self.reported_usage = dict.fromkeys(("prompt_tokens", "completion_tokens", "total_tokens", "successful_requests"), 0)
+            for key in self.reported_usage:
+                self.reported_usage[key] += getattr(usage, key, 0) or 0
+
+    def finish(self, status, error=None):
+        with self._lock:
+            self.duration_ms = (time.perf_counter() - self._start) * 1000
+            self.totals["wall_ms"] = self.duration_ms
+            self.status = status
+            self.error = error
+
+    def cost_usd(self):
+        prompt, completion = self.token_counts()
+        input_price, output_price = model_price(self.model)
+        return round((prompt * input_price + completion * output_price) / 1_000_000, 6)
+
+    def token_counts(self):
+        """(prompt, completion) tokens: the crew's reported usage when available, else ours"""
+        if self.reported_usage and self.reported_usage.get("total_tokens"):
+            return self.reported_usage["prompt_tokens"], self.reported_usage["completion_tokens"]
+        return self.totals["prompt_tokens"], self.totals["completion_tokens"]
+
+    def to_row(self):
+        """Row for the generation_runs table"""
+        prompt, completion = self.token_counts()
+        minutes = (self.duration_ms or 0) / 60000
+        return {
+            "id": self.id,
+            "article_id": self.article_id,
+            "model": self.model,
+            "status": self.status,
+            "error": (self.error or "")[:1000] or None,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms or 0),
+            "llm_calls": self.totals["llm_calls"],
+            "tool_calls": self.totals["tool_calls"],
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "total_tokens": prompt + completion,
+            "cost_usd": self.cost_usd(),
+            "metrics": {
+                "tasks": [_rounded(task) for task in self.tasks],
+                "tools": {name: _rounded(tool) for name, tool in self.tools.items()},
+                "measured": _rounded(self.totals),
+                "reported_usage": self.reported_usage,
+                "estimated_tokens": self.estimated_tokens,
+                "parse": self.parse,
+                "rate_limit": self.rate_limit,
+                "llm_cache": self.llm_cache,
+                "checkpoint": self.checkpoint,
+                "source_cache": self.source_cache,
+                "sources": self.sources,
+                # Average rates over the run, to compare with the model's RPM/TPM limits
+                "requests_per_minute": round(self.totals["llm_calls"] / minutes, 2) if minutes else None,
+                "tokens_per_minute": round((prompt + completion) / minutes) if minutes else None,
+            },
+        }
+
+
+def _rounded(counts):
+    return {key: round(value, 1) if isinstance(value, float) else value for key, value in counts.items()}
+
+
+_active_run = None
+_active_lock = Lock()
+
+
+def current_run():
+    """The run being recorded in this process, or None"""
+    return _active_run
+
+
+def start_run(model=None):
+    global _active_run
+    with _active_lock:
+        _active_run = GenerationRun(model=model)
+        return _active_run
+
+
+def finish_run(run, status, error=None):
+    global _active_run
+    run.finish(status, error=error)
+    with _active_lock:
+        if _active_run is run:
+            _active_run = None
+    prompt, completion = run.token_counts()
+    print(
+        f"[{datetime.now()}] 📊 Run {run.id[:8]} {status}: {run.duration_ms / 1000:.1f}s, "
+        f"{run.totals['llm_calls']} LLM call(s), {run.totals['tool_calls']} tool call(s), "
+        f"{prompt}+{completion} tokens{' (estimated)' if run.estimated_tokens and not run.reported_usage else ''}, "
+        f"${run.cost_usd():.4f}"
+    )
+    return run
+
+
+def expect_tasks(names):
+    """Label the next tasks completed on this thread in the active run"""
+    run = _active_run
+    if run is not None:
+        run.expect_tasks(names)
+
+
+def task_completed(task_output):
+    """crewai task_callback: close the current task of the active run"""
+    run = _active_run
+    if run is not None:
+        run.task_completed(task_output)
+
+
+# --- instrumentation ---------------------------------------------------------
+
+def instrument_llm(llm):
+    """Time every llm.call() and count its tokens into the active run"""
+    original_call = llm.call
+
+    def call(messages, *args, **kwargs):
+        global _calls_in_flight, _calls_started
+        with _calls_lock:
+            _calls_in_flight += 1
+            _calls_started += 1
+            started = _calls_started
+            alone = _calls_in_flight == 1
+            before = usage_snapshot(llm)
+        start = time.perf_counter()
+        try:
+            response = original_call(messages, *args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with _calls_lock:
+                after = usage_snapshot(llm)
+                # Another call started while this one ran: the counters hold its tokens too
+                alone = alone and _calls_started == started
+                _calls_in_flight -= 1
+        if alone and before is not None and after is not None and after != before:
+            usage = (after[0] - before[0], after[1] - before[1], False)
+        else:
+            usage = (estimate_tokens(messages), estimate_tokens(response), True)
+        _call_usage.value = usage
+        run = _active_run
+        if run is not None:
+            run.record_llm_call(elapsed_ms, usage[0], usage[1], estimated=usage[2])
+        return response
+
+    # LLM classes may be pydantic models; bypass field validation for the instance override
+    object.__setattr__(llm, "call", call)
+    return llm
+
+
+def instrument_tool(tool):
+    """Time every tool._run() into the active run"""
+    original_run = tool._run
+
+    def _run(*args, **kwargs):
+        run = _active_run
+        if run is None:
+            return original_run(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            output = original_run(*args, **kwargs)
+        except Exception:
+            run.record_tool_call(tool.name, (time.perf_counter() - start) * 1000, error=True)
+            raise
+        run.record_tool_call(tool.name, (time.perf_counter() - start) * 1000, output_chars=len(str(output)))
+        return output
+
+    object.__setattr__(tool, "_run", _run)
+    return tool
+
+
+# --- persistence -------------------------------------------------------------
+
+RUN_LIST_FIELDS = (
+    "id, article_id, model, status, error, started_at, duration_ms, llm_calls, tool_calls, "
+    "prompt_tokens, completion_tokens, total_tokens, cost_usd"
+)
+
+
+def save_run(supabase_client, run):
+    """Insert the run into generation_runs. Returns True on success (never raises)."""
+    try:
+        supabase_client.table("generation_runs").insert(run.to_row()).execute()
+        return True
+    except Exception as e:
+        print(f"[{datetime.now()}] ⚠️  Could not save generation run {run.id[:8]}: {e}")
+        return False
+
+
+def load_runs(supabase_client, limit=20):
+    """Most recent runs, newest first (without the per-task breakdown)"""
+    response = (
+        supabase_client.table("generation_runs").select(RUN_LIST_FIELDS)
+        .order("started_at", desc=True).limit(limit).execute()
+    )
+    return response.data or []
+
+
+def load_run(supabase_client, run_id):
+    """One run with its per-task and per-tool metrics, or None"""
+    response = supabase_client.table("generation_runs").select("*").eq("id", run_id).limit(1).execute()
+    return response.data[0] if response.data else None
@@ -0,0 +1,102 @@
+"""
+Snapshot cache for upstream news sources, shared by every fetch tool.
+
+During one generation the researcher may call fetch_all_news_sources and
+then the per-source tools, and event crews may search GDELT for the same
+query at once. Raw source fetchers are wrapped with @snapshot so each
+source (and argument, e.g. the GDELT query or RSS URL) hits the network at
+most once per window:
+
+- within a pipeline run (run_scope), a snapshot is reused for the whole run
+- across runs, a snapshot is reused for SOURCE_SNAPSHOT_TTL_SECONDS
+  (0 disables cross-run reuse)
+
+Concurrent callers of the same source share one in-flight fetch. Failures
+are never cached.
+"""
+import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+from itertools import count
+from threading import Event, Lock
+
+SOURCE_SNAPSHOT_TTL_SECONDS = float(os.getenv("SOURCE_SNAPSHOT_TTL_SECONDS", "300"))
+
+_lock = Lock()
+_snapshots = {}  # key -> (fetched_at, run, value)
+_in_flight = {}  # key -> Event set when the fetch finishes
+_runs = count(1)
+_current_run = None
+_stats = {"hits": 0, "misses": 0, "shared": 0}
+
+
+def _copy(value):
+    """Callers may mutate what they get back; hand out fresh lists of fresh dicts"""
+    if isinstance(value, list):
+        return [dict(item) if isinstance(item, dict) else item for item in value]
+    return value
+
+
+def _fresh(entry):
+    fetched_at, run, _ = entry
+    return (run is not None and run == _current_run) or time.monotonic() - fetched_at < SOURCE_SNAPSHOT_TTL_SECONDS
+
+
+def get_or_fetch(key, fetch):
+    """The snapshot for key if it is still fresh, else fetch() once (shared by concurrent callers)"""
+    while True:
+        with _lock:
+            entry = _snapshots.get(key)
+            if entry is not None and _fresh(entry):
+                _stats["hits"] += 1
+                return _copy(entry[2])
+            waiting = _in_flight.get(key)
+            if waiting is None:
+                done = _in_flight[key] = Event()
+                _stats["misses"] += 1
+                break
+            _stats["shared"] += 1
+        # Another thread is fetching this source: wait, then read its snapshot (or fetch if it failed)
+        waiting.wait()
+    try:
+        value = fetch()
+        with _lock:
+            _snapshots[key] = (time.monotonic(), _current_run, value)
+        return _copy(value)
+    finally:
+        with _lock:
+            del _in_flight[key]
+        done.set()
+
+
+def snapshot(source):
+    """Decorator for a raw fetcher: results are cached per (source, args)"""
+    def decorate(fetch):
+        @wraps(fetch)
+        def wrapper(*args):
+            return get_or_fetch((source,) + args, lambda: fetch(*args))
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def run_scope():
+    """Reuse every snapshot taken inside this block for the rest of the block"""
+    global _current_run
+    with _lock:
+        _current_run = next(_runs)
+    try:
+        yield
+    finally:
+        with _lock:
+            _current_run = None
+            # Snapshots older than the TTL were only kept for this run
+            now = time.monotonic()
+            for key in [k for k, (fetched_at, _, _) in _snapshots.items() if now - fetched_at >= SOURCE_SNAPSHOT_TTL_SECONDS]:
+                del _snapshots[key]
+
+
+def stats():
+    with _lock:
+        return dict(_stats, snapshots=len(_snapshots))
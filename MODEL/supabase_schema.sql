@@ -77,3 +77,157 @@ ORDER BY created_at DESC;
 -- GRANT SELECT ON articles TO anon;
 -- GRANT SELECT ON article_summaries TO anon;
 
+
+-- Scheduler leader election (one article generation job per cycle across all workers/hosts)
+-- Used when SCHEDULER_LOCK_BACKEND=supabase. The leader renews its lease every
+-- ttl/3 seconds; if it dies, the lease expires and another worker takes over.
+CREATE TABLE IF NOT EXISTS scheduler_leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+-- No policies: only the service_role key (which bypasses RLS) can touch leases
+ALTER TABLE scheduler_leases ENABLE ROW LEVEL SECURITY;
+
+-- Take the lease if it is free, expired, or already ours; returns TRUE if held
+CREATE OR REPLACE FUNCTION acquire_scheduler_lease(lease_name TEXT, lease_holder TEXT, ttl_seconds INTEGER)
+RETURNS BOOLEAN AS $$
+DECLARE
+    acquired BOOLEAN;
+BEGIN
+    INSERT INTO scheduler_leases AS l (name, holder, expires_at)
+    VALUES (lease_name, lease_holder, NOW() + make_interval(secs => ttl_seconds))
+    ON CONFLICT (name) DO UPDATE
+        SET holder = EXCLUDED.holder, expires_at = EXCLUDED.expires_at
+        WHERE l.holder = EXCLUDED.holder OR l.expires_at < NOW()
+    RETURNING TRUE INTO acquired;
+    RETURN COALESCE(acquired, FALSE);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION release_scheduler_lease(lease_name TEXT, lease_holder TEXT)
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM scheduler_leases
+    WHERE name = lease_name AND holder = lease_holder;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Related articles by stored topics. The ?| filter uses the GIN index on
+-- topics, so only articles sharing at least one topic are scored; similarity
+-- is the Jaccard overlap of the topic sets.
+CREATE OR REPLACE FUNCTION match_articles_by_topics(
+    topic_list TEXT[],
+    min_similarity REAL DEFAULT 0,
+    max_rows INTEGER DEFAULT 20
+)
+RETURNS TABLE (id TEXT, title TEXT, created_at TIMESTAMPTZ, topics JSONB, similarity REAL) AS $$
+    SELECT a.id, a.title, a.created_at, a.topics, m.similarity
+    FROM articles a
+    CROSS JOIN LATERAL (
+        SELECT COUNT(DISTINCT e.topic) FILTER (WHERE e.topic = ANY(topic_list))::REAL AS shared,
+               COUNT(DISTINCT e.topic)::REAL AS total
+        FROM jsonb_array_elements_text(a.topics) AS e(topic)
+    ) c
+    CROSS JOIN LATERAL (
+        SELECT c.shared / NULLIF(c.total + cardinality(topic_list) - c.shared, 0) AS similarity
+    ) m
+    WHERE a.topics ?| topic_list
+      AND m.similarity >= min_similarity
+    ORDER BY m.similarity DESC, a.created_at DESC
+    LIMIT max_rows;
+$$ LANGUAGE sql STABLE;
+
+
+-- One row per crew.kickoff() (see run_metrics.py); article_id is set when the run saved an article
+CREATE TABLE IF NOT EXISTS generation_runs (
+    id TEXT PRIMARY KEY,
+    article_id TEXT REFERENCES articles(id) ON DELETE SET NULL,
+    model TEXT,
+    status TEXT NOT NULL,
+    error TEXT,
+    started_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    duration_ms INTEGER,
+    llm_calls INTEGER DEFAULT 0,
+    tool_calls INTEGER DEFAULT 0,
+    prompt_tokens INTEGER DEFAULT 0,
+    completion_tokens INTEGER DEFAULT 0,
+    total_tokens INTEGER DEFAULT 0,
+    cost_usd NUMERIC(12, 6) DEFAULT 0,
+    -- Per-task and per-tool breakdown, parse mode and request/token rates
+    metrics JSONB DEFAULT '{}'::jsonb
+);
+
+CREATE INDEX IF NOT EXISTS idx_generation_runs_started_at ON generation_runs(started_at DESC);
+CREATE INDEX IF NOT EXISTS idx_generation_runs_article_id ON generation_runs(article_id);
+
+-- No public policies: runs are written and read by the backend's service_role key
+ALTER TABLE generation_runs ENABLE ROW LEVEL SECURITY;
+
+
+-- Generation job queue shared by the web service and a separate worker service
+-- Used when JOB_QUEUE_BACKEND=supabase (see job_queue.py). Enqueueing and
+-- claiming go through functions so deduplication and claims are atomic.
+CREATE TABLE IF NOT EXISTS generation_jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payload JSONB,
+    result JSONB,
+    error TEXT,
+    worker TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    started_at TIMESTAMPTZ,
+    heartbeat_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_generation_jobs_status ON generation_jobs(status, created_at);
+
+-- No public policies: jobs are written and read by the backend's service_role key
+ALTER TABLE generation_jobs ENABLE ROW LEVEL SECURITY;
+
+-- Return the pending job of this kind (queued, or running with a fresh heartbeat)
+-- when dedupe is set, otherwise insert job_id as a new queued job
+CREATE OR REPLACE FUNCTION enqueue_generation_job(job_id TEXT, job_kind TEXT, job_payload JSONB, stale_seconds INTEGER, dedupe BOOLEAN)
+RETURNS SETOF generation_jobs AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('generation_jobs:' || job_kind));
+    IF dedupe THEN
+        RETURN QUERY
+        SELECT * FROM generation_jobs j
+        WHERE j.kind = job_kind
+          AND (j.status = 'queued'
+               OR (j.status = 'running' AND COALESCE(j.heartbeat_at, j.started_at) >= NOW() - make_interval(secs => stale_seconds)))
+        ORDER BY j.created_at
+        LIMIT 1;
+        IF FOUND THEN
+            RETURN;
+        END IF;
+    END IF;
+    RETURN QUERY
+    INSERT INTO generation_jobs (id, kind, status, payload)
+    VALUES (job_id, job_kind, 'queued', job_payload)
+    RETURNING *;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Move the oldest queued job of this kind to running and return it (no row if none)
+CREATE OR REPLACE FUNCTION claim_generation_job(job_kind TEXT, worker_id TEXT)
+RETURNS SETOF generation_jobs AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE generation_jobs j
+    SET status = 'running', worker = worker_id, started_at = NOW(), heartbeat_at = NOW()
+    WHERE j.id = (
+        SELECT q.id FROM generation_jobs q
+        WHERE q.kind = job_kind AND q.status = 'queued'
+        ORDER BY q.created_at
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING j.*;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import checkpoints
+from checkpoints import CheckpointStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+
+
+def _pipeline(checkpoint, ran, fail_at=None):
+    """The stage pattern run_pipeline follows: reuse a saved stage, else compute and save it"""
+    outputs = {}
+    for stage in ("candidates", "selection", "draft"):
+        saved = checkpoint.get(stage)
+        if saved is None:
+            if stage == fail_at:
+                raise RuntimeError(f"{stage} failed")
+            ran.append(stage)
+            saved = f"{stage} output"
+            checkpoint.save(stage, saved)
+        outputs[stage] = saved
+    return outputs
+
+
+def test_resume_skips_completed_stages(store):
+    ran = []
+    first = store.resume_or_begin()
+    with pytest.raises(RuntimeError):
+        _pipeline(first, ran, fail_at="draft")
+    assert ran == ["candidates", "selection"]
+
+    ran.clear()
+    second = store.resume_or_begin()
+    assert second.run_id == first.run_id and second.attempt == 2
+    assert _pipeline(second, ran)["selection"] == "selection output"
+    assert ran == ["draft"]
+    assert second.resumed == ["candidates", "selection"]
+
+
+def test_discarded_stage_is_recomputed(store):
+    ran = []
+    checkpoint = store.resume_or_begin()
+    _pipeline(checkpoint, ran)
+    checkpoint.discard("draft")
+    ran.clear()
+    _pipeline(store.resume_or_begin(), ran)
+    assert ran == ["draft"]
+
+
+def test_completed_run_is_not_resumed(store):
+    checkpoint = store.resume_or_begin()
+    checkpoint.save("candidates", ["item"])
+    store.complete(checkpoint.run_id, "20260101000000")
+    assert store.load(checkpoint.run_id) == {}
+    fresh = store.resume_or_begin()
+    assert fresh.run_id != checkpoint.run_id and fresh.stages == {}
+
+
+def test_attempt_cap_starts_over(store, monkeypatch):
+    monkeypatch.setattr(checkpoints, "CHECKPOINT_MAX_ATTEMPTS", 2)
+    first = store.resume_or_begin()
+    first.save("candidates", ["item"])
+    assert store.is_resumable(first)
+    second = store.resume_or_begin()
+    assert second.run_id == first.run_id and second.attempt == 2
+    # The last attempt: a failure here is not retried from the checkpoint
+    assert not store.is_resumable(second)
+    third = store.resume_or_begin()
+    assert third.run_id != first.run_id and third.attempt == 1 and third.stages == {}
+
+
+def test_stale_run_is_abandoned(store):
+    old = store.resume_or_begin()
+    old.save("candidates", ["item"])
+    created = (datetime.now(timezone.utc) - timedelta(seconds=checkpoints.CHECKPOINT_MAX_AGE_SECONDS + 60)).isoformat()
+    with store._connect() as conn:
+        conn.execute("UPDATE pipeline_runs SET created_at = ? WHERE run_id = ?", (created, old.run_id))
+    fresh = store.resume_or_begin()
+    assert fresh.run_id != old.run_id
+    with store._connect() as conn:
+        status = conn.execute("SELECT status FROM pipeline_runs WHERE run_id = ?", (old.run_id,)).fetchone()[0]
+    assert status == "abandoned"
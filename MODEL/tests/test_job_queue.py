@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from job_queue import JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"))
+
+
+def _set_heartbeat(queue, job_id, when):
+    with queue._connect() as conn:
+        conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ?", (when.isoformat(), job_id))
+
+
+def test_enqueue_returns_pending_job_instead_of_a_duplicate(queue):
+    first = queue.enqueue()
+    second = queue.enqueue()
+    assert first["status"] == "queued" and not first["deduplicated"]
+    assert second["id"] == first["id"] and second["deduplicated"]
+
+
+def test_enqueue_without_dedupe_always_adds(queue):
+    assert queue.enqueue()["id"] != queue.enqueue(dedupe=False)["id"]
+
+
+def test_claim_next_runs_oldest_queued_job_once(queue):
+    job = queue.enqueue(payload={"trigger": "api"})
+    claimed = queue.claim_next("worker-1")
+    assert claimed["id"] == job["id"]
+    assert claimed["status"] == "running" and claimed["worker"] == "worker-1"
+    assert claimed["payload"] == {"trigger": "api"}
+    assert queue.claim_next("worker-2") is None
+
+
+def test_running_job_with_fresh_heartbeat_is_deduplicated(queue):
+    job = queue.enqueue()
+    queue.claim_next("worker-1")
+    again = queue.enqueue()
+    assert again["id"] == job["id"] and again["status"] == "running"
+
+
+def test_heartbeat_keeps_a_running_job_alive(queue):
+    job = queue.enqueue()
+    queue.claim_next("worker-1")
+    _set_heartbeat(queue, job["id"], datetime.now() - timedelta(seconds=300))
+    queue.heartbeat(job["id"])
+    assert queue.fail_stale(60) == 0
+    assert queue.get(job["id"])["status"] == "running"
+
+
+def test_stale_job_is_failed_and_no_longer_blocks_new_requests(queue):
+    job = queue.enqueue()
+    queue.claim_next("worker-1")
+    _set_heartbeat(queue, job["id"], datetime.now() - timedelta(seconds=300))
+    # Stale but not yet swept: enqueue already ignores it
+    fresh = queue.enqueue(payload={"trigger": "retry"})
+    assert fresh["id"] != job["id"] and not fresh["deduplicated"]
+    assert queue.fail_stale(60) == 1
+    lost = queue.get(job["id"])
+    assert lost["status"] == "failed" and lost["error"] == "worker lost"
+    assert queue.claim_next("worker-2")["id"] == fresh["id"]
+
+
+def test_complete_and_fail_record_results(queue):
+    done = queue.enqueue(dedupe=False)
+    failed = queue.enqueue(dedupe=False)
+    queue.complete(done["id"], {"article": {"id": "20260101000000"}})
+    queue.fail(failed["id"], "quota", {"retry_after": 60})
+    assert queue.get(done["id"])["result"] == {"article": {"id": "20260101000000"}}
+    assert queue.get(failed["id"])["status"] == "failed"
+    assert queue.get(failed["id"])["error"] == "quota"
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from leader_lock import LeaderLock
+
+MODEL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HOLDER = textwrap.dedent("""
+    import sys
+    sys.path.insert(0, sys.argv[1])
+    from leader_lock import LeaderLock
+    lock = LeaderLock(backend="file", lock_file=sys.argv[2])
+    print("leader" if lock.try_acquire() else "follower", flush=True)
+    sys.stdin.read()  # hold until the test closes stdin
+""")
+
+
+@pytest.fixture
+def lock_file(tmp_path):
+    return str(tmp_path / "scheduler.lock")
+
+
+def _start_holder(lock_file):
+    holder = subprocess.Popen(
+        [sys.executable, "-c", HOLDER, MODEL_DIR, lock_file],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+    )
+    return holder, holder.stdout.readline().strip()
+
+
+def _stop(holder):
+    holder.stdin.close()
+    holder.wait(timeout=10)
+
+
+def test_only_one_process_leads(lock_file):
+    holder, role = _start_holder(lock_file)
+    try:
+        assert role == "leader"
+        lock = LeaderLock(backend="file", lock_file=lock_file)
+        assert not lock.try_acquire()
+        assert not lock.is_leader
+    finally:
+        _stop(holder)
+
+
+def test_leadership_passes_on_when_the_leader_exits(lock_file):
+    holder, _ = _start_holder(lock_file)
+    _stop(holder)
+    lock = LeaderLock(backend="file", lock_file=lock_file)
+    try:
+        assert lock.try_acquire() and lock.is_leader
+        follower, role = _start_holder(lock_file)
+        _stop(follower)
+        assert role == "follower"
+    finally:
+        lock.release()
+    assert not lock.is_leader
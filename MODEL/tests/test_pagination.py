@@ -0,0 +1,113 @@
+import operator
+import re
+
+import pytest
+
+from pagination import decode_cursor, encode_cursor, keyset_filter
+from topic_index import TopicIndex
+
+FILTER_RE = re.compile(
+    r'^created_at\.(lt|gt)\."([^"]+)",and\(created_at\.eq\."([^"]+)",id\.(lt|gt)\."([^"]+)"\)$'
+)
+OPS = {"lt": operator.lt, "gt": operator.gt}
+
+# Several articles share a timestamp, across page boundaries
+ROWS = [
+    {"id": article_id, "title": article_id, "created_at": created_at, "topics": ["storm"]}
+    for article_id, created_at in [
+        ("a1", "2026-01-01T00:00:00"), ("a2", "2026-01-01T00:00:00"), ("a3", "2026-01-01T00:00:00"),
+        ("b1", "2026-01-02T00:00:00"), ("b2", "2026-01-02T00:00:00"), ("c1", "2026-01-03T00:00:00"),
+    ]
+]
+
+
+class FakeArticles:
+    """Just enough of the PostgREST query builder to evaluate keyset pages"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.descending = False
+        self.after = None
+        self.page_size = None
+
+    def table(self, name):
+        return self
+
+    def select(self, columns):
+        return self
+
+    def order(self, column, desc=False):
+        self.descending = desc
+        return self
+
+    def limit(self, count):
+        self.page_size = count
+        return self
+
+    def or_(self, expression):
+        op, created_at, tied_at, id_op, article_id = FILTER_RE.match(expression).groups()
+        assert op == id_op and created_at == tied_at
+        self.after = (OPS[op], created_at, article_id)
+        return self
+
+    def execute(self):
+        rows = sorted(self.rows, key=lambda r: (r["created_at"], r["id"]), reverse=self.descending)
+        if self.after:
+            op, created_at, article_id = self.after
+            rows = [
+                r for r in rows
+                if op(r["created_at"], created_at) or (r["created_at"] == created_at and op(r["id"], article_id))
+            ]
+        self.after = None
+        return type("Response", (), {"data": rows[:self.page_size]})()
+
+
+def _walk(rows, descending, page_size=2):
+    client = FakeArticles(rows)
+    seen, cursor = [], None
+    while True:
+        query = client.table("articles").select("*").order("created_at", desc=descending).order("id", desc=descending)
+        query = query.limit(page_size)
+        if cursor:
+            query = query.or_(keyset_filter(*decode_cursor(cursor), descending=descending))
+        page = query.execute().data
+        seen.extend(row["id"] for row in page)
+        if len(page) < page_size:
+            return seen
+        cursor = encode_cursor(page[-1])
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor({"id": "20260101120000", "created_at": "2026-01-01T12:00:00+00:00", "title": "x"})
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == ("2026-01-01T12:00:00+00:00", "20260101120000")
+
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", "WzFd", encode_cursor({"id": 1, "created_at": "2026"})])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_keyset_filter_breaks_ties_on_id():
+    assert keyset_filter("2026-01-01", "a2", descending=True) == (
+        'created_at.lt."2026-01-01",and(created_at.eq."2026-01-01",id.lt."a2")'
+    )
+    assert keyset_filter("2026-01-01", "a2").startswith('created_at.gt."2026-01-01"')
+
+
+@pytest.mark.parametrize("descending", [True, False])
+def test_pages_with_equal_created_at_skip_and_repeat_nothing(descending):
+    # IDs in ROWS sort the same way as (created_at, id)
+    assert _walk(ROWS, descending) == sorted((r["id"] for r in ROWS), reverse=descending)
+
+
+def test_topic_index_sync_pages_through_ties(tmp_path, monkeypatch):
+    monkeypatch.setattr("topic_index.SYNC_PAGE_SIZE", 2)
+    index = TopicIndex(str(tmp_path / "topics.sqlite3"))
+    # A locally saved, newer article must not hide older ones saved elsewhere
+    index.add("z9", "local", "2026-02-01T00:00:00", ["storm"])
+    assert index.sync_from_supabase(FakeArticles(ROWS)) == len(ROWS)
+    assert index.synced_through() == ("2026-01-03T00:00:00", "c1")
+    assert index.sync_from_supabase(FakeArticles(ROWS)) == 0
+    assert index.count() == len(ROWS) + 1
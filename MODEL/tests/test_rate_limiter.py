@@ -0,0 +1,105 @@
+import pytest
+
+import rate_limiter
+from rate_limiter import RateLimiter, TokenBucket, limit_llm, retry_after_seconds
+
+
+class FakeClock:
+    """Stands in for the time module: sleep() advances monotonic() instantly"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", fake)
+    return fake
+
+
+class QuotaError(Exception):
+    status_code = 429
+
+
+class FakeLLM:
+    def __init__(self, failures):
+        self.failures = list(failures)
+        self.calls = 0
+
+    def call(self, messages, *args, **kwargs):
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        return "ok"
+
+
+def test_bucket_refills_continuously_up_to_capacity(clock):
+    bucket = TokenBucket(60, 60)  # one unit per second
+    bucket.take(60, clock.now)
+    assert bucket.wait_time(1, clock.now) == pytest.approx(1.0)
+    assert bucket.remaining(clock.now + 30) == pytest.approx(30)
+    assert bucket.remaining(clock.now + 600) == pytest.approx(60)
+
+
+def test_bucket_debt_delays_the_next_take(clock):
+    bucket = TokenBucket(10, 60)
+    bucket.take(15, clock.now)  # charged more than reserved
+    assert bucket.wait_time(1, clock.now) == pytest.approx(36.0)
+
+
+def test_requests_beyond_rpm_are_spaced_out(clock):
+    limiter = RateLimiter("gemini-test", rpm=2, tpm=1_000_000, rpd=100)
+    assert limiter.acquire(10) == 0
+    assert limiter.acquire(10) == 0
+    waited = limiter.acquire(10)
+    assert waited == pytest.approx(30.0)
+    assert limiter.stats()["throttled_calls"] == 1
+
+
+def test_token_quota_limits_large_prompts(clock):
+    limiter = RateLimiter("gemini-test", rpm=100, tpm=1000, rpd=100)
+    limiter.acquire(900)
+    assert limiter.acquire(500) == pytest.approx(24.0)
+
+
+def test_429_pauses_and_retries_in_place(clock, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_ENABLED", True)
+    llm = FakeLLM([QuotaError("429 RESOURCE_EXHAUSTED retryDelay: '7s'")])
+    limiter = limit_llm(llm, "gemini-2.0-flash")
+    assert llm.call([{"role": "user", "content": "hi"}]) == "ok"
+    assert llm.calls == 2
+    assert limiter.rate_limited == 1
+    assert clock.slept and clock.slept[-1] == pytest.approx(7.0)
+
+
+def test_long_429_delay_is_raised(clock, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_ENABLED", True)
+    llm = FakeLLM([QuotaError("429 retry in 3600s")])
+    limiter = limit_llm(llm, "gemini-2.0-flash")
+    with pytest.raises(QuotaError):
+        llm.call("hi")
+    assert limiter.blocked_for() == pytest.approx(3600.0)
+
+
+def test_non_quota_errors_are_not_retried(clock, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_ENABLED", True)
+    llm = FakeLLM([ValueError("bad request")])
+    limiter = limit_llm(llm, "gemini-2.0-flash")
+    with pytest.raises(ValueError):
+        llm.call("hi")
+    assert limiter.rate_limited == 0
+
+
+def test_retry_after_hints():
+    assert retry_after_seconds(QuotaError("details: {'retryDelay': '12s'}")) == 12.0
+    assert retry_after_seconds(QuotaError("Please retry in 4.5s.")) == 4.5
+    assert retry_after_seconds(QuotaError("quota exhausted")) is None
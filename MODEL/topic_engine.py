@@ -0,0 +1,282 @@
+"""
+TF-IDF topic extraction.
+
+Topics used to be the 10 most frequent non-stop words, so words every story
+uses ("government", "people", "year") crowded out the ones that identify it.
+Terms are now ranked by sublinear TF-IDF against document frequencies of the
+articles saved so far:
+
+    score(term) = (1 + log tf) * (log((1 + N) / (1 + df)) + 1)
+
+Document frequencies are maintained incrementally (one update per saved
+article) and persisted in SQLite, so every process ranks against the same
+corpus. With an empty corpus every idf is 1 and this degrades to plain term
+frequency - the old behaviour.
+
+Related articles are matched by Jaccard overlap of stored topic sets, which
+only compares like with like if every article's topics were ranked with the
+same idf. So once the corpus reaches TOPIC_IDF_FREEZE_DOCS documents the
+document frequencies used for ranking are frozen; later articles still count
+into the live statistics but do not move the idf. refreeze() (run by
+`backfill_topics.py --recompute`, which re-extracts every stored article's
+topics) moves the frozen idf to the current corpus.
+
+Statistics are loaded on the first extraction, and NumPy/SciPy on the first
+batch, so importing the web tier does not pay for either. extract_many()
+scores a batch in one sparse matrix operation when NumPy/SciPy are
+installed, and falls back to pure Python otherwise.
+"""
+import heapq
+import math
+import os
+import re
+import sqlite3
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from threading import Lock
+
+TOPIC_STATS_PATH = os.getenv(
+    "TOPIC_STATS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "topic_stats.sqlite3"),
+)
+TOPIC_COUNT = 10
+# Title words are counted this many times: headlines name the story
+TITLE_WEIGHT = 2
+BOOTSTRAP_PAGE_SIZE = 200
+# Corpus size at which the idf used for ranking is frozen (see refreeze)
+TOPIC_IDF_FREEZE_DOCS = int(os.getenv("TOPIC_IDF_FREEZE_DOCS", "50"))
+
+_WORD_RE = re.compile(r"\b[a-z]{3,}\b")
+STOP_WORDS = frozenset("""
+the and but for with are was were been have has had does did will would could should may might must can
+this that these those you she they what which who when where why how not all any also about after again
+against because before being below between both down during each few from further here into more most
+other our out over own same some such than then there their them through too under until very its his
+her him your yours ours theirs just now only off once upon while said says say told according new one
+two three first last year years week weeks day days time times month months today yesterday tomorrow
+monday tuesday wednesday thursday friday saturday sunday per via amid including made make makes like
+many much get got still even well back since around among across within without another every
+news report reports reported latest update updates live breaking read full story article source sources
+""".split())
+
+
+_sparse_modules = None
+
+
+def _scipy_sparse():
+    """(numpy, scipy.sparse), imported on first use; (None, None) when not installed"""
+    global _sparse_modules
+    if _sparse_modules is None:
+        try:
+            import numpy
+            from scipy import sparse
+            _sparse_modules = (numpy, sparse)
+        except ImportError:  # optional: batch extraction falls back to pure Python
+            _sparse_modules = (None, None)
+    return _sparse_modules
+
+
+def term_counts(title, content=""):
+    """Counts of candidate terms (3+ letter non-stop words), title words weighted"""
+    # Count every word first and drop stop words from the (much smaller) key set
+    counts = Counter(_WORD_RE.findall((content or "").lower()))
+    for word in _WORD_RE.findall((title or "").lower()):
+        counts[word] += TITLE_WEIGHT
+    for word in STOP_WORDS.intersection(counts):
+        del counts[word]
+    return counts
+
+
+class TopicEngine:
+    """Document frequencies of saved articles plus TF-IDF topic extraction"""
+
+    def __init__(self, path=TOPIC_STATS_PATH):
+        self.path = path
+        self._lock = Lock()
+        self._loaded = False
+
+    def _ensure_loaded(self):
+        """Create the tables and load statistics on first use"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("CREATE TABLE IF NOT EXISTS doc_freq (term TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID")
+                conn.execute("CREATE TABLE IF NOT EXISTS documents (id TEXT PRIMARY KEY) WITHOUT ROWID")
+                conn.execute("CREATE TABLE IF NOT EXISTS frozen_doc_freq (term TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID")
+                conn.execute("CREATE TABLE IF NOT EXISTS idf_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+                self._load_stats(conn)
+            self._loaded = True
+
+    def _load_stats(self, conn):
+        self._n_docs = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        frozen = conn.execute("SELECT value FROM idf_meta WHERE key = 'frozen_n_docs'").fetchone()
+        if frozen is None and self._n_docs >= TOPIC_IDF_FREEZE_DOCS:
+            self._freeze(conn)
+            frozen = (self._n_docs,)
+        if frozen is None:
+            df = conn.execute("SELECT term, df FROM doc_freq").fetchall()
+            self._idf_docs = self._n_docs
+        else:
+            df = conn.execute("SELECT term, df FROM frozen_doc_freq").fetchall()
+            self._idf_docs = int(frozen[0])
+        # Precomputed idf per known term; unseen terms share _unseen_idf
+        corpus = 1 + self._idf_docs
+        self._idf = {term: math.log(corpus / (1 + count)) + 1 for term, count in df}
+        self._unseen_idf = math.log(corpus) + 1
+
+    def _freeze(self, conn):
+        """Snapshot the live document frequencies as the ones used for ranking"""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM frozen_doc_freq")
+            conn.execute("INSERT INTO frozen_doc_freq (term, df) SELECT term, df FROM doc_freq")
+            conn.execute(
+                "INSERT OR REPLACE INTO idf_meta (key, value) "
+                "VALUES ('frozen_n_docs', (SELECT COUNT(*) FROM documents))"
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        print(f"[{datetime.now()}] 🧊 Topic idf frozen at {self._n_docs} document(s)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @property
+    def n_docs(self):
+        self._ensure_loaded()
+        return self._n_docs
+
+    def idf(self, term):
+        self._ensure_loaded()
+        return self._idf.get(term, self._unseen_idf)
+
+    def refreeze(self):
+        """
+        Rank against the current corpus from now on. Topics stored before
+        this are no longer comparable: re-extract them all afterwards.
+        """
+        self._ensure_loaded()
+        with self._lock, self._connect() as conn:
+            self._n_docs = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            self._freeze(conn)
+            self._load_stats(conn)
+
+    def add_documents(self, documents):
+        """
+        Count (doc_id, title, content) documents into the corpus statistics.
+        Documents already counted are skipped. Returns the number added.
+        """
+        self._ensure_loaded()
+        added = 0
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                increments = Counter()
+                for doc_id, title, content in documents:
+                    cursor = conn.execute("INSERT OR IGNORE INTO documents (id) VALUES (?)", (str(doc_id),))
+                    if cursor.rowcount:
+                        increments.update(term_counts(title, content).keys())
+                        added += 1
+                conn.executemany(
+                    "INSERT INTO doc_freq (term, df) VALUES (?, ?) "
+                    "ON CONFLICT(term) DO UPDATE SET df = df + excluded.df",
+                    increments.items(),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            # Re-read so counts written by other processes are picked up too
+            # (and the idf is frozen once the corpus is large enough)
+            if added:
+                self._load_stats(conn)
+        return added
+
+    def add_document(self, doc_id, title, content):
+        return self.add_documents([(doc_id, title, content)])
+
+    def extract(self, title, content, top_n=TOPIC_COUNT):
+        """Top TF-IDF terms of one article, best first"""
+        self._ensure_loaded()
+        log = math.log
+        idf = self._idf.get
+        unseen = self._unseen_idf
+        scored = heapq.nsmallest(top_n, (
+            (-(1 + log(tf)) * idf(term, unseen), term)
+            for term, tf in term_counts(title, content).items()
+        ))
+        return [term for _, term in scored]
+
+    def extract_many(self, documents, top_n=TOPIC_COUNT):
+        """Top TF-IDF terms for many (title, content) pairs; same result as extract() per item"""
+        documents = list(documents)
+        np, sparse = _scipy_sparse() if len(documents) >= 2 else (None, None)
+        if sparse is None:
+            return [self.extract(title, content, top_n) for title, content in documents]
+        self._ensure_loaded()
+
+        doc_counts = [term_counts(title, content) for title, content in documents]
+        vocabulary = sorted(set().union(*doc_counts))
+        column = {term: i for i, term in enumerate(vocabulary)}
+
+        # Document-term count matrix (CSR)
+        indptr = [0]
+        indices = []
+        data = []
+        for counts in doc_counts:
+            indices.extend(map(column.__getitem__, counts))
+            data.extend(counts.values())
+            indptr.append(len(indices))
+        counts = sparse.csr_matrix(
+            (np.array(data, dtype=np.float64), np.array(indices, dtype=np.int64), np.array(indptr)),
+            shape=(len(documents), len(vocabulary)),
+        )
+
+        idf = np.fromiter((self.idf(term) for term in vocabulary), dtype=np.float64, count=len(vocabulary))
+        scores = counts.copy()
+        scores.data = 1 + np.log(scores.data)
+        scores = scores.multiply(idf).tocsr()
+
+        # One sort over all entries: by row, highest score first, ties by term
+        # (columns are in alphabetical order), then keep each row's first top_n
+        rows = np.repeat(np.arange(scores.shape[0]), np.diff(scores.indptr))
+        order = np.lexsort((scores.indices, -scores.data, rows))
+        rank = np.arange(len(order)) - scores.indptr[rows[order]]
+        keep = order[rank < top_n]
+        topics = [[] for _ in documents]
+        for row, col in zip(rows[keep].tolist(), scores.indices[keep].tolist()):
+            topics[row].append(vocabulary[col])
+        return topics
+
+    def bootstrap_from_supabase(self, supabase_client):
+        """Seed corpus statistics from the stored articles (only when the corpus is empty)"""
+        if self.n_docs:
+            return 0
+        added = 0
+        last_id = None
+        while True:
+            query = supabase_client.table("articles").select("id, title, content").order("id").limit(BOOTSTRAP_PAGE_SIZE)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            rows = query.execute().data or []
+            if not rows:
+                break
+            added += self.add_documents((row["id"], row.get("title") or "", row.get("content") or "") for row in rows)
+            last_id = rows[-1]["id"]
+            if len(rows) < BOOTSTRAP_PAGE_SIZE:
+                break
+        if added:
+            print(f"[{datetime.now()}] 🧮 Topic engine corpus seeded from {added} stored article(s)")
+        return added
@@ -0,0 +1,198 @@
+"""
+Persistent inverted topic index for related-article lookup.
+
+Every saved article's topics are added once to a topic -> article ID posting
+table (SQLite, next to the job queue). Finding related articles then only
+touches the postings of the new article's topics instead of re-extracting
+topics from every stored article on each generation.
+
+The index is a local derivative of the Supabase articles table: it is filled
+incrementally by save_article and caught up from Supabase (stored topics
+column), e.g. after a fresh deploy or when another process saved articles.
+Catch-up pages through the table on (created_at, id) from its own
+synced-through mark, which save_article never moves, so articles saved
+elsewhere are not skipped.
+"""
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+
+from pagination import keyset_filter
+
+TOPIC_INDEX_PATH = os.getenv(
+    "TOPIC_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "topic_index.sqlite3"),
+)
+SYNC_PAGE_SIZE = 500
+
+
+class TopicIndex:
+    """topic -> article IDs, plus the few article fields related_articles needs"""
+
+    def __init__(self, path=TOPIC_INDEX_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS indexed_articles (
+                    id TEXT PRIMARY KEY,
+                    title TEXT,
+                    created_at TEXT,
+                    topics TEXT NOT NULL,
+                    topic_count INTEGER NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS topic_postings (
+                    topic TEXT NOT NULL,
+                    article_id TEXT NOT NULL,
+                    PRIMARY KEY (topic, article_id)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS index_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_indexed_created ON indexed_articles(created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_postings_article ON topic_postings(article_id)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _add(conn, article_id, title, created_at, topics):
+        conn.execute("DELETE FROM topic_postings WHERE article_id = ?", (article_id,))
+        conn.execute(
+            "INSERT OR REPLACE INTO indexed_articles (id, title, created_at, topics, topic_count) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (article_id, title, created_at, json.dumps(topics), len(topics)),
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO topic_postings (topic, article_id) VALUES (?, ?)",
+            [(topic, article_id) for topic in topics],
+        )
+
+    def add(self, article_id, title, created_at, topics):
+        """Index (or re-index) one article"""
+        topics = sorted({t for t in topics or [] if t})
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._add(conn, str(article_id), title, created_at, topics)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def add_many(self, articles, synced_through=None):
+        """
+        Index a batch of article dicts (id, title, created_at, topics) in one
+        transaction, recording synced_through ((created_at, id)) with it if given
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for article in articles:
+                    topics = sorted({t for t in article.get("topics") or [] if t})
+                    self._add(conn, str(article["id"]), article.get("title"), article.get("created_at"), topics)
+                if synced_through is not None:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO index_meta (key, value) VALUES ('synced_through', ?)",
+                        (json.dumps(list(synced_through)),),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM indexed_articles").fetchone()[0]
+
+    def synced_through(self):
+        """(created_at, id) of the last Supabase article read by sync_from_supabase, or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM index_meta WHERE key = 'synced_through'").fetchone()
+        return tuple(json.loads(row[0])) if row else None
+
+    def search(self, topics, similarity_threshold=0.3, limit=None):
+        """
+        Articles whose topic sets have Jaccard similarity >= similarity_threshold
+        with topics, best first. Only the postings of the given topics are read.
+        """
+        topics = sorted({t for t in topics or [] if t})
+        if not topics:
+            return []
+        placeholders = ",".join("?" * len(topics))
+        query = f"""
+            SELECT a.id, a.title, a.created_at, a.topics, a.topic_count, p.shared
+            FROM (
+                SELECT article_id, COUNT(*) AS shared
+                FROM topic_postings WHERE topic IN ({placeholders})
+                GROUP BY article_id
+            ) AS p
+            JOIN indexed_articles AS a ON a.id = p.article_id
+            WHERE CAST(p.shared AS REAL) / (? + a.topic_count - p.shared) >= ?
+        """
+        with self._connect() as conn:
+            rows = conn.execute(query, (*topics, len(topics), similarity_threshold)).fetchall()
+
+        new_topics = set(topics)
+        matches = []
+        for row in rows:
+            existing_topics = json.loads(row["topics"])
+            matches.append({
+                "article": {"id": row["id"], "title": row["title"], "created_at": row["created_at"]},
+                "similarity": row["shared"] / (len(topics) + row["topic_count"] - row["shared"]),
+                "common_topics": [t for t in existing_topics if t in new_topics],
+            })
+        # Highest similarity first, newest first among ties
+        matches.sort(key=lambda m: (m["similarity"], m["article"]["created_at"] or ""), reverse=True)
+        return matches[:limit] if limit else matches
+
+    def sync_from_supabase(self, supabase_client, extract_topics=None):
+        """
+        Index Supabase articles after the synced-through mark (all of them on
+        the first sync), paging on (created_at, id) so articles sharing a
+        timestamp are not skipped. Uses the stored topics column; rows without
+        topics are extracted with extract_topics(title, content) if given.
+        Returns the number of articles indexed.
+        """
+        cursor = self.synced_through()
+        columns = "id, title, created_at, topics" + (", content" if extract_topics else "")
+        indexed = 0
+        while True:
+            query = (
+                supabase_client.table("articles").select(columns)
+                .order("created_at").order("id").limit(SYNC_PAGE_SIZE)
+            )
+            if cursor:
+                created_at, article_id = cursor
+                query = query.or_(keyset_filter(created_at, article_id))
+            rows = query.execute().data or []
+            if not rows:
+                break
+            batch = []
+            for row in rows:
+                topics = row.get("topics")
+                if isinstance(topics, str):
+                    try:
+                        topics = json.loads(topics)
+                    except json.JSONDecodeError:
+                        topics = []
+                if not topics and extract_topics:
+                    topics = extract_topics(row.get("title") or "", row.get("content") or "")
+                batch.append({**row, "topics": topics or []})
+            cursor = (rows[-1]["created_at"], rows[-1]["id"])
+            self.add_many(batch, synced_through=cursor)
+            indexed += len(batch)
+            if len(rows) < SYNC_PAGE_SIZE:
+                break
+        if indexed:
+            print(f"[{datetime.now()}] 🗂️  Topic index caught up: {indexed} article(s) indexed ({self.count()} total)")
+        return indexed
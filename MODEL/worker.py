@@ -0,0 +1,128 @@
+"""
+Article generation worker.
+
+Runs everything that talks to the LLM, separately from request handling:
+- the generation scheduler
+- generation jobs queued by POST /api/generate-article (see job_queue.py)
+- the news ingestion loop that keeps the local news store current (see ingest.py)
+
+All three only run in the process holding scheduler leadership
+(leader_lock.py), so the model layer loads in one process per host and other
+gunicorn workers only serve requests.
+
+Deployments run it as its own process (the Procfile/render.yaml worker):
+    python worker.py
+
+with JOB_QUEUE_BACKEND=supabase on both services, so jobs queued by the web
+service reach it. With EMBEDDED_WORKER=true, wsgi.py runs it on background
+threads of the web process instead, and the default SQLite queue
+(JOBS_DB_PATH) is enough. Either way web requests never wait on the LLM.
+"""
+import os
+import socket
+import time
+from datetime import datetime
+from threading import Event, Thread
+
+from api import generate_article_task, get_crew, job_queue, scheduler_worker, supabase_client
+from ingest import INGEST_ENABLED, ingest_loop
+from job_queue import JOB_STALE_SECONDS
+from leader_lock import LeaderLock
+
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "5"))
+# How often a running job is marked alive (well below JOB_STALE_SECONDS)
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "30"))
+
+
+def _job_result(result):
+    """Compact job result stored in the queue (the full article lives in Supabase)"""
+    article = result.get("article") or {}
+    summary = {key: value for key, value in result.items() if key != "article"}
+    if article:
+        summary["article"] = {
+            "id": article.get("id"),
+            "title": article.get("title"),
+            "created_at": article.get("created_at"),
+            "content_preview": article.get("content_preview"),
+            "images": article.get("images", []),
+        }
+    return summary
+
+
+def _heartbeat(job_id, done):
+    """Mark the job alive every JOB_HEARTBEAT_SECONDS until done is set"""
+    while not done.wait(JOB_HEARTBEAT_SECONDS):
+        try:
+            job_queue.heartbeat(job_id)
+        except Exception as e:
+            print(f"[{datetime.now()}] ⚠️  Could not heartbeat job {job_id}: {e}")
+
+
+def run_job(job):
+    """Run one generation job and record its outcome"""
+    print(f"[{datetime.now()}] 🛠️  Running generation job {job['id']}")
+    done = Event()
+    Thread(target=_heartbeat, args=(job["id"], done), daemon=True, name="job-heartbeat").start()
+    try:
+        result = generate_article_task()
+    except Exception as e:
+        job_queue.fail(job["id"], str(e))
+        return
+    finally:
+        done.set()
+    if result.get("success"):
+        job_queue.complete(job["id"], _job_result(result))
+        print(f"[{datetime.now()}] ✅ Job {job['id']} finished")
+    else:
+        job_queue.fail(job["id"], result.get("error") or "Generation failed", _job_result(result))
+        print(f"[{datetime.now()}] ❌ Job {job['id']} failed: {result.get('error')}")
+
+
+def process_jobs(worker_id, leader=None):
+    """
+    Claim and run queued generation jobs forever. With a LeaderLock, only
+    claims while this process leads (the scheduler thread acquires it).
+    """
+    print(f"[{datetime.now()}] Job processor {worker_id} started (polling every {JOB_POLL_SECONDS}s).")
+    while True:
+        if leader is not None and not leader.is_leader:
+            time.sleep(JOB_POLL_SECONDS)
+            continue
+        try:
+            # Jobs of a worker that died mid-run stop blocking the queue
+            stale = job_queue.fail_stale(JOB_STALE_SECONDS)
+            if stale:
+                print(f"[{datetime.now()}] ⚠️  Marked {stale} stale generation job(s) as failed")
+            job = job_queue.claim_next(worker_id)
+        except Exception as e:
+            print(f"[{datetime.now()}] ⚠️  Could not poll job queue: {e}")
+            job = None
+        if job is None:
+            time.sleep(JOB_POLL_SECONDS)
+            continue
+        run_job(job)
+
+
+def start_worker():
+    """Start the scheduler, job processor and (when enabled) ingestion loop on daemon threads; returns the threads"""
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    # The scheduler thread acquires leadership; jobs and ingestion follow it
+    scheduler_lock = LeaderLock(supabase_client)
+    threads = [
+        Thread(target=scheduler_worker, kwargs={"leader": scheduler_lock}, daemon=True, name="scheduler"),
+        Thread(target=process_jobs, args=(worker_id, scheduler_lock), daemon=True, name="job-processor"),
+    ]
+    if INGEST_ENABLED:
+        threads.append(Thread(target=ingest_loop, kwargs={"leader": scheduler_lock}, daemon=True, name="ingest"))
+    for thread in threads:
+        thread.start()
+    print(f"[{datetime.now()}] ✅ Generation worker started ({scheduler_lock.backend} leader election).")
+    return threads
+
+
+if __name__ == "__main__":
+    # A dedicated worker exists to generate, so load the model layer up front
+    # (surfacing a missing GEMINI_API_KEY at startup rather than on the first job)
+    get_crew()
+    for thread in start_worker():
+        thread.join()
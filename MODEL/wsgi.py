@@ -2,44 +2,48 @@
 WSGI entry point for production deployment with Gunicorn
 """
 import os
-from threading import Thread
+import sys
+import time
 from datetime import datetime
-from api import app, scheduler_worker, generate_article_task, load_articles
 
-# Verify Supabase connection on startup
+# Import-time budget for the web tier. The model layer (crewai, google-genai)
+# is loaded lazily on first generation, so serving workers should boot well
+# within this budget; anything slower is logged so regressions are visible.
+API_IMPORT_BUDGET_SECONDS = float(os.getenv('API_IMPORT_BUDGET_SECONDS', '3'))
+
+_import_started = time.perf_counter()
+from api import app, load_latest_article
+api_import_seconds = time.perf_counter() - _import_started
+
+if api_import_seconds > API_IMPORT_BUDGET_SECONDS:
+    print(f"[{datetime.now()}] ⚠️  API import took {api_import_seconds:.2f}s (budget {API_IMPORT_BUDGET_SECONDS:.2f}s)")
+else:
+    print(f"[{datetime.now()}] ⚡ API imported in {api_import_seconds:.2f}s (budget {API_IMPORT_BUDGET_SECONDS:.2f}s)")
+if 'crewai' in sys.modules:
+    print(f"[{datetime.now()}] ⚠️  crewai was imported at startup - the model layer should only load on first generation")
+
+# Verify Supabase connection on startup (single-row query, not a full table load)
 print(f"[{datetime.now()}] 🔍 Verifying Supabase connection...")
 try:
-    existing_articles = load_articles()
-    print(f"[{datetime.now()}] ✅ Supabase connection verified. Found {len(existing_articles)} existing articles.")
+    latest_article = load_latest_article()
+    print(f"[{datetime.now()}] ✅ Supabase connection verified. Latest article: {latest_article['id'] if latest_article else 'none yet'}.")
 except Exception as e:
     print(f"[{datetime.now()}] ⚠️  WARNING: Could not verify Supabase connection: {str(e)}")
     print(f"[{datetime.now()}] ⚠️  This might indicate a configuration issue. Check SUPABASE_URL and SUPABASE_KEY environment variables.")
     import traceback
     traceback.print_exc()
 
-# Start background scheduler (runs once when module is imported)
-scheduler_thread = Thread(target=scheduler_worker, daemon=True)
-scheduler_thread.start()
-print(f"[{datetime.now()}] ✅ Background scheduler started in production mode.")
-print(f"[{datetime.now()}] ✅ Articles will be generated every 30 minutes and saved to Supabase.")
-
-# Generate initial article on startup (after a short delay to ensure Supabase connection is ready)
-def generate_initial_article():
-    """Generate first article after a short delay"""
-    import time
-    time.sleep(5)  # Wait 5 seconds for app to fully initialize
-    print(f"[{datetime.now()}] 🚀 Generating initial article on startup...")
-    try:
-        generate_article_task()
-        print(f"[{datetime.now()}] ✅ Initial article generation completed.")
-    except Exception as e:
-        print(f"[{datetime.now()}] ❌ ERROR generating initial article: {str(e)}")
-        import traceback
-        traceback.print_exc()
-
-# Start initial article generation in background
-initial_article_thread = Thread(target=generate_initial_article, daemon=True)
-initial_article_thread.start()
+# Article generation runs in the generation worker (`python worker.py`, the
+# Procfile/render.yaml worker process), never in request handlers. With
+# EMBEDDED_WORKER=true it is started here on background threads instead;
+# leader election ensures only one gunicorn worker runs the schedule, queued
+# jobs and ingestion (and loads the model layer).
+if os.getenv('EMBEDDED_WORKER', 'false').lower() == 'true':
+    from worker import start_worker
+    start_worker()
+    print(f"[{datetime.now()}] ✅ Articles will be generated by the scheduler leader and saved to Supabase.")
+else:
+    print(f"[{datetime.now()}] ℹ️  This process only serves requests; articles are generated by `python worker.py`.")
 
 # Export app for Gunicorn
 __all__ = ['app']
\ No newline at end of file